@@ -0,0 +1,64 @@
+"""
+Gunicorn configuration for Tenkobo.
+
+Run with ``gunicorn config.wsgi:application --config config/gunicorn.py``.
+
+The application is loaded once in the master and the workers are forked
+from it (``preload_app``), so the imported code and the warmed-up URLconf
+are shared between workers copy-on-write rather than loaded by each one.
+Set ``GUNICORN_PRELOAD=0`` to load the application in every worker, e.g.
+to pick up code changes with a HUP.
+"""
+import multiprocessing
+import os
+
+
+bind = '0.0.0.0:%s' % os.environ.get('PORT', '8000')
+worker_class = 'gevent'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# Greenlets per worker. Database access is bounded separately by the
+# connection pool size (DATABASE_POOL_SIZE).
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 100))
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') not in ('0', 'false', 'False')
+
+
+def green_psycopg():
+    # psycopg2 is a C extension: without this every query would block the
+    # whole gevent worker instead of just the current greenlet.
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+
+if preload_app:
+    # The gevent worker only patches after forking, by which time the
+    # preloaded application holds unpatched sockets, locks and threads.
+    from gevent import monkey
+    monkey.patch_all()
+    green_psycopg()
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    # Work every worker would otherwise repeat on its first request.
+    from django.urls import get_resolver
+    get_resolver().url_patterns
+
+
+def pre_fork(server, worker):
+    if not preload_app:
+        return
+    # Nothing opened in the master may be shared with the workers.
+    from django.core.cache import caches
+    from django.db import connections
+    from tenkobo.core.db.backends.postgis.base import close_pools
+    connections.close_all()
+    # close_all() only returned the connections to the pools.
+    close_pools()
+    for cache in caches.all():
+        cache.close()
+
+
+def post_fork(server, worker):
+    if not preload_app:
+        green_psycopg()
@@ -10,6 +10,7 @@ https://docs.djangoproject.com/en/dev/ref/settings/
 
 import os
 import environ
+from kombu import Queue
 
 ROOT_DIR = environ.Path(__file__) - 3  # (tenkobo/config/settings/base.py - 3 = tenkobo/)
 APPS_DIR = ROOT_DIR.path('tenkobo')
@@ -40,6 +41,7 @@ DJANGO_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.gis',
+    'django.contrib.postgres',
 
     # Useful template tags:
     # 'django.contrib.humanize',
@@ -71,6 +73,7 @@ LOCAL_APPS = [
     'tenkobo.users.apps.UsersConfig',
     # Your stuff: custom apps go here
     'tenkobo.fsinfoservice.apps.FsinfoserviceConfig',
+    'tenkobo.product.apps.ProductConfig',
 ]
 
 # See: https://docs.djangoproject.com/en/dev/ref/settings/#installed-apps
@@ -80,12 +83,14 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 # ------------------------------------------------------------------------------
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'tenkobo.core.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'tenkobo.core.throttling.RateLimitHeadersMiddleware',
 ]
 
 # MIGRATIONS CONFIGURATION
@@ -130,6 +135,22 @@ DATABASES = {
 }
 DATABASES['default']['ATOMIC_REQUESTS'] = True
 
+# Read replica. API views using tenkobo.core.replicas.ReplicaReadMixin read
+# from it; every other query and every write goes to the default database.
+if env('DATABASE_REPLICA_URL', default=None):
+    DATABASES['replica'] = env.db('DATABASE_REPLICA_URL')
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+DATABASE_ROUTERS = ['tenkobo.core.routers.ReplicaRouter']
+# Seconds a client keeps reading from the primary after a write
+REPLICA_PIN_SECONDS = env.int('DJANGO_REPLICA_PIN_SECONDS', default=10)
+
+
+# REDIS
+# ------------------------------------------------------------------------------
+# Used directly, outside of the cache, by tenkobo.core.redis_client
+REDIS_URL = env('REDIS_URL', default='redis://127.0.0.1:6379/0')
+REDIS_SOCKET_TIMEOUT = env.float('REDIS_SOCKET_TIMEOUT', default=0.5)
+
 
 # GENERAL CONFIGURATION
 # ------------------------------------------------------------------------------
@@ -284,11 +305,67 @@ AUTOSLUG_SLUGIFY_FUNCTION = 'slugify.slugify'
 
 ########## CELERY
 INSTALLED_APPS += ['tenkobo.taskapp.celery.CeleryConfig']
-CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='django://')
-if CELERY_BROKER_URL == 'django://':
-    CELERY_RESULT_BACKEND = 'redis://'
-else:
-    CELERY_RESULT_BACKEND = CELERY_BROKER_URL
+# Settings below are read by tenkobo.taskapp.celery with the CELERY_ namespace,
+# see http://docs.celeryproject.org/en/latest/userguide/configuration.html
+CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://127.0.0.1:6379/1')
+CELERY_RESULT_BACKEND = env('CELERY_RESULT_BACKEND', default=CELERY_BROKER_URL)
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    # Unacknowledged (acks_late) tasks are redelivered after this many seconds,
+    # it has to be longer than the slowest task.
+    'visibility_timeout': env.int('CELERY_VISIBILITY_TIMEOUT', default=60 * 60),
+}
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_RESULT_SERIALIZER = 'json'
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_TASK_IGNORE_RESULT = True
+
+# Each queue gets its own worker pool (see Procfile) so that a backlog on
+# one of them, e.g. geocoding, does not hold up the others.
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_QUEUES = (
+    Queue('default', routing_key='default'),
+    Queue('geocoding', routing_key='geocoding'),
+    Queue('images', routing_key='images'),
+    Queue('exports', routing_key='exports'),
+    Queue('aggregates', routing_key='aggregates'),
+)
+CELERY_TASK_ROUTES = {
+    'fsinfoservice.tasks.geocode_*': {'queue': 'geocoding', 'routing_key': 'geocoding'},
+    'fsinfoservice.tasks.reverse_geocode_*': {'queue': 'geocoding', 'routing_key': 'geocoding'},
+    'product.tasks.create_product_thumbnails': {'queue': 'images', 'routing_key': 'images'},
+    'fsinfoservice.tasks.build_station_snapshots': {'queue': 'exports', 'routing_key': 'exports'},
+    '*.tasks.aggregate_*': {'queue': 'aggregates', 'routing_key': 'aggregates'},
+    'fsinfoservice.tasks.*_duplicate*': {'queue': 'aggregates', 'routing_key': 'aggregates'},
+}
+# External providers bill and throttle per request; limits apply per worker.
+CELERY_TASK_ANNOTATIONS = {
+    'fsinfoservice.tasks.geocode_location': {
+        'rate_limit': env('GEOCODING_RATE_LIMIT', default='5/s'),
+    },
+    'fsinfoservice.tasks.reverse_geocode_location': {
+        'rate_limit': env('GEOCODING_RATE_LIMIT', default='5/s'),
+    },
+}
+# Tasks are idempotent, acknowledge them once they finished so a crashed
+# worker does not lose them. Workers reserve a single task at a time by
+# default; the default queue worker raises this for its short tasks.
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Task wait/run time metrics kept in Redis, see tenkobo/taskapp/metrics.py
+TASK_METRICS_ENABLED = env.bool('TASK_METRICS_ENABLED', default=True)
+TASK_METRICS_RETENTION_MINUTES = env.int('TASK_METRICS_RETENTION_MINUTES', default=24 * 60)
+CELERY_BEAT_SCHEDULE = {
+    # Static per-state/per-city station files, see tenkobo/fsinfoservice/snapshots.py
+    'build-station-snapshots': {
+        'task': 'fsinfoservice.tasks.build_station_snapshots',
+        'schedule': env.int('STATION_SNAPSHOT_INTERVAL', default=15 * 60),
+    },
+    'find-duplicate-stations': {
+        'task': 'fsinfoservice.tasks.find_duplicate_stations',
+        'schedule': 24 * 60 * 60,
+    },
+}
 ########## END CELERY
 # django-compressor
 # ------------------------------------------------------------------------------
@@ -300,22 +377,69 @@ ADMIN_URL = r'^admin/'
 
 # Your common stuff: Below this line define 3rd party library settings
 # ------------------------------------------------------------------------------
-# REST_FRAMEWORK = {
-#     # Use Django's standard `django.contrib.auth` permissions,
-#     # or allow read-only access for unauthenticated users.
-    
-# }
+REST_FRAMEWORK = {
+    # Use Django's standard `django.contrib.auth` permissions,
+    # or allow read-only access for unauthenticated users.
+    'DEFAULT_RENDERER_CLASSES': (
+        'tenkobo.core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_THROTTLE_CLASSES': (
+        'tenkobo.core.throttling.TokenBucketThrottle',
+    ),
+    # Proxies in front of the app, for client IPs from X-Forwarded-For
+    'NUM_PROXIES': env.int('DJANGO_NUM_PROXIES', default=None),
+}
+
+# Token bucket rate limits, see tenkobo/core/throttling.py for the format
+API_THROTTLE_ENABLED = env.bool('API_THROTTLE_ENABLED', default=True)
+API_THROTTLE_RATES = {
+    'anon': env('API_THROTTLE_ANON_RATE', default='5/s:30'),
+    'user': env('API_THROTTLE_USER_RATE', default='10/s:60'),
+    'partner': env('API_THROTTLE_PARTNER_RATE', default='50/s:200'),
+}
+# Partner API keys and their rate, empty for the default partner rate:
+# API_THROTTLE_PARTNERS=key1=100/s:500,key2=
+API_THROTTLE_PARTNERS = env.dict('API_THROTTLE_PARTNERS', default={})
+
+# Response compression and cached list responses, see tenkobo/core/compression.py
+COMPRESSION_MIN_SIZE = env.int('COMPRESSION_MIN_SIZE', default=512)
+COMPRESSION_GZIP_LEVEL = env.int('COMPRESSION_GZIP_LEVEL', default=6)
+COMPRESSION_BROTLI_QUALITY = env.int('COMPRESSION_BROTLI_QUALITY', default=5)
+API_CACHE_ENABLED = env.bool('API_CACHE_ENABLED', default=True)
 
 REST_FRAMEWORK_DOCS = {
     'HIDE_DOCS': False
 }
 
 
+# django-versatileimagefield
+# ------------------------------------------------------------------------------
+# Every product image is pre-warmed with this rendition set right after upload
+# (see tenkobo.product.tasks), so no user request pays for resizing.
+VERSATILEIMAGEFIELD_RENDITION_KEY_SETS = {
+    'products': [
+        ('product_gallery', 'crop__540x540'),
+        ('product_gallery_2x', 'crop__1080x1080'),
+        ('product_list', 'crop__255x255'),
+        ('product_list_2x', 'crop__510x510'),
+        ('product_small', 'crop__60x60'),
+        ('product_small_2x', 'crop__120x120'),
+    ],
+}
+VERSATILEIMAGEFIELD_SETTINGS = {
+    'create_images_on_demand': env.bool('VERSATILEIMAGEFIELD_CREATE_ON_DEMAND', default=True),
+}
+
+
 DEFAULT_COUNTRY = 'US'
 DEFAULT_CURRENCY = 'USD'
-AVAILABLE_CURRENCIES = [DEFAULT_CURRENCY]
+# Prices can be requested in any of these with ?currency=
+AVAILABLE_CURRENCIES = env.list('AVAILABLE_CURRENCIES', default=[DEFAULT_CURRENCY, 'NGN'])
 
 OPENEXCHANGERATES_API_KEY = os.environ.get('OPENEXCHANGERATES_API_KEY')
+# Seconds between reloads of the in-process exchange rate table
+OPENEXCHANGERATES_REFRESH_INTERVAL = env.int('OPENEXCHANGERATES_REFRESH_INTERVAL', default=60 * 60)
 
 
 # Google API KEy
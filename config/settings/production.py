@@ -148,6 +148,22 @@ TEMPLATES[0]['OPTIONS']['loaders'] = [
 # Use the Heroku-style specification
 # Raises ImproperlyConfigured exception if DATABASE_URL not in os.environ
 DATABASES['default'] = env.db('DATABASE_URL')
+# Connections come from a per-worker pool that is safe to share between
+# gevent greenlets; see tenkobo/core/db/backends/postgis/base.py.
+# CONN_MAX_AGE must stay 0 so connections return to the pool after each request.
+DATABASES['default']['ENGINE'] = 'tenkobo.core.db.backends.postgis'
+DATABASES['default']['CONN_MAX_AGE'] = 0
+DATABASES['default']['POOL'] = {
+    'MAX_SIZE': env.int('DATABASE_POOL_SIZE', default=10),
+    'MAX_IDLE': env.int('DATABASE_POOL_MAX_IDLE', default=5),
+    'TIMEOUT': env.int('DATABASE_POOL_TIMEOUT', default=30),
+    'CHECK_AFTER': env.int('DATABASE_POOL_CHECK_AFTER', default=30),
+    'MAX_LIFETIME': env.int('DATABASE_POOL_MAX_LIFETIME', default=60 * 60),
+}
+if 'replica' in DATABASES:
+    DATABASES['replica']['ENGINE'] = DATABASES['default']['ENGINE']
+    DATABASES['replica']['CONN_MAX_AGE'] = 0
+    DATABASES['replica']['POOL'] = DATABASES['default']['POOL']
 
 # CACHING
 # ------------------------------------------------------------------------------
@@ -228,3 +244,8 @@ ADMIN_URL = env('DJANGO_ADMIN_URL')
 
 # Your production stuff: Below this line define 3rd party library settings
 # ------------------------------------------------------------------------------
+
+# django-versatileimagefield
+# ------------------------------------------------------------------------------
+# Renditions are created by the create_product_thumbnails task, never lazily.
+VERSATILEIMAGEFIELD_SETTINGS['create_images_on_demand'] = False
@@ -42,6 +42,14 @@ CACHES = {
 # ------------------------------------------------------------------------------
 TEST_RUNNER = 'django.test.runner.DiscoverRunner'
 
+########## CELERY
+CELERY_TASK_ALWAYS_EAGER = True
+TASK_METRICS_ENABLED = False
+########## END CELERY
+
+
+# Tests do not need a Redis server
+API_THROTTLE_ENABLED = False
 
 # PASSWORD HASHING
 # ------------------------------------------------------------------------------
@@ -60,13 +68,9 @@ TEMPLATES[0]['OPTIONS']['loaders'] = [
     ], ],
 ]
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'crepslab',
-        'USER': 'michael',
-        'PASSWORD': '',
-        'HOST': 'localhost',
-        'PORT': '',
-    }
-}
\ No newline at end of file
+# DATABASE CONFIGURATION
+# ------------------------------------------------------------------------------
+# pytest copies the test databases from a migrated template, see conftest.py
+DATABASES['default'] = env.db('DATABASE_URL', default='postgis:///tenkobo')
+DATABASES['default']['ENGINE'] = 'django.contrib.gis.db.backends.postgis'
+DATABASES['default']['ATOMIC_REQUESTS'] = True
@@ -5,8 +5,31 @@ from django.contrib import admin
 from django.views.generic import TemplateView
 from django.views import defaults as default_views
 
-from rest_framework_swagger.views import get_swagger_view
-schema_view = get_swagger_view(title='Pastebin API')
+
+def lazy_view(load):
+    """
+    A view that imports the real one, returned by ``load()``, on its first
+    request. The API docs pull in coreapi, openapi_codec and an introspection
+    of every endpoint, which no worker should pay for at boot.
+    """
+    loaded = []
+
+    def view(request, *args, **kwargs):
+        if not loaded:
+            loaded.append(load())
+        return loaded[0](request, *args, **kwargs)
+    return view
+
+
+def load_schema_view():
+    from rest_framework_swagger.views import get_swagger_view
+    return get_swagger_view(title='Pastebin API')
+
+
+def load_docs_view():
+    from rest_framework_docs.views import DRFDocsView
+    return DRFDocsView.as_view()
+
 
 urlpatterns = [
     url(r'^$', TemplateView.as_view(template_name='pages/home.html'), name='home'),
@@ -21,9 +44,12 @@ urlpatterns = [
 
     # Your stuff: custom urls includes go here
     url(r'^api-auth/', include('rest_framework.urls', namespace='rest_framework')),
-    url(r'^docs/', include('rest_framework_docs.urls')),
-    url(r'^swagger/docs/$', schema_view),
+    # Same name as in rest_framework_docs.urls, which would import the views.
+    url(r'^docs/$', lazy_view(load_docs_view), name='drfdocs'),
+    url(r'^swagger/docs/$', lazy_view(load_schema_view)),
     url(r'^api/', include('fsinfoservice.urls')),
+    url(r'^api/catalog/', include('product.urls')),
+    url(r'^api/internal/tasks/', include('tenkobo.taskapp.urls')),
 
 
 
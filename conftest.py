@@ -0,0 +1,168 @@
+"""
+Test database setup for pytest.
+
+Creating a PostGIS database and running every migration is the slowest
+part of a test run, so it is done once: the first process to need it
+migrates a template database, named after a fingerprint of the
+migrations, and every process, xdist worker or not, then gets its own
+test database as a ``CREATE DATABASE ... TEMPLATE`` copy of it. The
+template is rebuilt only when a migration or the installed apps change.
+
+Run the suite in parallel with ``pytest -n auto``.
+"""
+import fcntl
+import glob
+import hashlib
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Apps are imported as top-level packages, see manage.py
+sys.path.append(os.path.join(ROOT_DIR, 'tenkobo'))
+
+MAX_NAME_LENGTH = 63
+
+
+def migrations_fingerprint():
+    import django
+    from django.conf import settings
+
+    digest = hashlib.sha1()
+    digest.update(django.get_version().encode('utf-8'))
+    digest.update('\n'.join(settings.INSTALLED_APPS).encode('utf-8'))
+    for path in sorted(glob.glob(os.path.join(ROOT_DIR, 'tenkobo', '**', 'migrations', '*.py'), recursive=True)):
+        digest.update(os.path.relpath(path, ROOT_DIR).encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:10]
+
+
+@contextmanager
+def file_lock(name):
+    with open(os.path.join(tempfile.gettempdir(), '%s.lock' % name), 'w') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def quote(connection, name):
+    return connection.ops.quote_name(name)
+
+
+def database_exists(cursor, name):
+    cursor.execute('SELECT 1 FROM pg_database WHERE datname = %s', [name])
+    return cursor.fetchone() is not None
+
+
+def build_template(connection, template):
+    """
+    Migrates a new database and renames it to ``template``, so that an
+    interrupted build never leaves a half-migrated template behind. Older
+    templates of the same database are dropped.
+    """
+    building = template[:MAX_NAME_LENGTH - len('_build')] + '_build'
+    test_settings = connection.settings_dict['TEST']
+    test_name = test_settings.get('NAME')
+    test_settings['NAME'] = building
+    try:
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    finally:
+        test_settings['NAME'] = test_name
+    connection.close()
+
+    prefix = template.rsplit('_', 1)[0]
+    with connection._nodb_connection.cursor() as cursor:
+        cursor.execute('ALTER DATABASE %s RENAME TO %s' % (quote(connection, building), quote(connection, template)))
+        cursor.execute(
+            "SELECT datname FROM pg_database WHERE datname LIKE %s AND datname <> %s",
+            [prefix.replace('_', r'\_') + r'\_%', template])
+        for (stale,) in cursor.fetchall():
+            cursor.execute('DROP DATABASE IF EXISTS %s' % quote(connection, stale))
+
+
+def clone_template(connection, template, name):
+    with connection._nodb_connection.cursor() as cursor:
+        cursor.execute('DROP DATABASE IF EXISTS %s' % quote(connection, name))
+        cursor.execute('CREATE DATABASE %s TEMPLATE %s' % (quote(connection, name), quote(connection, template)))
+
+
+def setup_from_template():
+    """
+    Points every test database at a fresh copy of the migrated template,
+    as ``django.test.utils.setup_databases`` would after migrating it.
+    Returns the names of the copies.
+    """
+    from django.conf import settings
+    from django.db import connections
+
+    fingerprint = migrations_fingerprint()
+    created = []
+    for alias in connections:
+        connection = connections[alias]
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        if test_settings.get('MIRROR'):
+            continue
+        # With xdist, pytest-django has already given each worker its own name.
+        name = connection.creation._get_test_db_name()
+        template = ('test_%s' % connection.settings_dict['NAME'])[:MAX_NAME_LENGTH - 21] + '_template_' + fingerprint
+
+        with file_lock(template):
+            with connection._nodb_connection.cursor() as cursor:
+                exists = database_exists(cursor, template)
+            if not exists:
+                build_template(connection, template)
+            clone_template(connection, template, name)
+
+        connection.close()
+        settings.DATABASES[alias]['NAME'] = name
+        connection.settings_dict['NAME'] = name
+        created.append(name)
+
+    for alias in connections:
+        mirror = connections[alias].settings_dict['TEST'].get('MIRROR')
+        if mirror:
+            connections[alias].creation.set_as_test_mirror(connections[mirror].settings_dict)
+    return created
+
+
+def teardown_clones(names):
+    from django.db import connections
+
+    connection = connections['default']
+    connection.close()
+    with connection._nodb_connection.cursor() as cursor:
+        for name in names:
+            cursor.execute('DROP DATABASE IF EXISTS %s' % quote(connection, name))
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    The response cache stays enabled in tests; its entries and generation
+    numbers must not outlive the test, and the data, that produced them.
+    """
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(request, django_test_environment, django_db_blocker, django_db_keepdb,
+                    django_db_modify_db_settings):
+    """ Replaces pytest-django's fixture: copy a template, never migrate. """
+    with django_db_blocker.unblock():
+        names = setup_from_template()
+
+    yield
+
+    if not django_db_keepdb:
+        with django_db_blocker.unblock():
+            teardown_clones(names)
@@ -0,0 +1,19 @@
+from django.contrib import admin
+
+from .paginator import EstimatedCountPaginator
+
+
+class LargeTableAdminMixin(object):
+    """
+    Change list settings for tables with millions of rows: no exact
+    COUNT(*) of the whole table or of the filtered result, and ordering
+    by the primary key so that pages are read from an index.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    ordering = ('-pk',)
+    list_per_page = 50
+
+
+class LargeTableAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    pass
@@ -0,0 +1,252 @@
+"""
+Negotiated compression for API responses.
+
+``CompressionMiddleware`` compresses JSON and text responses with Brotli
+when the client accepts it and the optional ``brotli`` package is
+installed, and with gzip otherwise. Responses smaller than
+``COMPRESSION_MIN_SIZE`` bytes are sent as they are.
+
+``CompressedCacheMixin`` caches the rendered body of list views together
+with each compressed variant, so a cache hit is served without rendering
+or compressing anything. Entries are keyed by a generation number per
+model that is bumped whenever a transaction saving or deleting an
+instance commits; entries left behind by bulk updates, which send no
+signals, expire after ``cache_seconds``. For ``REPLICA_PIN_SECONDS``
+after a bump the replicas may still serve the old data, so entries built
+meanwhile only live that long.
+"""
+import gzip
+import hashlib
+import io
+import json
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from rest_framework.response import Response
+
+from .replicas import PRIMARY_PIN_COOKIE
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+COMPRESSIBLE_TYPES = re.compile(r'^(text/|application/((.+\+)?(json|javascript|xml)|x-ndjson)\b)')
+GENERATION_KEY = 'api-cache-generation:%s'
+LAGGING_KEY = 'api-cache-lagging:%s'
+RESPONSE_KEY = 'api-cache:%s'
+
+
+def accepted_encodings(header):
+    """
+    The content codings in an ``Accept-Encoding`` header with a non-zero
+    quality.
+    """
+    encodings = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding and quality > 0:
+            encodings.add(coding)
+    return encodings
+
+
+def negotiate_encoding(request, streaming=False):
+    """
+    'br', 'gzip' or None. Streamed responses are only ever gzipped.
+    """
+    encodings = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    if brotli is not None and not streaming and ('br' in encodings or '*' in encodings):
+        return 'br'
+    if 'gzip' in encodings or '*' in encodings:
+        return 'gzip'
+    return None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    # mtime=0 keeps the output, and so any ETag derived from it, stable.
+    buf = io.BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0) as f:
+        f.write(content)
+    return buf.getvalue()
+
+
+def is_compressible(response):
+    return (not response.has_header('Content-Encoding') and
+            response.status_code < 300 and
+            bool(COMPRESSIBLE_TYPES.match(response.get('Content-Type', ''))))
+
+
+def weaken_etag(response):
+    # The compressed body is not byte-for-byte the entity the ETag names.
+    etag = response.get('ETag')
+    if etag and not etag.startswith('W/'):
+        response['ETag'] = 'W/' + etag
+
+
+class CompressionMiddleware(object):
+    """
+    Compresses responses according to the request's ``Accept-Encoding``.
+    Place it near the top of ``MIDDLEWARE`` so it sees the final body.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        if response.streaming:
+            if negotiate_encoding(request, streaming=True) is None:
+                return response
+            response.streaming_content = compress_sequence(response.streaming_content)
+            del response['Content-Length']
+            response['Content-Encoding'] = 'gzip'
+            weaken_etag(response)
+            return response
+
+        if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+        encoding = negotiate_encoding(request)
+        if encoding is None:
+            return response
+        content = compress(response.content, encoding)
+        if len(content) >= len(response.content):
+            return response
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        weaken_etag(response)
+        return response
+
+
+def get_generations(models):
+    """
+    The generation of each of ``models``, and whether the replicas may
+    still lag behind the last bump of any of them.
+    """
+    labels = [model._meta.label_lower for model in models]
+    keys = [GENERATION_KEY % label for label in labels]
+    lagging_keys = [LAGGING_KEY % label for label in labels]
+    values = cache.get_many(keys + lagging_keys)
+    return [str(values.get(key, 0)) for key in keys], any(key in values for key in lagging_keys)
+
+
+def bump(label):
+    key = GENERATION_KEY % label
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Never bumped, or evicted: any value differing from 0 will do.
+        cache.set(key, 1, None)
+    cache.set(LAGGING_KEY % label, 1, settings.REPLICA_PIN_SECONDS)
+
+
+def bump_generation(sender, **kwargs):
+    """
+    ``post_save``/``post_delete`` receiver retiring every cached response
+    built from ``sender`` once the transaction commits; bumping earlier
+    would let a concurrent request cache the old data under the new
+    generation.
+    """
+    label = sender._meta.label_lower
+    transaction.on_commit(lambda: bump(label), using=kwargs.get('using'))
+
+
+class CompressedCacheMixin(object):
+    """
+    List view mixin caching successful JSON responses, with their gzip and
+    Brotli variants, for ``cache_seconds``. Authentication and throttling
+    still run on a hit; clients pinned to the primary database bypass the
+    cache so that they read their own writes.
+
+    Requests flagged ``needs_response_data``, such as batch sub-requests,
+    share the cache but get a ``Response`` carrying data rather than the
+    rendered bytes: on a hit the cached JSON is decoded back into data.
+    """
+    # Models whose changes invalidate the cached responses; defaults to
+    # the queryset's model.
+    cache_models = None
+    cache_seconds = 60
+
+    def get_cache_models(self):
+        return self.cache_models or (self.get_queryset().model,)
+
+    def get_response_cache_key(self, request):
+        # The absolute URL covers host and scheme, which appear in links.
+        parts = [request.build_absolute_uri(), request.META.get('HTTP_ACCEPT', '')]
+        generations, lagging = get_generations(self.get_cache_models())
+        parts += generations
+        self._response_cache_seconds = (
+            min(self.cache_seconds, settings.REPLICA_PIN_SECONDS) if lagging else self.cache_seconds)
+        digest = hashlib.md5('\n'.join(parts).encode('utf-8')).hexdigest()
+        return RESPONSE_KEY % digest
+
+    def list(self, request, *args, **kwargs):
+        self._response_cache_key = None
+        if settings.API_CACHE_ENABLED and not request.COOKIES.get(PRIMARY_PIN_COOKIE):
+            key = self.get_response_cache_key(request)
+            entry = cache.get(key)
+            if entry is not None:
+                if getattr(request, 'needs_response_data', False):
+                    return Response(json.loads(entry['identity'].decode('utf-8')))
+                return self.cached_response(request, key, entry)
+            self._response_cache_key = key
+        return super(CompressedCacheMixin, self).list(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(CompressedCacheMixin, self).finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, '_response_cache_key', None)
+        if (key is None or not isinstance(response, Response) or response.status_code != 200 or
+                response.accepted_renderer.format != 'json'):
+            return response
+        response.render()
+        entry = {'content_type': response['Content-Type'], 'identity': response.content}
+        if getattr(request, 'needs_response_data', False):
+            cache.set(key, entry, self._response_cache_seconds)
+            return response
+        return self.cached_response(request, key, entry, store=True)
+
+    def cached_response(self, request, key, entry, store=False):
+        """
+        Builds the response from a cache entry, compressing and storing
+        the negotiated variant if the entry does not hold it yet.
+        """
+        content = entry['identity']
+        encoding = None
+        if len(content) >= settings.COMPRESSION_MIN_SIZE:
+            encoding = negotiate_encoding(request)
+        if encoding is not None and encoding not in entry:
+            entry[encoding] = compress(content, encoding)
+            store = True
+        if store:
+            cache.set(key, entry, self._response_cache_seconds)
+
+        if encoding is not None and len(entry[encoding]) < len(content):
+            response = HttpResponse(entry[encoding], content_type=entry['content_type'])
+            response['Content-Encoding'] = encoding
+        else:
+            response = HttpResponse(content, content_type=entry['content_type'])
+        response['Content-Length'] = str(len(response.content))
+        response['Allow'] = ', '.join(self.allowed_methods)
+        patch_vary_headers(response, ('Accept', 'Accept-Encoding'))
+        return response
@@ -0,0 +1,158 @@
+"""
+Currency conversion for prices served by the API.
+
+Exchange rates are read from the django_prices_openexchangerates
+``ConversionRate`` table at most once per
+``OPENEXCHANGERATES_REFRESH_INTERVAL`` seconds and kept in an in-process
+table. Serializers look the conversion factor up once per request and
+apply it to every price they render, so a list of a thousand prices costs
+no rate lookups at all once the table is warm.
+"""
+import threading
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from django_prices_openexchangerates.models import ConversionRate
+
+
+CURRENCY_QUERY_PARAM = 'currency'
+CENTS = Decimal('0.01')
+
+
+class CurrencyNotAvailable(ValueError):
+    pass
+
+
+class RateTable(object):
+    """
+    An in-process copy of the conversion rates, relative to the
+    openexchangerates base currency.
+    """
+
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self._rates = {}
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def base_currency(self):
+        return getattr(settings, 'OPENEXCHANGERATES_BASE_CURRENCY', 'USD')
+
+    def is_stale(self):
+        return (self._loaded_at is None or
+                time.time() - self._loaded_at >= self.refresh_interval)
+
+    def load(self):
+        rates = dict(ConversionRate.objects.values_list('to_currency', 'rate'))
+        rates[self.base_currency] = Decimal(1)
+        self._rates = rates
+        self._loaded_at = time.time()
+
+    def get_rates(self):
+        if self.is_stale():
+            with self._lock:
+                # Another thread may have refreshed the table meanwhile.
+                if self.is_stale():
+                    self.load()
+        return self._rates
+
+    def invalidate(self):
+        self._loaded_at = None
+
+    def get_factor(self, from_currency, to_currency):
+        if from_currency == to_currency:
+            return Decimal(1)
+        rates = self.get_rates()
+        try:
+            return rates[to_currency] / rates[from_currency]
+        except KeyError:
+            raise CurrencyNotAvailable(
+                'No conversion rate from %s to %s' % (from_currency, to_currency))
+
+
+rate_table = RateTable(getattr(settings, 'OPENEXCHANGERATES_REFRESH_INTERVAL', 60 * 60))
+
+
+def convert_amount(amount, factor):
+    return (amount * factor).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def convert_amounts(amounts, from_currency, to_currency):
+    factor = rate_table.get_factor(from_currency, to_currency)
+    return [convert_amount(amount, factor) for amount in amounts]
+
+
+def get_request_currency(request):
+    """
+    Return the currency requested with ``?currency=`` or the default one.
+    Raises a DRF ValidationError for currencies we do not serve.
+    """
+    currency = request.query_params.get(CURRENCY_QUERY_PARAM)
+    if not currency:
+        return settings.DEFAULT_CURRENCY
+    currency = currency.upper()
+    if currency not in settings.AVAILABLE_CURRENCIES:
+        raise ValidationError({CURRENCY_QUERY_PARAM: [
+            _('Unsupported currency. Choose one of: %s.') % ', '.join(
+                settings.AVAILABLE_CURRENCIES)]})
+    return currency
+
+
+def get_context_factor(context, from_currency):
+    """
+    Return the factor converting ``from_currency`` into the currency stored
+    in a serializer context. Factors are memoized on the context, which is
+    shared by every row of a list serializer.
+    """
+    to_currency = context.get('currency', settings.DEFAULT_CURRENCY)
+    factors = context.setdefault('currency_factors', {})
+    if from_currency not in factors:
+        try:
+            factors[from_currency] = rate_table.get_factor(from_currency, to_currency)
+        except CurrencyNotAvailable as e:
+            raise ValidationError({CURRENCY_QUERY_PARAM: [str(e)]})
+    return factors[from_currency]
+
+
+class CurrencyMixin(object):
+    """
+    Generic view mixin that puts the requested currency into the serializer
+    context.
+    """
+
+    def get_serializer_context(self):
+        context = super(CurrencyMixin, self).get_serializer_context()
+        context['currency'] = get_request_currency(self.request)
+        return context
+
+
+class ConvertedPriceField(serializers.DecimalField):
+    """
+    A price (or a plain amount in the default currency) rendered in the
+    currency stored in the serializer context. Submitted amounts are taken
+    to be in that currency too and are converted back into the default
+    currency before they are saved.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_digits', 12)
+        kwargs.setdefault('decimal_places', 2)
+        super(ConvertedPriceField, self).__init__(**kwargs)
+
+    def to_representation(self, value):
+        currency = getattr(value, 'currency', settings.DEFAULT_CURRENCY)
+        amount = getattr(value, 'gross', value)
+        factor = get_context_factor(self.context, currency)
+        return super(ConvertedPriceField, self).to_representation(
+            convert_amount(amount, factor))
+
+    def to_internal_value(self, data):
+        amount = super(ConvertedPriceField, self).to_internal_value(data)
+        factor = get_context_factor(self.context, settings.DEFAULT_CURRENCY)
+        return (amount / factor).quantize(CENTS, rounding=ROUND_HALF_UP)
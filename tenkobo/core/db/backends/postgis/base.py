@@ -0,0 +1,79 @@
+"""
+PostGIS backend that takes its connections from a per-process pool.
+
+Configure it with ``'ENGINE': 'tenkobo.core.db.backends.postgis'`` and an
+optional ``'POOL'`` dict in the database settings::
+
+    'POOL': {
+        'MAX_SIZE': 10,       # connections per worker process
+        'MAX_IDLE': 5,        # idle connections kept open
+        'TIMEOUT': 30,        # seconds to wait for a free connection
+        'CHECK_AFTER': 30,    # ping connections idle for longer than this
+        'MAX_LIFETIME': 3600, # recycle connections older than this
+    }
+
+Keep ``CONN_MAX_AGE`` at 0: Django then hands the connection back to the
+pool at the end of every request instead of holding it per thread/greenlet.
+"""
+import os
+import threading
+
+from django.contrib.gis.db.backends.postgis.base import DatabaseWrapper as PostGISDatabaseWrapper
+from django.db.backends.postgresql.base import Database
+
+from ...pool import ConnectionPool
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, pool_settings, connect):
+    # Pools are keyed by pid so forked workers never share sockets.
+    key = (os.getpid(), alias)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(
+                    connect,
+                    max_size=pool_settings.get('MAX_SIZE', 10),
+                    max_idle=pool_settings.get('MAX_IDLE'),
+                    timeout=pool_settings.get('TIMEOUT', 30),
+                    check_after=pool_settings.get('CHECK_AFTER', 30),
+                    max_lifetime=pool_settings.get('MAX_LIFETIME', 60 * 60))
+    return pool
+
+
+def close_pools():
+    """
+    Close the idle connections of every pool and forget the pools. Call it
+    in a process about to fork: ``_close`` only hands connections back to
+    the pool, and a child must not inherit open sockets to share them.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
+
+
+class DatabaseWrapper(PostGISDatabaseWrapper):
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(
+            self.alias, self.settings_dict.get('POOL', {}),
+            lambda: Database.connect(**conn_params))
+        connection = self.pool.acquire()
+        options = self.settings_dict['OPTIONS']
+        self.isolation_level = options.get('isolation_level', connection.isolation_level)
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                # Hand the connection back to the pool it was taken from.
+                self.pool.release(self.connection)
@@ -0,0 +1,135 @@
+"""
+A small connection pool for psycopg2 connections.
+
+It only relies on ``threading`` primitives, which gevent monkey-patches
+into their cooperative equivalents, so a greenlet waiting for a free
+connection yields to the others instead of blocking the worker.
+"""
+import threading
+import time
+from collections import deque
+
+from psycopg2 import extensions
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class ConnectionPool(object):
+    """
+    Hands out at most ``max_size`` connections at a time.
+
+    Idle connections are reused most-recently-returned first. A connection
+    that sat idle for longer than ``check_after`` seconds is pinged before
+    being handed out, connections older than ``max_lifetime`` are recycled
+    and idle connections above ``max_idle`` are closed.
+    """
+
+    def __init__(self, connect, max_size=10, max_idle=None, timeout=30,
+                 check_after=30, max_lifetime=60 * 60):
+        self.connect = connect
+        self.max_size = max_size
+        self.max_idle = max_size if max_idle is None else max_idle
+        self.timeout = timeout
+        self.check_after = check_after
+        self.max_lifetime = max_lifetime
+        self._idle = deque()
+        self._created_at = {}
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    @property
+    def idle_count(self):
+        return len(self._idle)
+
+    def acquire(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolExhausted(
+                'No database connection became available within %s seconds '
+                '(pool size %d).' % (self.timeout, self.max_size))
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    connection, returned_at = self._idle.pop()
+                if self._is_usable(connection, returned_at):
+                    return connection
+                self._discard(connection)
+            connection = self.connect()
+            self._created_at[id(connection)] = time.time()
+            return connection
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, connection):
+        try:
+            if self._reset(connection):
+                with self._lock:
+                    if len(self._idle) < self.max_idle:
+                        self._idle.append((connection, time.time()))
+                        return
+            self._discard(connection)
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, deque()
+        for connection, returned_at in idle:
+            self._discard(connection)
+
+    def _is_expired(self, connection):
+        created_at = self._created_at.get(id(connection), 0)
+        return time.time() - created_at > self.max_lifetime
+
+    def _is_usable(self, connection, returned_at):
+        if connection.closed or self._is_expired(connection):
+            return False
+        if time.time() - returned_at < self.check_after:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except Exception:
+            return False
+        return True
+
+    def _reset(self, connection):
+        """
+        Bring a returned connection back to an idle state. Returns False
+        when it cannot be reused.
+
+        Besides ending any transaction, ``DISCARD ALL`` drops what the last
+        borrower left in the session: ``SET`` parameters, cursors (including
+        WITH HOLD ones of aborted streaming exports), temporary tables,
+        prepared statements and advisory locks.
+        """
+        if connection.closed or self._is_expired(connection):
+            return False
+        status = connection.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        try:
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+            # DISCARD ALL cannot run inside a transaction block.
+            autocommit = connection.autocommit
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute('DISCARD ALL')
+            connection.autocommit = autocommit
+        except Exception:
+            return False
+        return True
+
+    def _discard(self, connection):
+        self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Exception:
+            pass
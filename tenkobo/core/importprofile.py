@@ -0,0 +1,129 @@
+"""
+Import time and memory profile of a process starting up.
+
+``install()`` puts a finder in front of ``sys.meta_path`` that times the
+execution of every module imported afterwards and records how much the
+resident set size grew meanwhile. ``self`` figures exclude the modules a
+module imported in turn, ``cumulative`` figures include them.
+
+Run ``python -m tenkobo.core.importprofile web|worker`` in a fresh
+interpreter (the ``profile_startup`` management command does this) to
+get the profile as JSON on stdout; importing this module pulls in nothing
+but the standard library, so it does not skew the numbers.
+"""
+import json
+import os
+import resource
+import sys
+import time
+
+
+PAGE_SIZE = resource.getpagesize()
+TARGETS = ('web', 'worker')
+
+
+def current_rss():
+    """ Resident set size in bytes, 0 where /proc is not available. """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (IOError, IndexError, ValueError):
+        return 0
+
+
+class ImportProfiler(object):
+
+    def __init__(self):
+        self.modules = {}
+        # Cumulative time and memory of the children of the modules being
+        # executed, innermost last.
+        self._stack = []
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+        loader = spec.loader
+        # Builtin and frozen importers are shared classes; leave them be.
+        if loader is not None and not isinstance(loader, type) and hasattr(loader, 'exec_module'):
+            loader.exec_module = self.timed(name, loader.exec_module)
+        return spec
+
+    def timed(self, name, exec_module):
+        def timed_exec_module(module):
+            self._stack.append([0.0, 0])
+            rss = current_rss()
+            start = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - start
+                grown = current_rss() - rss
+                child_time, child_memory = self._stack.pop()
+                self.modules[name] = {
+                    'cumulative': elapsed, 'self': elapsed - child_time,
+                    'memory': grown, 'self_memory': grown - child_memory,
+                }
+                if self._stack:
+                    self._stack[-1][0] += elapsed
+                    self._stack[-1][1] += grown
+        return timed_exec_module
+
+
+def install():
+    profiler = ImportProfiler()
+    sys.meta_path.insert(0, profiler)
+    return profiler
+
+
+def start_web():
+    import django
+    from django.core.wsgi import get_wsgi_application
+    from django.urls import get_resolver
+
+    django.setup(set_prefix=False)
+    get_wsgi_application()
+    # Requests resolve the URLconf, and so import every view, on first use.
+    get_resolver().url_patterns
+
+
+def start_worker():
+    import django
+
+    django.setup(set_prefix=False)
+    from tenkobo.taskapp.celery import app
+    # What the worker's main process imports before forking its pool.
+    app.loader.import_default_modules()
+
+
+def profile(target):
+    profiler = install()
+    rss = current_rss()
+    start = time.perf_counter()
+    {'web': start_web, 'worker': start_worker}[target]()
+    return {
+        'target': target,
+        'seconds': time.perf_counter() - start,
+        'rss': current_rss(),
+        'rss_at_start': rss,
+        'modules': profiler.modules,
+    }
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 1 or argv[0] not in TARGETS:
+        sys.stderr.write('usage: python -m tenkobo.core.importprofile %s\n' % '|'.join(TARGETS))
+        return 2
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings.local')
+    json.dump(profile(argv[0]), sys.stdout)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
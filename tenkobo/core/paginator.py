@@ -0,0 +1,47 @@
+"""
+Paginator for tables too large to COUNT(*) on every page view.
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
+
+
+def estimate_count(queryset):
+    """
+    Planner estimate of the number of rows of ``queryset``: the table
+    statistics for an unfiltered queryset, EXPLAIN's row estimate
+    otherwise. Returns None when no estimate is available.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where and not queryset.query.distinct:
+            cursor.execute(
+                'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                [connection.ops.quote_name(queryset.model._meta.db_table)])
+            row = cursor.fetchone()
+            # Tables that were never analyzed report 0 or -1
+            return int(row[0]) if row and row[0] > 0 else None
+        sql, params = queryset.order_by().query.sql_with_params()
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+        return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Counts exactly while the estimate is small, where it is cheap and the
+    estimate least reliable, and trusts the planner above
+    ``exact_count_threshold`` rows.
+    """
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        if isinstance(self.object_list, QuerySet):
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate >= self.exact_count_threshold:
+                return estimate
+        return super(EstimatedCountPaginator, self).count
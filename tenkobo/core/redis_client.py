@@ -0,0 +1,24 @@
+"""
+Shared Redis client for data that does not belong in the cache, e.g.
+counters. The connection pool is created lazily, once per process.
+"""
+import threading
+
+import redis
+from django.conf import settings
+
+
+_lock = threading.Lock()
+_client = None
+
+
+def get_redis():
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = redis.StrictRedis.from_url(
+                    settings.REDIS_URL,
+                    socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                    socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT)
+    return _client
@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.db import transaction
+from rest_framework.permissions import SAFE_METHODS
+
+from .routers import use_replica
+
+
+PRIMARY_PIN_COOKIE = 'db_primary_pin'
+
+
+class ReplicaReadMixin(object):
+    """
+    API view mixin that serves safe-method requests from a read replica
+    outside of any transaction and runs writes in a transaction on the
+    primary.
+
+    After a successful write the client is pinned to the primary for
+    ``REPLICA_PIN_SECONDS`` through a cookie, so it reads its own writes
+    even while the replicas lag behind.
+    """
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super(ReplicaReadMixin, cls).as_view(**initkwargs)
+        # ATOMIC_REQUESTS would open a primary transaction for every read.
+        return transaction.non_atomic_requests(view)
+
+    # Views that take a query in a request body can add 'POST' here.
+    read_methods = SAFE_METHODS
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in self.read_methods:
+            if request.COOKIES.get(PRIMARY_PIN_COOKIE):
+                return super(ReplicaReadMixin, self).dispatch(request, *args, **kwargs)
+            with use_replica():
+                return super(ReplicaReadMixin, self).dispatch(request, *args, **kwargs)
+
+        with transaction.atomic():
+            response = super(ReplicaReadMixin, self).dispatch(request, *args, **kwargs)
+            if response.status_code >= 400:
+                transaction.set_rollback(True)
+        if response.status_code < 400:
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True)
+        return response
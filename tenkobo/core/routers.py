@@ -0,0 +1,53 @@
+"""
+Database routing between the primary and its read replicas.
+
+Reads are sent to a replica only inside ``use_replica()``; everything else,
+including every write, goes to ``default``. Views opt in through
+``tenkobo.core.replicas.ReplicaReadMixin``.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+
+
+_state = threading.local()
+
+
+def get_replica_aliases():
+    return [alias for alias in settings.DATABASES if alias != 'default']
+
+
+def replica_reads_enabled():
+    return getattr(_state, 'use_replica', False)
+
+
+@contextmanager
+def use_replica():
+    previous = replica_reads_enabled()
+    _state.use_replica = True
+    try:
+        yield
+    finally:
+        _state.use_replica = previous
+
+
+class ReplicaRouter(object):
+
+    def db_for_read(self, model, **hints):
+        if replica_reads_enabled():
+            aliases = get_replica_aliases()
+            if aliases:
+                return random.choice(aliases)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
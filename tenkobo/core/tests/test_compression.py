@@ -0,0 +1,151 @@
+import gzip
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from rest_framework import generics
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from ..compression import (
+    CompressedCacheMixin, CompressionMiddleware, accepted_encodings, bump_generation, negotiate_encoding)
+
+
+BODY = b'{"numbers":[' + b','.join(b'%d' % i for i in range(500)) + b']}'
+
+
+class NumbersBase(generics.GenericAPIView):
+    authentication_classes = ()
+    permission_classes = ()
+    throttle_classes = ()
+    renderer_classes = (JSONRenderer,)
+    calls = 0
+
+    def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        NumbersBase.calls += 1
+        return Response({'numbers': list(range(500))})
+
+
+class NumbersList(CompressedCacheMixin, NumbersBase):
+    cache_models = (Group,)
+
+
+class TestNegotiation(SimpleTestCase):
+
+    def request(self, accept):
+        return RequestFactory().get('/api/', HTTP_ACCEPT_ENCODING=accept)
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings('gzip, deflate, br'), {'gzip', 'deflate', 'br'})
+        self.assertEqual(accepted_encodings('gzip;q=0.5, br;q=0'), {'gzip'})
+        self.assertEqual(accepted_encodings(''), set())
+
+    @mock.patch('tenkobo.core.compression.brotli', None)
+    def test_gzip_without_brotli(self):
+        self.assertEqual(negotiate_encoding(self.request('br, gzip')), 'gzip')
+        self.assertIsNone(negotiate_encoding(self.request('br')))
+        self.assertIsNone(negotiate_encoding(self.request('identity')))
+
+    @mock.patch('tenkobo.core.compression.brotli', mock.Mock())
+    def test_brotli_preferred(self):
+        self.assertEqual(negotiate_encoding(self.request('gzip, br')), 'br')
+        self.assertEqual(negotiate_encoding(self.request('gzip, br'), streaming=True), 'gzip')
+
+
+@override_settings(COMPRESSION_MIN_SIZE=512)
+@mock.patch('tenkobo.core.compression.brotli', None)
+class TestCompressionMiddleware(SimpleTestCase):
+
+    def respond(self, response, accept='gzip'):
+        middleware = CompressionMiddleware(lambda request: response)
+        return middleware(RequestFactory().get('/api/', HTTP_ACCEPT_ENCODING=accept))
+
+    def test_compresses_json(self):
+        response = self.respond(HttpResponse(BODY, content_type='application/json'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    def test_leaves_small_and_binary_responses(self):
+        response = self.respond(HttpResponse(b'{}', content_type='application/json'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.respond(HttpResponse(BODY, content_type='image/png'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        response = self.respond(HttpResponse(BODY, content_type='application/json'), accept='')
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming(self):
+        response = self.respond(StreamingHttpResponse([BODY, BODY], content_type='text/csv'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), BODY + BODY)
+
+    def test_streaming_ndjson(self):
+        lines = [BODY + b'\n', BODY + b'\n']
+        response = self.respond(StreamingHttpResponse(lines, content_type='application/x-ndjson'))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b''.join(lines))
+
+
+@override_settings(API_CACHE_ENABLED=True, COMPRESSION_MIN_SIZE=512)
+@mock.patch('tenkobo.core.compression.brotli', None)
+class TestCompressedCacheMixin(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        NumbersBase.calls = 0
+
+    def get(self, accept='gzip', **extra):
+        request = RequestFactory().get('/api/numbers/', HTTP_ACCEPT_ENCODING=accept, **extra)
+        return NumbersList.as_view()(request)
+
+    def test_serves_stored_bytes(self):
+        first = self.get()
+        second = self.get()
+        self.assertEqual(NumbersBase.calls, 1)
+        self.assertEqual(first['Content-Encoding'], 'gzip')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(gzip.decompress(second.content), BODY)
+        self.assertEqual(second['Vary'], 'Accept, Accept-Encoding')
+
+    def test_identity_variant(self):
+        self.get()
+        response = self.get(accept='')
+        self.assertEqual(NumbersBase.calls, 1)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, BODY)
+
+    def test_generation_bump(self):
+        self.get()
+        with mock.patch('tenkobo.core.compression.transaction.on_commit') as on_commit:
+            bump_generation(Group)
+            # Nothing is retired before the transaction commits.
+            self.get()
+            self.assertEqual(NumbersBase.calls, 1)
+            on_commit.call_args[0][0]()
+        self.get()
+        self.assertEqual(NumbersBase.calls, 2)
+
+    def stored_seconds(self):
+        """ The timeout the response of a request is cached with """
+        with mock.patch('tenkobo.core.compression.cache', wraps=cache) as spy:
+            self.get()
+        return spy.set.call_args[0][2]
+
+    @override_settings(REPLICA_PIN_SECONDS=5)
+    def test_entries_built_while_replicas_lag_are_short_lived(self):
+        self.assertEqual(self.stored_seconds(), NumbersList.cache_seconds)
+        with mock.patch('tenkobo.core.compression.transaction.on_commit', lambda func, using=None: func()):
+            bump_generation(Group)
+        self.assertEqual(self.stored_seconds(), 5)
+
+    def test_pinned_clients_bypass_cache(self):
+        self.get()
+        request = RequestFactory().get('/api/numbers/', HTTP_ACCEPT_ENCODING='gzip')
+        request.COOKIES['db_primary_pin'] = '1'
+        NumbersList.as_view()(request)
+        self.assertEqual(NumbersBase.calls, 2)
@@ -0,0 +1,67 @@
+from decimal import Decimal
+
+from django.test import override_settings
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+from test_plus.test import TestCase
+
+from ..currency import (
+    CurrencyNotAvailable, RateTable, convert_amounts, get_context_factor,
+    get_request_currency, rate_table)
+
+
+@override_settings(OPENEXCHANGERATES_BASE_CURRENCY='USD')
+class TestRateTable(TestCase):
+    fixtures = ['conversion_rates']
+
+    def setUp(self):
+        self.table = RateTable(refresh_interval=60)
+        rate_table.invalidate()
+
+    def test_rates_are_loaded_once(self):
+        with self.assertNumQueries(1):
+            self.table.get_factor('USD', 'NGN')
+            self.table.get_factor('USD', 'EUR')
+            self.table.get_factor('EUR', 'NGN')
+
+    def test_factor(self):
+        self.assertEqual(self.table.get_factor('USD', 'NGN'), Decimal('360'))
+        self.assertEqual(self.table.get_factor('NGN', 'NGN'), Decimal(1))
+
+    def test_cross_rate(self):
+        self.assertEqual(
+            self.table.get_factor('GBP', 'EUR'), Decimal('0.84') / Decimal('0.75'))
+
+    def test_unknown_currency(self):
+        with self.assertRaises(CurrencyNotAvailable):
+            self.table.get_factor('USD', 'XYZ')
+
+    def test_convert_amounts(self):
+        self.assertEqual(
+            convert_amounts([Decimal('1.00'), Decimal('2.50')], 'USD', 'NGN'),
+            [Decimal('360.00'), Decimal('900.00')])
+
+    def test_context_factor_is_memoized(self):
+        context = {'currency': 'NGN'}
+        with self.assertNumQueries(1):
+            for _ in range(1000):
+                get_context_factor(context, 'USD')
+
+
+@override_settings(DEFAULT_CURRENCY='USD', AVAILABLE_CURRENCIES=['USD', 'NGN'])
+class TestRequestCurrency(TestCase):
+
+    def get_request(self, path):
+        return Request(APIRequestFactory().get(path))
+
+    def test_default(self):
+        self.assertEqual(get_request_currency(self.get_request('/api/products/')), 'USD')
+
+    def test_requested(self):
+        request = self.get_request('/api/products/?currency=ngn')
+        self.assertEqual(get_request_currency(request), 'NGN')
+
+    def test_unsupported(self):
+        with self.assertRaises(ValidationError):
+            get_request_currency(self.get_request('/api/products/?currency=EUR'))
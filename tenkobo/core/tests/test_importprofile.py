@@ -0,0 +1,38 @@
+import os
+import shutil
+import sys
+import tempfile
+
+from django.test import SimpleTestCase
+
+from ..importprofile import ImportProfiler
+
+
+class TestImportProfiler(SimpleTestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        package = os.path.join(self.path, 'profiled_pkg')
+        os.mkdir(package)
+        with open(os.path.join(package, '__init__.py'), 'w') as f:
+            f.write('from . import child\n')
+        with open(os.path.join(package, 'child.py'), 'w') as f:
+            f.write('import time\ntime.sleep(0.02)\n')
+        sys.path.insert(0, self.path)
+        self.addCleanup(sys.path.remove, self.path)
+
+        self.profiler = ImportProfiler()
+        sys.meta_path.insert(0, self.profiler)
+        self.addCleanup(sys.meta_path.remove, self.profiler)
+        self.addCleanup(sys.modules.pop, 'profiled_pkg', None)
+        self.addCleanup(sys.modules.pop, 'profiled_pkg.child', None)
+
+    def test_self_excludes_children(self):
+        import profiled_pkg  # noqa
+
+        package = self.profiler.modules['profiled_pkg']
+        child = self.profiler.modules['profiled_pkg.child']
+        self.assertGreaterEqual(child['self'], 0.02)
+        self.assertGreaterEqual(package['cumulative'], child['cumulative'])
+        self.assertLess(package['self'], 0.02)
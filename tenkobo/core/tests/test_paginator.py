@@ -0,0 +1,28 @@
+from test_plus.test import TestCase
+
+from tenkobo.users.models import User
+from ..paginator import EstimatedCountPaginator, estimate_count
+
+
+class TestEstimatedCountPaginator(TestCase):
+
+    def setUp(self):
+        for i in range(3):
+            self.make_user('user%d' % i)
+
+    def test_small_results_are_counted_exactly(self):
+        paginator = EstimatedCountPaginator(User.objects.order_by('pk'), 2)
+        self.assertEqual(paginator.count, 3)
+        self.assertEqual(paginator.num_pages, 2)
+
+    def test_filtered_estimate_comes_from_the_planner(self):
+        estimate = estimate_count(User.objects.filter(username__startswith='user'))
+        self.assertIsInstance(estimate, int)
+
+    def test_large_estimates_are_trusted(self):
+        paginator = EstimatedCountPaginator(User.objects.filter(username__startswith='user'), 2)
+        paginator.exact_count_threshold = 0
+        self.assertEqual(paginator.count, estimate_count(paginator.object_list))
+
+    def test_lists_are_counted(self):
+        self.assertEqual(EstimatedCountPaginator([1, 2, 3], 2).count, 3)
@@ -0,0 +1,172 @@
+import os
+from unittest import mock
+
+from django.db import connections
+from django.test import SimpleTestCase, TestCase
+from psycopg2 import extensions
+
+from ..db.backends.postgis.base import DatabaseWrapper, close_pools, get_pool
+from ..db.pool import ConnectionPool, PoolExhausted
+
+
+class FakeConnection(object):
+
+    def __init__(self):
+        self.closed = False
+        self.autocommit = False
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rolled_back = False
+        self.executed = []
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rolled_back = True
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = True
+
+    def cursor(self):
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value.execute.side_effect = self.executed.append
+        return cursor
+
+
+class TestConnectionPool(SimpleTestCase):
+
+    def setUp(self):
+        self.pool = ConnectionPool(FakeConnection, max_size=2, timeout=0.01)
+
+    def test_connections_are_reused(self):
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        self.assertIs(self.pool.acquire(), connection)
+
+    def test_pool_size_is_enforced(self):
+        self.pool.acquire()
+        self.pool.acquire()
+        with self.assertRaises(PoolExhausted):
+            self.pool.acquire()
+
+    def test_release_frees_a_slot(self):
+        first = self.pool.acquire()
+        self.pool.acquire()
+        self.pool.release(first)
+        self.assertIs(self.pool.acquire(), first)
+
+    def test_open_transaction_is_rolled_back(self):
+        connection = self.pool.acquire()
+        connection.status = extensions.TRANSACTION_STATUS_INERROR
+        self.pool.release(connection)
+        self.assertTrue(connection.rolled_back)
+        self.assertEqual(self.pool.idle_count, 1)
+
+    def test_session_state_is_discarded(self):
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        self.assertEqual(connection.executed, ['DISCARD ALL'])
+        self.assertFalse(connection.autocommit)
+
+    def test_failed_reset_drops_the_connection(self):
+        connection = self.pool.acquire()
+        connection.cursor = mock.Mock(side_effect=Exception('server closed the connection'))
+        self.pool.release(connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(self.pool.idle_count, 0)
+
+    def test_broken_connection_is_discarded(self):
+        connection = self.pool.acquire()
+        connection.status = extensions.TRANSACTION_STATUS_UNKNOWN
+        self.pool.release(connection)
+        self.assertTrue(connection.closed)
+        self.assertIsNot(self.pool.acquire(), connection)
+
+    def test_closed_idle_connection_is_replaced(self):
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        connection.closed = True
+        self.assertIsNot(self.pool.acquire(), connection)
+
+    def test_expired_connection_is_recycled(self):
+        self.pool.max_lifetime = -1
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(self.pool.idle_count, 0)
+
+    def test_failed_health_check(self):
+        self.pool.check_after = -1
+        connection = self.pool.acquire()
+        self.pool.release(connection)
+        connection.cursor = mock.Mock(side_effect=Exception('server closed the connection'))
+        self.assertIsNot(self.pool.acquire(), connection)
+        self.assertTrue(connection.closed)
+
+
+class TestProcessPools(SimpleTestCase):
+
+    def setUp(self):
+        self.addCleanup(close_pools)
+        self.pool = get_pool('fork-test', {}, FakeConnection)
+        self.connection = self.pool.acquire()
+        self.pool.release(self.connection)
+
+    def test_close_pools(self):
+        close_pools()
+        self.assertTrue(self.connection.closed)
+        self.assertIsNot(get_pool('fork-test', {}, FakeConnection), self.pool)
+
+    def test_forked_process_gets_a_fresh_connection(self):
+        close_pools()
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # Child: report whether it got a pool and connection of its own.
+            try:
+                os.close(read_fd)
+                pool = get_pool('fork-test', {}, FakeConnection)
+                connection = pool.acquire()
+                fresh = pool is not self.pool and connection is not self.connection and not connection.closed
+                os.write(write_fd, b'1' if fresh else b'0')
+            finally:
+                os._exit(0)
+        os.close(write_fd)
+        try:
+            self.assertEqual(os.read(read_fd, 1), b'1')
+        finally:
+            os.close(read_fd)
+            os.waitpid(pid, 0)
+
+
+class TestPooledBackend(TestCase):
+    """ The pooling backend against the test database. """
+
+    def setUp(self):
+        settings_dict = dict(connections['default'].settings_dict, POOL={'MAX_SIZE': 1})
+        self.wrapper = DatabaseWrapper(settings_dict, 'pool-test')
+        self.addCleanup(close_pools)
+        self.addCleanup(self.wrapper.close)
+
+    def query(self, sql):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute(sql)
+            return cursor.fetchall() if cursor.description else None
+
+    def test_session_state_does_not_survive_a_release(self):
+        backend_pid = self.query('SELECT pg_backend_pid()')
+        self.query("SET application_name = 'leaked'")
+        self.query('CREATE TEMPORARY TABLE leftover (id integer)')
+        self.query('SELECT pg_advisory_lock(4242)')
+        self.query('DECLARE leftover_cursor CURSOR WITH HOLD FOR SELECT 1')
+        # _close() hands the connection back to the pool ...
+        self.wrapper.close()
+        # ... and get_new_connection() takes the same one out again.
+        self.assertEqual(self.query('SELECT pg_backend_pid()'), backend_pid)
+
+        self.assertNotEqual(self.query('SHOW application_name'), [('leaked',)])
+        self.assertEqual(self.query("SELECT to_regclass('pg_temp.leftover')"), [(None,)])
+        self.assertEqual(self.query(
+            "SELECT count(*) FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid()"), [(0,)])
+        self.assertEqual(self.query('SELECT count(*) FROM pg_cursors'), [(0,)])
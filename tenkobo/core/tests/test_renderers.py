@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+import json
+from collections import OrderedDict
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+from django.utils.translation import ugettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from ..renderers import FastJSONRenderer
+
+
+class TestFastJSONRenderer(SimpleTestCase):
+
+    def setUp(self):
+        self.data = OrderedDict((
+            ('name', u'Ìkòyí'),
+            ('price', Decimal('10.50')),
+            ('label', ugettext_lazy('name')),
+            ('point', {'type': 'Point', 'coordinates': [3.42, 6.43]}),
+            ('tags', [u'line\u2028separator', None, True]),
+        ))
+
+    def test_same_data_as_drf(self):
+        fast = FastJSONRenderer().render(self.data)
+        default = JSONRenderer().render(self.data)
+        self.assertEqual(json.loads(fast.decode('utf-8')), json.loads(default.decode('utf-8')))
+
+    def test_escapes_line_separators(self):
+        self.assertIn(b'\\u2028', FastJSONRenderer().render(self.data))
+
+    def test_none(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_indent_falls_back_to_drf(self):
+        content = FastJSONRenderer().render(self.data, 'application/json; indent=2')
+        self.assertIn(b'\n  "name"', content)
@@ -0,0 +1,92 @@
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from ..replicas import PRIMARY_PIN_COOKIE, ReplicaReadMixin
+
+
+class GroupsView(ReplicaReadMixin, APIView):
+    authentication_classes = ()
+    permission_classes = ()
+    throttle_classes = ()
+
+    def get(self, request, *args, **kwargs):
+        return Response({'count': Group.objects.count()})
+
+    def post(self, request, *args, **kwargs):
+        Group.objects.create(name=request.data['name'])
+        return Response({}, status=400 if request.data.get('fail') else 201)
+
+
+class GroupSearchView(GroupsView):
+    read_methods = SAFE_METHODS + ('POST',)
+
+    def post(self, request, *args, **kwargs):
+        return self.get(request, *args, **kwargs)
+
+
+@override_settings(REPLICA_PIN_SECONDS=10)
+@mock.patch('tenkobo.core.routers.get_replica_aliases', return_value=['replica'])
+class TestReplicaReadMixin(TestCase):
+    """
+    Runs the views against a second alias, 'replica', connected to the
+    test database, and records the queries sent through each alias.
+    """
+
+    def setUp(self):
+        connections.databases['replica'] = dict(connections['default'].settings_dict)
+        self.addCleanup(connections.databases.pop, 'replica')
+        self.addCleanup(connections.__delitem__, 'replica')
+        self.addCleanup(connections['replica'].close)
+
+    def call(self, view, method, pinned=False, **data):
+        request = getattr(APIRequestFactory(), method)('/api/groups/', data, format='json')
+        if pinned:
+            request.COOKIES[PRIMARY_PIN_COOKIE] = '1'
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            response = view.as_view()(request)
+        return response, self.selects(primary), self.selects(replica)
+
+    def selects(self, queries):
+        return [query['sql'] for query in queries if query['sql'].startswith('SELECT')]
+
+    def test_reads_go_to_the_replica(self, aliases):
+        response, primary, replica = self.call(GroupsView, 'get')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((len(primary), len(replica)), (0, 1))
+        self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+    def test_pinned_reads_go_to_the_primary(self, aliases):
+        response, primary, replica = self.call(GroupsView, 'get', pinned=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((len(primary), len(replica)), (1, 0))
+
+    def test_write_pins_the_client_to_the_primary(self, aliases):
+        response, primary, replica = self.call(GroupsView, 'post', name='Editors')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(replica, [])
+        self.assertTrue(Group.objects.filter(name='Editors').exists())
+        cookie = response.cookies[PRIMARY_PIN_COOKIE]
+        self.assertEqual(cookie.value, '1')
+        self.assertEqual(cookie['max-age'], 10)
+        self.assertTrue(cookie['httponly'])
+
+    def test_failed_write_is_rolled_back(self, aliases):
+        response, primary, replica = self.call(GroupsView, 'post', name='Editors', fail=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Group.objects.filter(name='Editors').exists())
+        self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+    def test_read_methods(self, aliases):
+        response, primary, replica = self.call(GroupSearchView, 'post', name='Editors')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((len(primary), len(replica)), (0, 1))
+        self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
@@ -0,0 +1,34 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from ..routers import ReplicaRouter, replica_reads_enabled, use_replica
+
+
+@mock.patch('tenkobo.core.routers.get_replica_aliases', return_value=['replica'])
+class TestReplicaRouter(SimpleTestCase):
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_reads_go_to_primary_by_default(self, aliases):
+        self.assertEqual(self.router.db_for_read(None), 'default')
+
+    def test_reads_go_to_replica_when_enabled(self, aliases):
+        with use_replica():
+            self.assertTrue(replica_reads_enabled())
+            self.assertEqual(self.router.db_for_read(None), 'replica')
+        self.assertFalse(replica_reads_enabled())
+
+    def test_writes_always_go_to_primary(self, aliases):
+        with use_replica():
+            self.assertEqual(self.router.db_for_write(None), 'default')
+
+    def test_without_replicas(self, aliases):
+        aliases.return_value = []
+        with use_replica():
+            self.assertEqual(self.router.db_for_read(None), 'default')
+
+    def test_migrations_only_on_primary(self, aliases):
+        self.assertTrue(self.router.allow_migrate('default', 'fsinfoservice'))
+        self.assertFalse(self.router.allow_migrate('replica', 'fsinfoservice'))
@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import SimpleTestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from ..throttling import TokenBucketThrottle, parse_rate
+
+
+RATES = {'anon': '1/s:5', 'user': '2/s', 'partner': '10/min:20'}
+
+
+class TestParseRate(SimpleTestCase):
+
+    def test_rates(self):
+        self.assertEqual(parse_rate('20/s:100'), (20.0, 100))
+        self.assertEqual(parse_rate('60/min'), (1.0, 60))
+        self.assertEqual(parse_rate('36/hour:5'), (0.01, 5))
+
+
+@override_settings(
+    API_THROTTLE_ENABLED=True, API_THROTTLE_RATES=RATES,
+    API_THROTTLE_PARTNERS={'known': '', 'big': '100/s:500'})
+@mock.patch('tenkobo.core.throttling.take_token', return_value=(True, 4, 0, 1000))
+class TestTokenBucketThrottle(SimpleTestCase):
+
+    def request(self, **headers):
+        request = Request(APIRequestFactory().get('/api/', REMOTE_ADDR='10.0.0.1', **headers))
+        request._request.user = AnonymousUser()
+        return request
+
+    def test_buckets(self, take):
+        throttle = TokenBucketThrottle()
+        self.assertEqual(throttle.get_bucket(self.request()), ('ip:10.0.0.1', '1/s:5'))
+        self.assertEqual(throttle.get_bucket(self.request(HTTP_X_API_KEY='known')), ('partner:known', '10/min:20'))
+        self.assertEqual(throttle.get_bucket(self.request(HTTP_X_API_KEY='big')), ('partner:big', '100/s:500'))
+        # Made-up keys are treated as anonymous clients
+        self.assertEqual(throttle.get_bucket(self.request(HTTP_X_API_KEY='made-up')), ('ip:10.0.0.1', '1/s:5'))
+
+    def test_allowed_request_records_quota(self, take):
+        request = self.request()
+        self.assertTrue(TokenBucketThrottle().allow_request(request, None))
+        take.assert_called_once_with('throttle:ip:10.0.0.1', 1.0, 5)
+        self.assertEqual(request._request.rate_limit, {'limit': 5, 'remaining': 4, 'reset': 1})
+
+    def test_refused_request_waits_for_a_token(self, take):
+        take.return_value = (False, 0, 250, 5000)
+        throttle = TokenBucketThrottle()
+        self.assertFalse(throttle.allow_request(self.request(), None))
+        self.assertEqual(throttle.wait(), 0.25)
+
+    def test_fails_open(self, take):
+        take.side_effect = ConnectionError
+        self.assertTrue(TokenBucketThrottle().allow_request(self.request(), None))
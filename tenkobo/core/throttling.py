@@ -0,0 +1,141 @@
+"""
+API rate limiting with token buckets kept in Redis.
+
+Every client has a bucket holding up to ``burst`` tokens that refills at
+a steady rate; a request takes one token and is refused when the bucket
+is empty. Buckets are updated by a Lua script, so a check is atomic
+across workers and costs a single round-trip.
+
+Clients are identified, in order, by a partner API key listed in
+``API_THROTTLE_PARTNERS`` (sent in the ``X-Api-Key`` header), by their
+user account, or by their IP address. Unknown API keys count as
+anonymous so that inventing keys does not buy new buckets.
+
+Rates are written ``<requests>/<s|min|hour|day>[:<burst>]``, e.g.
+``20/s:100``; the burst defaults to the number of requests. When Redis
+cannot be reached requests are let through.
+"""
+import logging
+import math
+import time
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from .redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'throttle'
+API_KEY_HEADER = 'HTTP_X_API_KEY'
+PERIODS = {'s': 1, 'sec': 1, 'min': 60, 'm': 60, 'hour': 3600, 'h': 3600, 'day': 86400, 'd': 86400}
+
+# KEYS[1]: bucket; ARGV: refill rate per second, burst, now in ms.
+# Returns: 1 if allowed, tokens left, ms until one token is available,
+# ms until the bucket is full again.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+    tokens = burst
+    ts = now
+end
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate / 1000)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+local wait = 0
+if tokens < 1 then
+    wait = math.ceil((1 - tokens) * 1000 / rate)
+end
+local full = math.ceil((burst - tokens) * 1000 / rate)
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], full + 1000)
+return {allowed, math.floor(tokens), wait, full}
+"""
+
+_script = None
+
+
+def parse_rate(rate):
+    """ ``'20/s:100'`` to ``(20.0 tokens per second, burst of 100)`` """
+    rate, _, burst = rate.partition(':')
+    count, _, period = rate.partition('/')
+    count = int(count)
+    seconds = PERIODS[period.strip().lower()]
+    return count / float(seconds), int(burst) if burst else count
+
+
+def take_token(key, rate, burst):
+    """ Run the bucket script, ``(allowed, remaining, wait ms, reset ms)`` """
+    global _script
+    if _script is None:
+        _script = get_redis().register_script(TOKEN_BUCKET_SCRIPT)
+    allowed, remaining, wait, reset = _script(keys=[key], args=[rate, burst, int(time.time() * 1000)])
+    return bool(allowed), int(remaining), int(wait), int(reset)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF throttle applying the client's token bucket. The outcome is left
+    on the request for RateLimitHeadersMiddleware to report.
+    """
+
+    def get_bucket(self, request):
+        """ ``(bucket key, rate)`` of the client making ``request`` """
+        rates = settings.API_THROTTLE_RATES
+        api_key = request.META.get(API_KEY_HEADER)
+        partners = settings.API_THROTTLE_PARTNERS
+        if api_key and api_key in partners:
+            return 'partner:%s' % api_key, partners[api_key] or rates['partner']
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return 'user:%s' % user.pk, rates['user']
+        return 'ip:%s' % self.get_ident(request), rates['anon']
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        if not settings.API_THROTTLE_ENABLED:
+            return True
+        bucket, rate = self.get_bucket(request)
+        per_second, burst = parse_rate(rate)
+        try:
+            allowed, remaining, wait, reset = take_token(
+                '%s:%s' % (KEY_PREFIX, bucket), per_second, burst)
+        except Exception:
+            logger.warning('Rate limiting unavailable', exc_info=True)
+            return True
+        request._request.rate_limit = {
+            'limit': burst,
+            'remaining': remaining,
+            'reset': int(math.ceil(reset / 1000.0)),
+        }
+        if not allowed:
+            self.wait_seconds = wait / 1000.0
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class RateLimitHeadersMiddleware(object):
+    """ Adds the X-RateLimit-* headers for throttled API requests """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        rate_limit = getattr(request, 'rate_limit', None)
+        if rate_limit is not None:
+            response['X-RateLimit-Limit'] = str(rate_limit['limit'])
+            response['X-RateLimit-Remaining'] = str(rate_limit['remaining'])
+            response['X-RateLimit-Reset'] = str(rate_limit['reset'])
+        return response
@@ -1,3 +1,177 @@
-from django.contrib import admin
+import json
+
+from django.conf.urls import url
+from django.contrib import admin, messages
+from django.contrib.gis.admin import OSMGeoAdmin
+from django.contrib.gis.geos import Polygon
+from django.core.exceptions import PermissionDenied
+from django.http import JsonResponse
+from django.template.response import TemplateResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import require_http_methods, require_POST
+
+from tenkobo.core.admin import LargeTableAdmin, LargeTableAdminMixin
+from .models import AdminBoundary, Category, DuplicateCandidate, FuelStation, Location, OpeningHours, Product
+from .positions import POINT, POSITION, InvalidPosition, parse_changes, update_positions
+from .tasks import merge_confirmed_duplicates, reconcile_station_positions
+
+
+# Most stations sent to the position map for one viewport
+MAP_STATION_LIMIT = 5000
+
+
+def parse_bbox(value):
+    try:
+        west, south, east, north = [float(part) for part in value.split(',')]
+    except (AttributeError, ValueError):
+        return None
+    bbox = Polygon.from_bbox((max(west, -180), max(south, -90), min(east, 180), min(north, 90)))
+    bbox.srid = 4326
+    return bbox
+
+
+class OpeningHoursInline(admin.TabularInline):
+    model = OpeningHours
+    extra = 0
+
+
+@admin.register(Location)
+class LocationAdmin(LargeTableAdminMixin, OSMGeoAdmin):
+    list_display = ('street', 'city', 'state')
+    # Prefix searches, served by the UPPER(...) indexes of migration 0004
+    search_fields = ('^street', '^city', '^state')
+
+
+@admin.register(FuelStation)
+class FuelStationAdmin(LargeTableAdmin):
+    list_display = ('name', 'location', 'is_open', 'is_operational', 'is_featured', 'hidden', 'updated_at')
+    list_filter = ('is_open', 'is_operational', 'is_featured', 'hidden')
+    list_select_related = ('location',)
+    raw_id_fields = ('location',)
+    search_fields = ('^name',)
+    prepopulated_fields = {'slug': ('name',)}
+    inlines = (OpeningHoursInline,)
+    change_list_template = 'admin/fsinfoservice/fuelstation/change_list.html'
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            url(r'^map/$', self.admin_site.admin_view(self.position_map_view),
+                name='%s_%s_map' % info),
+            url(r'^map/positions/$', self.admin_site.admin_view(self.positions_view),
+                name='%s_%s_positions' % info),
+            url(r'^map/reconcile/$', self.admin_site.admin_view(self.reconcile_view),
+                name='%s_%s_reconcile' % info),
+        ] + super(FuelStationAdmin, self).get_urls()
+
+    def check_change_permission(self, request):
+        if not self.has_change_permission(request):
+            raise PermissionDenied
+
+    def position_map_view(self, request):
+        self.check_change_permission(request)
+        context = dict(
+            self.admin_site.each_context(request),
+            opts=self.model._meta,
+            title='Station positions',
+        )
+        return TemplateResponse(request, 'admin/fsinfoservice/fuelstation/position_map.html', context)
+
+    @method_decorator(require_http_methods(['GET', 'POST']))
+    def positions_view(self, request):
+        """
+        GET: stations inside ``?bbox=west,south,east,north``.
+        POST: a JSON list of ``{"id", "lat", "lng"}`` moves, saved at once.
+        """
+        self.check_change_permission(request)
+        if request.method == 'POST':
+            try:
+                changes = parse_changes(json.loads(request.body.decode('utf-8')))
+            except (ValueError, InvalidPosition) as e:
+                return JsonResponse({'error': str(e)}, status=400)
+            return JsonResponse({'updated': update_positions(changes)})
+
+        bbox = parse_bbox(request.GET.get('bbox'))
+        if bbox is None:
+            return JsonResponse({'error': 'A bbox=west,south,east,north parameter is required.'}, status=400)
+        rows = list(FuelStation.objects.filter(location__point__intersects=bbox).order_by().values_list(
+            'pk', 'name', 'location__point')[:MAP_STATION_LIMIT + 1])
+        stations = [
+            {'id': pk, 'name': name, 'lat': point.y, 'lng': point.x}
+            for pk, name, point in rows[:MAP_STATION_LIMIT]]
+        return JsonResponse({'stations': stations, 'truncated': len(rows) > MAP_STATION_LIMIT})
+
+    @method_decorator(require_POST)
+    def reconcile_view(self, request):
+        self.check_change_permission(request)
+        try:
+            source = json.loads(request.body.decode('utf-8')).get('source')
+        except (ValueError, AttributeError):
+            source = None
+        if source not in (POINT, POSITION):
+            return JsonResponse({'error': 'source must be "point" or "position".'}, status=400)
+        reconcile_station_positions.delay(source)
+        return JsonResponse({'source': source})
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug', 'hidden')
+    search_fields = ('^name',)
+    prepopulated_fields = {'slug': ('name',)}
+
+
+@admin.register(Product)
+class ProductAdmin(LargeTableAdmin):
+    list_display = ('name', 'fuel_station', 'category', 'price', 'is_available', 'is_featured', 'updated_at')
+    list_filter = ('is_available', 'is_featured')
+    list_select_related = ('fuel_station', 'category')
+    raw_id_fields = ('fuel_station', 'category')
+    search_fields = ('^name',)
+
+
+@admin.register(OpeningHours)
+class OpeningHoursAdmin(LargeTableAdmin):
+    list_display = ('store', 'weekday', 'from_hour', 'to_hour')
+    list_filter = ('weekday',)
+    list_select_related = ('store',)
+    raw_id_fields = ('store',)
+    search_fields = ('^store__name',)
+
+
+@admin.register(DuplicateCandidate)
+class DuplicateCandidateAdmin(LargeTableAdmin):
+    list_display = ('station', 'duplicate', 'distance', 'name_similarity', 'status', 'created_at')
+    list_filter = ('status',)
+    list_select_related = ('station', 'duplicate')
+    raw_id_fields = ('station', 'duplicate')
+    actions = ('confirm', 'reject', 'merge_confirmed')
+
+    def confirm(self, request, queryset):
+        updated = queryset.update(status=DuplicateCandidate.CONFIRMED)
+        self.message_user(request, '%d candidates confirmed.' % updated)
+    confirm.short_description = 'Confirm selected duplicates'
+
+    def reject(self, request, queryset):
+        updated = queryset.update(status=DuplicateCandidate.REJECTED)
+        self.message_user(request, '%d candidates rejected.' % updated)
+    reject.short_description = 'Reject selected duplicates'
+
+    def merge_confirmed(self, request, queryset):
+        candidate_ids = list(queryset.filter(status=DuplicateCandidate.CONFIRMED).values_list('pk', flat=True))
+        if not candidate_ids:
+            self.message_user(request, 'None of the selected candidates is confirmed.', messages.WARNING)
+            return
+        merge_confirmed_duplicates.delay(candidate_ids)
+        self.message_user(request, 'Merging of %d confirmed duplicates started.' % len(candidate_ids))
+    merge_confirmed.short_description = 'Merge selected confirmed duplicates'
+
+
+@admin.register(AdminBoundary)
+class AdminBoundaryAdmin(OSMGeoAdmin):
+    list_display = ('name', 'level', 'parent')
+    list_filter = ('level',)
+    list_select_related = ('parent',)
+    raw_id_fields = ('parent',)
+    search_fields = ('name',)
 
-# Register your models here.
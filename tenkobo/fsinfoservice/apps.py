@@ -1,5 +1,15 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class FsinfoserviceConfig(AppConfig):
     name = 'fsinfoservice'
+
+    def ready(self):
+        from tenkobo.core.compression import bump_generation
+
+        # Retire cached API responses built from a changed model.
+        for name in ('FuelStation', 'Location', 'Category', 'Product'):
+            model = self.get_model(name)
+            post_save.connect(bump_generation, sender=model, dispatch_uid='api-cache-save-%s' % name)
+            post_delete.connect(bump_generation, sender=model, dispatch_uid='api-cache-delete-%s' % name)
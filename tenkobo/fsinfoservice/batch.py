@@ -0,0 +1,78 @@
+"""
+Running several API GET requests inside one HTTP request.
+
+Each sub-request is resolved against the URLconf and handed to its view
+directly, without going through the middleware again, and the view's
+response data is collected. Identical sub-requests are only run once,
+and list views answer sub-requests from the response cache they share
+with plain GET requests.
+"""
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from django.utils.six.moves.urllib.parse import urlsplit
+from rest_framework.response import Response
+
+
+MAX_BATCH_SIZE = 20
+
+
+class BatchError(ValueError):
+    pass
+
+
+def build_sub_request(request, path, query_string):
+    """ A GET request for ``path`` carrying the credentials of ``request`` """
+    sub_request = HttpRequest()
+    sub_request.method = 'GET'
+    sub_request.path = sub_request.path_info = path
+    sub_request.META = dict(request.META, REQUEST_METHOD='GET', PATH_INFO=path, QUERY_STRING=query_string)
+    sub_request.GET = QueryDict(query_string)
+    sub_request.COOKIES = request.COOKIES
+    for attribute in ('session', 'user', 'urlconf'):
+        if hasattr(request, attribute):
+            setattr(sub_request, attribute, getattr(request, attribute))
+    # The batch request itself already passed the CSRF check.
+    sub_request._dont_enforce_csrf_checks = True
+    # The batch needs response data, not the rendered bytes of the
+    # response cache, see tenkobo.core.compression.CompressedCacheMixin.
+    sub_request.needs_response_data = True
+    return sub_request
+
+
+def run_sub_request(request, url, forbidden_paths=()):
+    """ ``(status code, data)`` of GET ``url`` """
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path.startswith('/api/') or parts.path in forbidden_paths:
+        raise BatchError('Only paths of API resources can be batched.')
+    try:
+        match = resolve(parts.path, getattr(request, 'urlconf', None))
+    except Resolver404:
+        return 404, {'detail': 'Not found.'}
+    sub_request = build_sub_request(request, parts.path, parts.query)
+    sub_request.resolver_match = match
+    response = match.func(sub_request, *match.args, **match.kwargs)
+    if not isinstance(response, Response):
+        raise BatchError('%s cannot be batched.' % parts.path)
+    return response.status_code, response.data
+
+
+def run_batch(request, items, forbidden_paths=()):
+    """
+    Run ``items``, a list of ``{"id": ..., "url": ...}``, and return a
+    list of ``{"id", "status", "body"}`` in the same order.
+    """
+    if not isinstance(items, list) or not items:
+        raise BatchError('Expected a non-empty list of requests.')
+    if len(items) > MAX_BATCH_SIZE:
+        raise BatchError('At most %d requests can be batched.' % MAX_BATCH_SIZE)
+    results = {}
+    responses = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('url'), str):
+            raise BatchError('Every request needs a url.')
+        url = item['url']
+        if url not in results:
+            results[url] = run_sub_request(request, url, forbidden_paths)
+        status, body = results[url]
+        responses.append({'id': item.get('id', index), 'status': status, 'body': body})
+    return responses
@@ -0,0 +1,112 @@
+"""
+Grid clustering of locations for low zoom levels.
+
+Points inside the requested bounding box are grouped by the grid cell
+they fall in, in SQL, and every cell comes back as one feature with the
+average position of its points and counts. Cells are sized from the zoom
+level so that a map tile holds ``CELLS_PER_TILE`` squared of them, and
+grown further when the box would hold more than ``MAX_CLUSTER_CELLS``,
+so the response size does not depend on how many stations exist.
+"""
+import math
+
+from django.core.cache import cache
+from django.db import connections
+
+from .models import FuelStation, Location
+
+
+CELLS_PER_TILE = 4
+MAX_CLUSTER_CELLS = 2500
+# Above this zoom level the plain location list is small enough
+MAX_CLUSTER_ZOOM = 14
+CLUSTER_CACHE_SECONDS = 60
+
+CLUSTER_SQL = """
+SELECT avg(ST_X(l.point::geometry)), avg(ST_Y(l.point::geometry)),
+       count(*), count(s.id) FILTER (WHERE s.is_open), min(l.id)
+FROM {location} AS l
+LEFT JOIN {station} AS s ON s.location_id = l.id
+WHERE l.point IS NOT NULL {bbox_condition}
+GROUP BY ST_SnapToGrid(l.point::geometry, %s)
+"""
+
+# Uses the geography index. Polygons wider than a hemisphere are ambiguous
+# on the sphere, for those boxes every point is read instead.
+BBOX_CONDITION = 'AND ST_Intersects(l.point, ST_MakeEnvelope(%s, %s, %s, %s, 4326)::geography)'
+MAX_BBOX_DEGREES = 90
+
+
+def cell_size(zoom):
+    """ Grid cell width in degrees at ``zoom`` """
+    return 360.0 / (2 ** zoom) / CELLS_PER_TILE
+
+
+def snap_bbox(bbox, size):
+    """ Grow ``bbox`` to whole cells, which also makes it a stable cache key """
+    west, south, east, north = bbox
+    return (
+        max(math.floor(west / size) * size, -180.0),
+        max(math.floor(south / size) * size, -90.0),
+        min(math.ceil(east / size) * size, 180.0),
+        min(math.ceil(north / size) * size, 90.0),
+    )
+
+
+def grid_for(bbox, zoom):
+    """ Cell size and snapped box for ``bbox``, within MAX_CLUSTER_CELLS """
+    size = cell_size(zoom)
+    while True:
+        snapped = snap_bbox(bbox, size)
+        cells = ((snapped[2] - snapped[0]) / size) * ((snapped[3] - snapped[1]) / size)
+        if cells <= MAX_CLUSTER_CELLS:
+            return size, snapped
+        size *= 2
+
+
+def cluster_features(rows):
+    features = []
+    for lng, lat, count, open_count, location_id in rows:
+        features.append({
+            'type': 'Feature',
+            'id': None,
+            'geometry': {'type': 'Point', 'coordinates': [lng, lat]},
+            'properties': {
+                'count': count,
+                'open': open_count,
+                # Lone points link to their location
+                'location': location_id if count == 1 else None,
+            },
+        })
+    return features
+
+
+def cluster_locations(bbox, zoom, using=None):
+    """
+    GeoJSON FeatureCollection of the location clusters inside ``bbox``
+    (west, south, east, north) at map ``zoom``.
+    """
+    size, snapped = grid_for(bbox, zoom)
+    using = using or Location.objects.all().db
+    key = 'fsinfoservice:clusters:%s:%r:%r' % (using, size, snapped)
+    collection = cache.get(key)
+    if collection is None:
+        west, south, east, north = snapped
+        if east - west > MAX_BBOX_DEGREES or north - south > MAX_BBOX_DEGREES:
+            bbox_condition, params = '', [size]
+        else:
+            bbox_condition, params = BBOX_CONDITION, [west, south, east, north, size]
+        sql = CLUSTER_SQL.format(
+            location=Location._meta.db_table, station=FuelStation._meta.db_table,
+            bbox_condition=bbox_condition)
+        with connections[using].cursor() as cursor:
+            cursor.execute(sql, params)
+            features = cluster_features(cursor.fetchall())
+        collection = {
+            'type': 'FeatureCollection',
+            'bbox': list(snapped),
+            'cell_size': size,
+            'features': features,
+        }
+        cache.set(key, collection, CLUSTER_CACHE_SECONDS)
+    return collection
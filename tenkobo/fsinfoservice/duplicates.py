@@ -0,0 +1,160 @@
+"""
+Detection and merging of duplicate stations.
+
+Candidates come from a self-join of locations in which every station is
+compared with at most ``DUPLICATE_NEIGHBOURS`` nearest stations within
+``DUPLICATE_RADIUS`` metres, found through the spatial index (KNN), and
+kept when the trigram similarity of the names is high enough. The work is
+done in SQL in batches of station ids, so a run is O(n log n) rather than
+a comparison of every pair.
+"""
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Max, Value, When
+
+from .models import DuplicateCandidate, FuelStation, Location, OpeningHours, Product
+
+
+DUPLICATE_RADIUS = 75
+DUPLICATE_NEIGHBOURS = 5
+DUPLICATE_NAME_SIMILARITY = 0.4
+DUPLICATE_BATCH_SIZE = 10000
+MERGE_BATCH_SIZE = 500
+
+FIND_SQL = """
+INSERT INTO {candidate} (station_id, duplicate_id, distance, name_similarity, status, created_at)
+SELECT s.id, n.id, n.distance, n.name_similarity, %(status)s, now()
+FROM {station} AS s
+JOIN {location} AS l ON l.id = s.location_id
+CROSS JOIN LATERAL (
+    SELECT s2.id,
+           ST_Distance(l.point, l2.point) AS distance,
+           similarity(s.name, s2.name) AS name_similarity
+    FROM {location} AS l2
+    JOIN {station} AS s2 ON s2.location_id = l2.id
+    WHERE ST_DWithin(l.point, l2.point, %(radius)s) AND s2.id > s.id
+    ORDER BY l.point <-> l2.point
+    LIMIT %(neighbours)s
+) AS n
+WHERE s.id > %(after)s AND s.id <= %(until)s
+  AND l.point IS NOT NULL
+  AND n.name_similarity >= %(similarity)s
+ON CONFLICT (station_id, duplicate_id) DO NOTHING
+""".format(
+    candidate=DuplicateCandidate._meta.db_table,
+    station=FuelStation._meta.db_table,
+    location=Location._meta.db_table)
+
+
+def find_duplicates(radius=DUPLICATE_RADIUS, similarity=DUPLICATE_NAME_SIMILARITY,
+                    neighbours=DUPLICATE_NEIGHBOURS, batch_size=DUPLICATE_BATCH_SIZE):
+    """
+    Record pending DuplicateCandidate rows for stations less than
+    ``radius`` metres apart whose names are at least ``similarity``
+    alike. Known pairs, rejected ones included, are left alone. Returns
+    the number of new candidates.
+    """
+    last_id = FuelStation.objects.aggregate(last_id=Max('pk'))['last_id'] or 0
+    created = 0
+    for after in range(0, last_id, batch_size):
+        with connection.cursor() as cursor:
+            cursor.execute(FIND_SQL, {
+                'status': DuplicateCandidate.PENDING,
+                'radius': radius,
+                'similarity': similarity,
+                'neighbours': neighbours,
+                'after': after,
+                'until': after + batch_size,
+            })
+            created += cursor.rowcount
+    return created
+
+
+def merge_groups(pairs):
+    """
+    Group stations connected by ``pairs`` of ids (union-find) and map
+    every station to drop onto the oldest, lowest id, of its group.
+    """
+    parent = {}
+
+    def find(pk):
+        parent.setdefault(pk, pk)
+        root = pk
+        while parent[root] != root:
+            root = parent[root]
+        while parent[pk] != root:
+            parent[pk], pk = root, parent[pk]
+        return root
+
+    for first, second in pairs:
+        first, second = find(first), find(second)
+        if first != second:
+            parent[max(first, second)] = min(first, second)
+    return dict((pk, find(pk)) for pk in parent if find(pk) != pk)
+
+
+def repoint(queryset, field, mapping):
+    """ Set ``field`` of every row to ``mapping[field value]`` in one UPDATE """
+    if not mapping:
+        return 0
+    value = Case(
+        *[When(**{field: old, 'then': Value(new)}) for old, new in mapping.items()],
+        output_field=IntegerField())
+    return queryset.filter(**{field + '__in': list(mapping)}).update(**{field: value})
+
+
+def repoint_rows(queryset, field, values):
+    """ Set ``field`` of the rows whose pk is a key of ``values`` in one UPDATE """
+    if not values:
+        return 0
+    value = Case(
+        *[When(pk=pk, then=Value(new)) for pk, new in values.items()],
+        output_field=IntegerField())
+    return queryset.filter(pk__in=list(values)).update(**{field: value})
+
+
+def merge_batch(mapping):
+    survivors = set(mapping.values())
+    repoint(Product.objects.all(), 'fuel_station_id', mapping)
+
+    # A survivor keeps its own opening hours; those of the duplicates only
+    # fill in the weekdays it has none for.
+    taken = set(OpeningHours.objects.filter(store_id__in=survivors).values_list('store_id', 'weekday'))
+    moved = {}
+    hours = OpeningHours.objects.filter(store_id__in=list(mapping)).order_by('pk')
+    for pk, store_id, weekday in hours.values_list('pk', 'store_id', 'weekday'):
+        key = (mapping[store_id], weekday)
+        if key not in taken:
+            taken.add(key)
+            moved[pk] = mapping[store_id]
+    repoint_rows(OpeningHours.objects.all(), 'store_id', moved)
+
+    # Deleting the locations removes the stations, their leftover hours
+    # and their candidate rows.
+    Location.objects.filter(fuel_station__in=list(mapping)).delete()
+
+
+def merge_duplicates(pairs):
+    """
+    Merge the stations of ``pairs``, a list of ``(station id, duplicate
+    id)``: products and opening hours move to the surviving station and
+    the duplicates are deleted with their locations. Returns the number
+    of stations removed.
+    """
+    mapping = merge_groups(pairs)
+    items = sorted(mapping.items())
+    with transaction.atomic():
+        for start in range(0, len(items), MERGE_BATCH_SIZE):
+            merge_batch(dict(items[start:start + MERGE_BATCH_SIZE]))
+    return len(mapping)
+
+
+def merge_confirmed(candidate_ids=None):
+    """
+    Merge the confirmed candidates, only those among ``candidate_ids`` if
+    given. Returns the number of stations removed.
+    """
+    candidates = DuplicateCandidate.objects.filter(status=DuplicateCandidate.CONFIRMED)
+    if candidate_ids is not None:
+        candidates = candidates.filter(pk__in=candidate_ids)
+    pairs = candidates.values_list('station_id', 'duplicate_id')
+    return merge_duplicates(list(pairs))
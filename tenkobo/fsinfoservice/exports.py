@@ -0,0 +1,106 @@
+"""
+Streaming full-dataset exports.
+
+Rows are read through a server-side cursor (``QuerySet.iterator()``) and
+serialized in batches with the values serializers, so memory use does not
+depend on the size of the dataset. Output is either newline-delimited JSON
+(one object per line) or a single GeoJSON FeatureCollection.
+"""
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework.negotiation import BaseContentNegotiation
+
+from tenkobo.core.renderers import dumps
+from tenkobo.core.routers import replica_reads_enabled, use_replica
+
+
+EXPORT_BATCH_SIZE = 500
+
+NDJSON = 'ndjson'
+GEOJSON = 'geojson'
+
+CONTENT_TYPES = {
+    NDJSON: 'application/x-ndjson',
+    GEOJSON: 'application/geo+json',
+}
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """ Exports pick their format from the URL, not the Accept header """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return (renderers[0], renderers[0].media_type)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def stream_ndjson(items_batches):
+    for items in items_batches:
+        yield b''.join(dumps(item) + b'\n' for item in items)
+
+
+def stream_feature_collection(features_batches):
+    yield b'{"type":"FeatureCollection","features":['
+    separator = b''
+    for features in features_batches:
+        if not features:
+            continue
+        yield separator + b','.join(dumps(feature) for feature in features)
+        separator = b','
+    yield b']}'
+
+
+def station_feature(station):
+    """ Turn a FuelStationValuesSerializer item into a GeoJSON feature """
+    properties = dict(station)
+    location = properties.pop('location')
+    properties.update(location['properties'])
+    return {
+        'id': station['pk'],
+        'type': 'Feature',
+        'geometry': location['geometry'],
+        'properties': properties,
+    }
+
+
+def serialize_batches(serializer, queryset, transform=None):
+    rows = serializer.get_rows(queryset).iterator()
+    for batch in batched(rows, EXPORT_BATCH_SIZE):
+        items = serializer.to_representation_many(batch)
+        if transform is not None:
+            items = [transform(item) for item in items]
+        yield items
+
+
+def read_from_replica(content):
+    """
+    Streaming content is consumed after the view has returned and left
+    ``use_replica()``; generate it under the replica routing again.
+    """
+    with use_replica():
+        yield from content
+
+
+def export_response(serializer, queryset, export_format, filename, transform=None):
+    batches = serialize_batches(serializer, queryset, transform)
+    if export_format == GEOJSON:
+        content = stream_feature_collection(batches)
+    else:
+        content = stream_ndjson(batches)
+    # Decided now, while the view's routing is still active.
+    if replica_reads_enabled():
+        content = read_from_replica(content)
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = 'attachment; filename="%s.%s"' % (filename, export_format)
+    return response
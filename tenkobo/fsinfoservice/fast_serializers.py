@@ -0,0 +1,226 @@
+"""
+Read-only serializers for the list endpoints that work on ``.values()``
+rows instead of model instances.
+
+They produce exactly the same payload as the HyperlinkedModelSerializers in
+``serializers.py`` but skip the per-row field machinery: related data is
+fetched for the whole batch in one query, hyperlinks are formatted from a
+URL template reversed once per request, and the few fields that need
+formatting reuse a single DRF field instance.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils.http import urlencode
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+from tenkobo.core.currency import CURRENCY_QUERY_PARAM, convert_amount, get_context_factor
+from .models import Product
+
+
+def url_builder(view_name, request, query=None):
+    """
+    Return a function building the URL of ``view_name`` for a pk. The
+    route is reversed once and then formatted for every row.
+    """
+    url = reverse(view_name, kwargs={'pk': 0}, request=request)
+    prefix, suffix = url.rsplit('/0/', 1)
+    prefix += '/'
+    suffix = '/' + suffix
+    if query:
+        suffix += '?' + urlencode(query)
+
+    def build(pk):
+        return '%s%s%s' % (prefix, pk, suffix)
+    return build
+
+
+def location_feature(pk, point, street, city, state):
+    """ The GeoJSON feature LocationSerializer renders for a location """
+    geometry = None
+    if point is not None:
+        geometry = {'type': 'Point', 'coordinates': [point.x, point.y]}
+    return {
+        'id': pk,
+        'type': 'Feature',
+        'geometry': geometry,
+        'properties': {'street': street, 'city': city, 'state': state},
+    }
+
+
+class ValuesSerializer(object):
+    values_fields = ()
+
+    def __init__(self, context):
+        self.context = context
+        self.request = context.get('request')
+        self.datetime_field = serializers.DateTimeField()
+        self.date_field = serializers.DateField()
+
+    def get_rows(self, queryset):
+        return queryset.values(*self.values_fields)
+
+    def serialize(self, queryset):
+        return self.to_representation_many(list(self.get_rows(queryset)))
+
+    def to_representation_many(self, rows):
+        """ Serialize a batch of rows; related data is loaded per batch """
+        rows = list(rows)
+        self.prepare(rows)
+        return [self.to_representation(row) for row in rows]
+
+    def prepare(self, rows):
+        pass
+
+    def to_representation(self, row):
+        raise NotImplementedError
+
+    def format_datetime(self, value):
+        return self.datetime_field.to_representation(value) if value is not None else None
+
+    def format_date(self, value):
+        return self.date_field.to_representation(value) if value is not None else None
+
+    def product_url_builder(self):
+        currency = self.context.get('currency')
+        query = None
+        if currency and currency != settings.DEFAULT_CURRENCY:
+            query = {CURRENCY_QUERY_PARAM: currency}
+        return url_builder('product-detail', self.request, query)
+
+    def get_product_ids(self, field, ids):
+        product_ids = defaultdict(list)
+        products = Product.objects.filter(**{field + '__in': ids}).order_by('pk')
+        for owner_id, product_id in products.values_list(field, 'pk'):
+            product_ids[owner_id].append(product_id)
+        return product_ids
+
+
+class FuelStationValuesSerializer(ValuesSerializer):
+    """ Same payload as FuelStationSerializer """
+    values_fields = (
+        'pk', 'name', 'description', 'is_operational', 'is_featured',
+        'is_open', 'updated_at', 'hidden', 'location_id', 'location__street',
+        'location__city', 'location__state', 'location__point')
+
+    def prepare(self, rows):
+        self.station_url = url_builder('fuelstation-detail', self.request)
+        self.product_url = self.product_url_builder()
+        self.product_ids = self.get_product_ids('fuel_station_id', [row['pk'] for row in rows])
+
+    def to_representation(self, row):
+        product_url = self.product_url
+        return {
+            'url': self.station_url(row['pk']),
+            'pk': row['pk'],
+            'name': row['name'],
+            'description': row['description'],
+            'products': [product_url(pk) for pk in self.product_ids.get(row['pk'], ())],
+            'location': location_feature(
+                row['location_id'], row['location__point'], row['location__street'],
+                row['location__city'], row['location__state']),
+            'is_operational': row['is_operational'],
+            'is_featured': row['is_featured'],
+            'is_open': row['is_open'],
+            'updated_at': self.format_datetime(row['updated_at']),
+            'hidden': row['hidden'],
+        }
+
+
+class RouteStationValuesSerializer(FuelStationValuesSerializer):
+    """ Stations found by FuelStationManager.along_route() """
+    values_fields = FuelStationValuesSerializer.values_fields + ('route_fraction', 'route_distance')
+
+    def to_representation(self, row):
+        data = super(RouteStationValuesSerializer, self).to_representation(row)
+        data['route_fraction'] = round(row['route_fraction'], 6)
+        data['distance_from_route'] = round(row['route_distance'].m, 1)
+        return data
+
+
+class CategoryValuesSerializer(ValuesSerializer):
+    """ Same payload as CategorySerializer """
+    values_fields = ('pk', 'name', 'description', 'hidden')
+
+    def prepare(self, rows):
+        self.category_url = url_builder('category-detail', self.request)
+        self.product_url = self.product_url_builder()
+        self.product_ids = self.get_product_ids('category_id', [row['pk'] for row in rows])
+
+    def to_representation(self, row):
+        product_url = self.product_url
+        return {
+            'url': self.category_url(row['pk']),
+            'pk': row['pk'],
+            'name': row['name'],
+            'products': [product_url(pk) for pk in self.product_ids.get(row['pk'], ())],
+            'description': row['description'],
+            'hidden': row['hidden'],
+        }
+
+
+class ProductValuesSerializer(ValuesSerializer):
+    """ Same payload as ProductSerializer """
+    values_fields = (
+        'pk', 'name', 'description', 'category__name', 'fuel_station__name',
+        'price', 'available_on', 'is_available', 'is_featured', 'updated_at')
+
+    def __init__(self, context):
+        super(ProductValuesSerializer, self).__init__(context)
+        self.price_field = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+    def prepare(self, rows):
+        self.product_url = url_builder('product-detail', self.request)
+        self.currency = self.context.get('currency', settings.DEFAULT_CURRENCY)
+
+    def format_price(self, value):
+        if value is None:
+            return None
+        currency = getattr(value, 'currency', settings.DEFAULT_CURRENCY)
+        factor = get_context_factor(self.context, currency)
+        amount = getattr(value, 'gross', value)
+        return self.price_field.to_representation(convert_amount(amount, factor))
+
+    def to_representation(self, row):
+        return {
+            'url': self.product_url(row['pk']),
+            'pk': row['pk'],
+            'name': row['name'],
+            'description': row['description'],
+            'category': row['category__name'],
+            'fuel_station': row['fuel_station__name'],
+            'price': self.format_price(row['price']),
+            'currency': self.currency,
+            'available_on': self.format_date(row['available_on']),
+            'is_available': row['is_available'],
+            'is_featured': row['is_featured'],
+            'updated_at': self.format_datetime(row['updated_at']),
+        }
+
+
+class LocationValuesSerializer(ValuesSerializer):
+    """ Same features as LocationSerializer """
+    values_fields = ('pk', 'street', 'city', 'state', 'point')
+
+    def to_representation(self, row):
+        return location_feature(
+            row['pk'], row['point'], row['street'], row['city'], row['state'])
+
+
+class ValuesListMixin(object):
+    """
+    List view mixin serving GET lists through ``values_serializer_class``.
+    The regular serializer still handles everything else.
+    """
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        serializer = self.values_serializer_class(self.get_serializer_context())
+        rows = serializer.get_rows(queryset)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation_many(page))
+        return Response(serializer.to_representation_many(rows))
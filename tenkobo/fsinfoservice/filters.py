@@ -0,0 +1,38 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from .geo import is_geohash
+from .models import GEOHASH_PRECISIONS
+
+
+def geohash_lookup(geohash, prefix=''):
+    """
+    Filter keyword arguments selecting the locations inside ``geohash``:
+    an equality on the matching cell column, or a prefix match on the
+    coarsest one for shorter hashes.
+    """
+    if len(geohash) in GEOHASH_PRECISIONS:
+        return {'%sgeohash_%d' % (prefix, len(geohash)): geohash}
+    return {'%sgeohash_%d__startswith' % (prefix, min(GEOHASH_PRECISIONS)): geohash}
+
+
+def clean_geohash(value, param='geohash'):
+    geohash = value.strip().lower()
+    if not is_geohash(geohash) or len(geohash) > max(GEOHASH_PRECISIONS):
+        raise ValidationError({param: 'A geohash of at most %d characters is required.' % max(GEOHASH_PRECISIONS)})
+    return geohash
+
+
+class GeohashFilter(BaseFilterBackend):
+    """
+    ``?geohash=<cell>`` keeps the rows located in the cell. Views set
+    ``geohash_field_prefix`` when the location is a related model.
+    """
+    query_param = 'geohash'
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get(self.query_param)
+        if not value:
+            return queryset
+        prefix = getattr(view, 'geohash_field_prefix', '')
+        return queryset.filter(**geohash_lookup(clean_geohash(value, self.query_param), prefix))
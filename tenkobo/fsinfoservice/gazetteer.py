@@ -0,0 +1,68 @@
+"""
+Reverse geocoding: coordinates to city and state.
+
+Points are first looked up in the AdminBoundary table with a
+point-in-polygon query on its spatial index. Only when the gazetteer
+does not cover the point, or has no city for it, is the external
+geocoder asked; its answers are cached per ~11 m cell.
+"""
+import logging
+
+import geocoder
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.core.cache import cache
+
+from .models import AdminBoundary
+
+
+logger = logging.getLogger(__name__)
+
+PROVIDER_CACHE_SECONDS = 30 * 24 * 60 * 60
+
+
+def lookup_boundaries(lat, lng):
+    """ ``{'city': ..., 'state': ...}`` from the gazetteer, possibly partial """
+    point = Point(lng, lat, srid=4326)
+    names = dict(
+        AdminBoundary.objects.filter(geometry__contains=point).order_by('level').values_list('level', 'name'))
+    return {
+        'city': names.get(AdminBoundary.CITY, ''),
+        'state': names.get(AdminBoundary.STATE, ''),
+    }
+
+
+def lookup_provider(lat, lng):
+    key = 'fsinfoservice:reverse-geocode:%.4f:%.4f' % (lat, lng)
+    address = cache.get(key)
+    if address is None:
+        try:
+            result = geocoder.google([lat, lng], method='reverse', key=settings.GOOGLE_API_KEY)
+        except Exception:
+            logger.warning('Reverse geocoding %s,%s failed', lat, lng, exc_info=True)
+            return {}
+        if not result.ok:
+            return {}
+        address = {
+            'street': ' '.join(part for part in (result.housenumber, result.street) if part),
+            'city': result.city or '',
+            'state': result.state or '',
+        }
+        cache.set(key, address, PROVIDER_CACHE_SECONDS)
+    return address
+
+
+def reverse_geocode(lat, lng, use_provider=True):
+    """
+    Address parts (``street``, ``city``, ``state``) of a point; missing
+    parts are empty strings. With ``use_provider`` False only the
+    gazetteer is asked, so no HTTP request is made.
+    """
+    address = lookup_boundaries(lat, lng)
+    address['street'] = ''
+    if use_provider and not (address['city'] and address['state']):
+        found = lookup_provider(lat, lng)
+        for field, value in found.items():
+            if not address.get(field):
+                address[field] = value
+    return address
@@ -0,0 +1,182 @@
+"""
+Helpers for route geometries: polyline decoding, GeoJSON parsing and
+splitting long routes into short segments.
+"""
+from django.contrib.gis.geos import LineString
+from django.db.models import FloatField, Func
+
+
+# Routes with more points than this are refused before any work is done
+MAX_ROUTE_POINTS = 20000
+
+# Approximate length of one degree of latitude, in metres
+METRES_PER_DEGREE = 111320.0
+
+
+class InvalidRoute(ValueError):
+    pass
+
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_BITS = dict((char, index) for index, char in enumerate(GEOHASH_ALPHABET))
+
+
+def encode_geohash(lat, lng, precision):
+    """ Geohash of a point, the same string as PostGIS's ST_GeoHash """
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars = []
+    bits = bit_count = 0
+    even = True
+    while len(chars) < precision:
+        value, interval = (lng, lng_range) if even else (lat, lat_range)
+        middle = (interval[0] + interval[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = bit_count = 0
+    return ''.join(chars)
+
+
+def geohash_bbox(geohash):
+    """ ``(west, south, east, north)`` of a geohash cell """
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        try:
+            bits = GEOHASH_BITS[char]
+        except KeyError:
+            raise ValueError('Invalid geohash %r' % geohash)
+        for shift in range(4, -1, -1):
+            interval = lng_range if even else lat_range
+            middle = (interval[0] + interval[1]) / 2
+            if bits >> shift & 1:
+                interval[0] = middle
+            else:
+                interval[1] = middle
+            even = not even
+    return (lng_range[0], lat_range[0], lng_range[1], lat_range[1])
+
+
+def is_geohash(value):
+    return bool(value) and all(char in GEOHASH_BITS for char in value)
+
+
+def decode_polyline(encoded, precision=5):
+    """
+    Decode a route in Google's encoded polyline format into a list of
+    ``(lat, lng)`` tuples.
+    """
+    if not isinstance(encoded, str):
+        raise InvalidRoute('Expected the polyline as a string.')
+    factor = 10 ** precision
+    coordinates = []
+    index = lat = lng = 0
+    length = len(encoded)
+    while index < length:
+        deltas = []
+        for _ in range(2):
+            shift = result = 0
+            while True:
+                if index >= length:
+                    raise InvalidRoute('Truncated polyline.')
+                byte = ord(encoded[index]) - 63
+                index += 1
+                if byte < 0:
+                    raise InvalidRoute('Invalid polyline character.')
+                result |= (byte & 0x1f) << shift
+                shift += 5
+                if byte < 0x20:
+                    break
+            deltas.append(~(result >> 1) if result & 1 else result >> 1)
+        lat += deltas[0]
+        lng += deltas[1]
+        coordinates.append((lat / float(factor), lng / float(factor)))
+    return coordinates
+
+
+def route_from_polyline(encoded):
+    points = decode_polyline(encoded)
+    return make_route([(lng, lat) for lat, lng in points])
+
+
+def route_from_geojson(geometry):
+    """ Build a route from a GeoJSON LineString (a dict) """
+    if not isinstance(geometry, dict) or geometry.get('type') != 'LineString':
+        raise InvalidRoute('Expected a GeoJSON LineString.')
+    try:
+        coordinates = [(float(point[0]), float(point[1])) for point in geometry.get('coordinates') or ()]
+    except (TypeError, ValueError, IndexError):
+        raise InvalidRoute('Invalid LineString coordinates.')
+    return make_route(coordinates)
+
+
+def make_route(coordinates):
+    """ A LineString in WGS 84 from ``(lng, lat)`` pairs """
+    if len(coordinates) < 2:
+        raise InvalidRoute('A route needs at least two points.')
+    if len(coordinates) > MAX_ROUTE_POINTS:
+        raise InvalidRoute('A route can have at most %d points.' % MAX_ROUTE_POINTS)
+    for lng, lat in coordinates:
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise InvalidRoute('Coordinates out of range.')
+    return LineString(coordinates, srid=4326)
+
+
+def simplify_route(route, tolerance):
+    """
+    Drop vertices that move the route by less than ``tolerance`` metres.
+    The tolerance is converted to degrees, which is good enough at the
+    scale of a corridor.
+    """
+    simplified = route.simplify(tolerance / METRES_PER_DEGREE, preserve_topology=False)
+    if simplified.empty or simplified.geom_type != 'LineString' or len(simplified) < 2:
+        return route
+    simplified.srid = route.srid
+    return simplified
+
+
+def split_route(route, segment_length):
+    """
+    Split ``route`` into consecutive LineStrings about ``segment_length``
+    metres long. Each of them has a small bounding box, so the spatial
+    index discards far more rows than for one box around the whole route.
+    """
+    max_length = segment_length / METRES_PER_DEGREE
+    coordinates = route.coords
+    segments = []
+    current = [coordinates[0]]
+    length = 0.0
+    for previous, point in zip(coordinates, coordinates[1:]):
+        current.append(point)
+        length += ((point[0] - previous[0]) ** 2 + (point[1] - previous[1]) ** 2) ** 0.5
+        if length >= max_length:
+            segments.append(LineString(current, srid=route.srid))
+            current = [point]
+            length = 0.0
+    if len(current) > 1:
+        segments.append(LineString(current, srid=route.srid))
+    return segments
+
+
+class LineLocatePoint(Func):
+    """
+    Fraction (0 to 1) of ``route`` that lies before the point of the route
+    closest to the point expression; used to order points along a route.
+    """
+    function = 'ST_LineLocatePoint'
+    template = '%(function)s(ST_GeomFromEWKT(%%s), %(expressions)s::geometry)'
+
+    def __init__(self, route, point, **extra):
+        self.route = route
+        super(LineLocatePoint, self).__init__(point, output_field=FloatField(), **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        sql, params = super(LineLocatePoint, self).as_sql(compiler, connection, **extra_context)
+        return sql, [self.route.ewkt] + list(params)
@@ -0,0 +1,57 @@
+import random
+import timeit
+
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework_gis.serializers import GeoFeatureModelSerializer, GeometrySerializerMethodField
+
+from tenkobo.core.renderers import FastJSONRenderer
+from ...models import Location
+from ...serializers import LocationSerializer
+
+
+class GEOSLocationSerializer(GeoFeatureModelSerializer):
+    """ The location serializer as it was before coordinates were read directly """
+
+    point = GeometrySerializerMethodField()
+
+    def get_point(self, obj):
+        return obj.get_point
+
+    class Meta:
+        model = Location
+        geo_field = 'point'
+        fields = ('id', 'street', 'city', 'state')
+
+
+def build_locations(count):
+    rng = random.Random(count)
+    return [
+        Location(
+            id=i, street='%d Admiralty Way' % i, city='Lagos', state='Lagos',
+            point=Point(rng.uniform(2.7, 14.6), rng.uniform(4.3, 13.8), srid=4326))
+        for i in range(1, count + 1)]
+
+
+class Command(BaseCommand):
+    help = ('Compares rendering a GeoJSON feature collection of locations through '
+            'GEOS and the default JSON renderer with the direct coordinate path.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--features', type=int, default=10000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def measure(self, serializer_class, renderer, locations, repeat):
+        def run():
+            return renderer.render(serializer_class(locations, many=True).data)
+        return min(timeit.repeat(run, number=1, repeat=repeat))
+
+    def handle(self, *args, **options):
+        locations = build_locations(options['features'])
+        baseline = self.measure(GEOSLocationSerializer, JSONRenderer(), locations, options['repeat'])
+        fast = self.measure(LocationSerializer, FastJSONRenderer(), locations, options['repeat'])
+        self.stdout.write('%d features' % options['features'])
+        self.stdout.write('  GEOS + JSONRenderer:           %8.1f ms' % (baseline * 1000))
+        self.stdout.write('  coordinates + FastJSONRenderer: %8.1f ms' % (fast * 1000))
+        self.stdout.write(self.style.SUCCESS('  speedup: %.1fx' % (baseline / fast)))
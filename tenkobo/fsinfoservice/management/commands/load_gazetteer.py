@@ -0,0 +1,50 @@
+import json
+
+from django.contrib.gis.geos import GEOSGeometry, MultiPolygon
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ...models import AdminBoundary
+
+
+class Command(BaseCommand):
+    help = ('Loads state or city boundaries from a GeoJSON FeatureCollection in WGS 84 '
+            'into the reverse geocoding gazetteer. Load states before cities: cities are '
+            'attached to the state that contains them.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--level', choices=(AdminBoundary.STATE, AdminBoundary.CITY), required=True)
+        parser.add_argument('--name-property', default='name',
+                            help='Feature property holding the boundary name (default: name).')
+        parser.add_argument('--replace', action='store_true',
+                            help='Delete the boundaries of this level first.')
+
+    def read_boundaries(self, path, level, name_property):
+        with open(path) as geojson:
+            data = json.load(geojson)
+        for feature in data.get('features', ()):
+            name = (feature.get('properties') or {}).get(name_property)
+            if not name or not feature.get('geometry'):
+                continue
+            geometry = GEOSGeometry(json.dumps(feature['geometry']), srid=4326)
+            if geometry.geom_type == 'Polygon':
+                geometry = MultiPolygon(geometry, srid=4326)
+            elif geometry.geom_type != 'MultiPolygon':
+                raise CommandError('%s: unsupported geometry %s' % (name, geometry.geom_type))
+            yield AdminBoundary(name=name, level=level, geometry=geometry)
+
+    def handle(self, path, level, name_property, replace, **options):
+        with transaction.atomic():
+            if replace:
+                AdminBoundary.objects.filter(level=level).delete()
+            boundaries = AdminBoundary.objects.bulk_create(
+                self.read_boundaries(path, level, name_property), batch_size=500)
+            if level == AdminBoundary.CITY:
+                for boundary in AdminBoundary.objects.filter(level=level, parent__isnull=True):
+                    boundary.parent = AdminBoundary.objects.filter(
+                        level=AdminBoundary.STATE,
+                        geometry__contains=boundary.geometry.point_on_surface).first()
+                    if boundary.parent is not None:
+                        boundary.save(update_fields=['parent'])
+        self.stdout.write('Loaded %d %s boundaries.' % (len(boundaries), level))
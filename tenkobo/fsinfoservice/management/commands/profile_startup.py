@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tenkobo.core.importprofile import TARGETS
+
+
+MB = 1024.0 * 1024
+
+
+class Command(BaseCommand):
+    help = ('Starts a web or Celery worker process in a fresh interpreter and reports '
+            'the time and memory spent importing each module.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('target', choices=TARGETS, nargs='?', default='web')
+        parser.add_argument(
+            '--sort', choices=('cumulative', 'self', 'memory'), default='cumulative',
+            help='Column to sort modules by (default: cumulative).')
+        parser.add_argument('--limit', type=int, default=30, help='Number of modules to list.')
+        parser.add_argument('--json', action='store_true', help='Print the raw profile as JSON.')
+
+    def run_profile(self, target):
+        env = dict(os.environ)
+        env['DJANGO_SETTINGS_MODULE'] = settings.SETTINGS_MODULE
+        env['PYTHONPATH'] = os.pathsep.join(
+            [str(settings.ROOT_DIR), str(settings.APPS_DIR)] +
+            [part for part in env.get('PYTHONPATH', '').split(os.pathsep) if part])
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'tenkobo.core.importprofile', target],
+            cwd=str(settings.ROOT_DIR), env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = process.communicate()
+        if process.returncode:
+            raise CommandError('Startup failed:\n%s' % err.decode('utf-8', 'replace'))
+        return json.loads(out.decode('utf-8'))
+
+    def handle(self, *args, **options):
+        result = self.run_profile(options['target'])
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2, sort_keys=True))
+            return
+
+        modules = result['modules']
+        self.stdout.write(
+            '%s: %.2fs, %d modules imported, RSS %.1f MB (%.1f MB before the first import)\n' % (
+                result['target'], result['seconds'], len(modules),
+                result['rss'] / MB, result['rss_at_start'] / MB))
+        self.stdout.write('%10s %10s %10s %10s  %s' % ('cum ms', 'self ms', 'cum MB', 'self MB', 'module'))
+        ranked = sorted(modules.items(), key=lambda item: item[1][options['sort']], reverse=True)
+        for name, row in ranked[:options['limit']]:
+            self.stdout.write('%10.1f %10.1f %10.2f %10.2f  %s' % (
+                row['cumulative'] * 1000, row['self'] * 1000,
+                row['memory'] / MB, row['self_memory'] / MB, name))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from ...positions import POINT, POSITION, reconcile_positions
+
+
+class Command(BaseCommand):
+    help = ('Makes FuelStation.position and Location.point agree for every station, '
+            'copying from the chosen source field.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--source', choices=(POINT, POSITION), default=POINT,
+            help='Field holding the correct coordinates (default: point).')
+
+    def handle(self, *args, **options):
+        changed = reconcile_positions(options['source'])
+        self.stdout.write('Updated %d stations.' % changed)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Indexes for the admin's case-insensitive prefix (``^field``) and
+    exact (``=field``) searches, which compare UPPER(field).
+    """
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; it keeps
+    # the tables writable while the indexes are built.
+    atomic = False
+
+    dependencies = [
+        ('fsinfoservice', '0003_auto_20171125_0913'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS fsinfoservice_location_street_upper_like '
+            'ON fsinfoservice_location (UPPER(street::text) text_pattern_ops)',
+            'DROP INDEX CONCURRENTLY IF EXISTS fsinfoservice_location_street_upper_like',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS fsinfoservice_location_city_upper_like '
+            'ON fsinfoservice_location (UPPER(city::text) text_pattern_ops)',
+            'DROP INDEX CONCURRENTLY IF EXISTS fsinfoservice_location_city_upper_like',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS fsinfoservice_location_state_upper_like '
+            'ON fsinfoservice_location (UPPER(state::text) text_pattern_ops)',
+            'DROP INDEX CONCURRENTLY IF EXISTS fsinfoservice_location_state_upper_like',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS fsinfoservice_fuelstation_name_upper_like '
+            'ON fsinfoservice_fuelstation (UPPER(name::text) text_pattern_ops)',
+            'DROP INDEX CONCURRENTLY IF EXISTS fsinfoservice_fuelstation_name_upper_like',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS fsinfoservice_category_name_upper_like '
+            'ON fsinfoservice_category (UPPER(name::text) text_pattern_ops)',
+            'DROP INDEX CONCURRENTLY IF EXISTS fsinfoservice_category_name_upper_like',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS fsinfoservice_product_name_upper_like '
+            'ON fsinfoservice_product (UPPER(name::text) text_pattern_ops)',
+            'DROP INDEX CONCURRENTLY IF EXISTS fsinfoservice_product_name_upper_like',
+        ),
+    ]
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+# Fills the geohash columns whenever a point is written, including by
+# bulk_create(), update() and raw SQL, which bypass Location.save().
+CREATE_TRIGGER = """
+CREATE OR REPLACE FUNCTION fsinfoservice_location_set_geohash() RETURNS trigger AS $$
+DECLARE
+    geohash text := '';
+BEGIN
+    IF NEW.point IS NOT NULL THEN
+        geohash := ST_GeoHash(NEW.point::geometry, 7);
+    END IF;
+    NEW.geohash_4 := left(geohash, 4);
+    NEW.geohash_5 := left(geohash, 5);
+    NEW.geohash_6 := left(geohash, 6);
+    NEW.geohash_7 := geohash;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER fsinfoservice_location_geohash
+    BEFORE INSERT OR UPDATE OF point ON fsinfoservice_location
+    FOR EACH ROW EXECUTE PROCEDURE fsinfoservice_location_set_geohash();
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS fsinfoservice_location_geohash ON fsinfoservice_location;
+DROP FUNCTION IF EXISTS fsinfoservice_location_set_geohash();
+"""
+
+BACKFILL = """
+UPDATE fsinfoservice_location
+SET geohash_4 = ST_GeoHash(point::geometry, 4),
+    geohash_5 = ST_GeoHash(point::geometry, 5),
+    geohash_6 = ST_GeoHash(point::geometry, 6),
+    geohash_7 = ST_GeoHash(point::geometry, 7)
+WHERE point IS NOT NULL
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fsinfoservice', '0004_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='geohash_4',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=4, default=''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='geohash_5',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=5, default=''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='geohash_6',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=6, default=''),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='geohash_7',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=7, default=''),
+            preserve_default=False,
+        ),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+    ]
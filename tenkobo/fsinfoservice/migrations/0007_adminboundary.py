@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fsinfoservice', '0006_duplicatecandidate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminBoundary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='name')),
+                ('level', models.CharField(choices=[('state', 'state'), ('city', 'city')], db_index=True, max_length=10, verbose_name='level')),
+                ('geometry', django.contrib.gis.db.models.fields.MultiPolygonField(srid=4326, verbose_name='geometry')),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='children', to='fsinfoservice.AdminBoundary', verbose_name='parent')),
+            ],
+            options={
+                'verbose_name_plural': 'admin boundaries',
+            },
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='city',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='state',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AlterField(
+            model_name='location',
+            name='street',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
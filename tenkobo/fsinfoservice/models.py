@@ -1,33 +1,73 @@
 import datetime
 import geocoder
-import json
 from decimal import Decimal
 from geomet import wkt
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
 from django.contrib.gis.db import models as gis_models
 from django.utils.translation import pgettext_lazy as _
+from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import F, Q, Max
 from django.contrib.gis.geos import GEOSGeometry
+from django.contrib.gis.db.models.functions import Distance as DistanceFunction
+from django.contrib.gis.measure import D
 
 from django_prices.models import Price, PriceField
 from geoposition.fields import GeopositionField
 
+from .geo import LineLocatePoint, split_route
+
+
+GEOHASH_PRECISIONS = (4, 5, 6, 7)
+GEOHASH_FIELDS = ['geohash_%d' % precision for precision in GEOHASH_PRECISIONS]
+
+# Length in metres of the pieces a route is split into by along_route()
+ROUTE_SEGMENT_LENGTH = 20000
+
+
+class AdminBoundary(gis_models.Model):
+    """
+    An administrative area (state or city/LGA) used to reverse geocode
+    points locally, loaded with the load_gazetteer command.
+    """
+    STATE = 'state'
+    CITY = 'city'
+    LEVELS = [
+        (STATE, _('Admin boundary level', 'state')),
+        (CITY, _('Admin boundary level', 'city')),
+    ]
+    name = gis_models.CharField(_('Admin boundary field', 'name'), max_length=100)
+    level = gis_models.CharField(_('Admin boundary field', 'level'), max_length=10, choices=LEVELS, db_index=True)
+    parent = gis_models.ForeignKey(
+        'self', null=True, blank=True, related_name='children', on_delete=models.SET_NULL,
+        verbose_name=_('Admin boundary field', 'parent'))
+    geometry = gis_models.MultiPolygonField(_('Admin boundary field', 'geometry'), srid=4326, spatial_index=True)
+
+    class Meta:
+        verbose_name_plural = _('Admin boundary model', 'admin boundaries')
+
+    def __str__(self):
+        return self.name
+
 
 class Location(gis_models.Model):
     '''
     A model which holds information about a particular location
     '''
-    street = gis_models.CharField(max_length=255)
-    city = gis_models.CharField(max_length=100)
-    state = gis_models.CharField(max_length=100)
+    street = gis_models.CharField(max_length=255, blank=True)
+    city = gis_models.CharField(max_length=100, blank=True)
+    state = gis_models.CharField(max_length=100, blank=True)
     point = gis_models.PointField(null=True, spatial_index=True, geography=True)
+    # Geohash cells of the point (about 39 km, 4.9 km, 1.2 km and 150 m
+    # wide), kept in sync by a database trigger, see migration 0005.
+    geohash_4 = gis_models.CharField(max_length=4, blank=True, editable=False, db_index=True)
+    geohash_5 = gis_models.CharField(max_length=5, blank=True, editable=False, db_index=True)
+    geohash_6 = gis_models.CharField(max_length=6, blank=True, editable=False, db_index=True)
+    geohash_7 = gis_models.CharField(max_length=7, blank=True, editable=False, db_index=True)
 
     def get_lat_lng(self):
-    	geojson = self.point.json
-    	coordinates = json.loads(geojson).get('coordinates')
-    	return [coordinates[1], coordinates[0]]
+    	return [self.point.y, self.point.x]
 
     def set_point(self, address):
     	try:
@@ -36,6 +76,14 @@ class Location(gis_models.Model):
     		self.point = wkt.dumps(geocoder.google('67 Admiralty Way, Lekki Phase 1, Lagos').geometry, decimals=4)
     	else:
     		self.point = wkt.dumps(geocoded.geometry, decimals=4)
+
+    def set_address(self, use_provider=True):
+    	from .gazetteer import reverse_geocode
+    	# Only fills in what is missing, submitted values win.
+    	address = reverse_geocode(self.point.y, self.point.x, use_provider=use_provider)
+    	for field in ('street', 'city', 'state'):
+    		if not getattr(self, field):
+    			setattr(self, field, address.get(field) or '')
     		
     	
 
@@ -44,8 +92,26 @@ class Location(gis_models.Model):
     	return self.point
 
     def save(self, *args, **kwargs):
-    	self.set_point(self)
+    	geocode = self.point is None
+    	reverse_geocode = False
+    	if not geocode and not (self.city and self.state):
+    		# The gazetteer is a local query; what it does not know is left
+    		# to the geocoding queue, like forward geocoding below.
+    		self.set_address(use_provider=False)
+    		reverse_geocode = not (self.city and self.state)
     	super(Location, self).save(*args, **kwargs)
+    	update_fields = kwargs.get('update_fields')
+    	if update_fields is None or 'point' in update_fields:
+    		# The database trigger is the only one computing the cells.
+    		self.refresh_from_db(fields=GEOHASH_FIELDS)
+    	if geocode:
+    		# Forward geocoding calls a rate limited external provider, so
+    		# a worker on the geocoding queue fills the point in.
+    		from .tasks import geocode_location
+    		transaction.on_commit(lambda: geocode_location.delay(self.pk))
+    	elif reverse_geocode:
+    		from .tasks import reverse_geocode_location
+    		transaction.on_commit(lambda: reverse_geocode_location.delay(self.pk))
 
     def __str__(self):
     	return '{0}, {1}, {2}'.format(self.street, self.city, self.state)
@@ -59,6 +125,20 @@ class FuelStationManager(models.Manager):
         	Q(updated_at__lte=today) | Q(updated_at__isnull=True)).filter(
             is_open=True)
 
+    def along_route(self, route, width, segment_length=ROUTE_SEGMENT_LENGTH):
+        """
+        Stations within ``width`` metres of ``route`` (a LineString), ordered
+        by how far along the route they are. The route is matched piecewise
+        so that each ST_DWithin scans a small part of the spatial index.
+        """
+        near_route = Q()
+        for segment in split_route(route, segment_length):
+            near_route |= Q(location__point__dwithin=(segment, D(m=width)))
+        return self.get_queryset().filter(near_route).annotate(
+            route_fraction=LineLocatePoint(route, 'location__point'),
+            route_distance=DistanceFunction('location__point', route),
+        ).order_by('route_fraction', 'pk')
+
 
 class FuelStation(models.Model):
 	name = models.CharField(_('Fuel station field', 'name'), max_length=200)
@@ -72,6 +152,7 @@ class FuelStation(models.Model):
 	location = models.OneToOneField(Location, related_name='fuel_station', on_delete=models.CASCADE, unique=True)
 	position = GeopositionField()
 
+	objects = FuelStationManager()
 
 	class Meta:
 		ordering = ('-updated_at', 'position', 'name', 'location__point')
@@ -150,3 +231,34 @@ class OpeningHours(models.Model):
 	from_hour = models.TimeField(_('Fuel station field', 'open at'))
 	to_hour = models.TimeField(_('Fueld station field', 'close at'))
 
+
+class DuplicateCandidate(models.Model):
+    """
+    Two stations that may be the same place, found by
+    fsinfoservice.duplicates.find_duplicates(). ``station`` is the older
+    of the two and survives a merge. Rejected pairs are kept so that they
+    are not suggested again.
+    """
+    PENDING = 'pending'
+    CONFIRMED = 'confirmed'
+    REJECTED = 'rejected'
+    STATUSES = [
+        (PENDING, _('Duplicate candidate status', 'pending')),
+        (CONFIRMED, _('Duplicate candidate status', 'confirmed')),
+        (REJECTED, _('Duplicate candidate status', 'rejected')),
+    ]
+    station = models.ForeignKey(FuelStation, related_name='+', on_delete=models.CASCADE)
+    duplicate = models.ForeignKey(FuelStation, related_name='+', on_delete=models.CASCADE)
+    distance = models.FloatField(_('Duplicate candidate field', 'distance in metres'))
+    name_similarity = models.FloatField(_('Duplicate candidate field', 'name similarity'))
+    status = models.CharField(
+        _('Duplicate candidate field', 'status'), max_length=10, choices=STATUSES, default=PENDING,
+        db_index=True)
+    created_at = models.DateTimeField(_('Duplicate candidate field', 'created at'), auto_now_add=True)
+
+    class Meta:
+        unique_together = ('station', 'duplicate')
+
+    def __str__(self):
+        return '%s / %s' % (self.station_id, self.duplicate_id)
+
@@ -0,0 +1,132 @@
+"""
+Bulk maintenance of station coordinates.
+
+A station's coordinates are stored twice: ``FuelStation.position``, a
+"lat,lng" string, and the PostGIS ``Location.point``. The functions
+below write both in a handful of statements, whatever the number of
+stations.
+"""
+from django.db import connection, transaction
+
+from .models import FuelStation, Location
+
+
+POSITION_BATCH_SIZE = 1000
+
+POINT = 'point'
+POSITION = 'position'
+
+STATION_TABLE = FuelStation._meta.db_table
+LOCATION_TABLE = Location._meta.db_table
+
+
+class InvalidPosition(ValueError):
+    pass
+
+
+def format_position(lat, lng):
+    return '%s,%s' % (lat, lng)
+
+
+def parse_changes(data):
+    """
+    Validate a list of ``{"id": ..., "lat": ..., "lng": ...}`` objects
+    into ``(id, lat, lng)`` tuples; the last change of a station wins.
+    """
+    if not isinstance(data, list):
+        raise InvalidPosition('Expected a list of changes.')
+    changes = {}
+    for item in data:
+        try:
+            pk, lat, lng = int(item['id']), float(item['lat']), float(item['lng'])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidPosition('Every change needs a numeric id, lat and lng.')
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise InvalidPosition('Station %d: coordinates out of range.' % pk)
+        changes[pk] = (pk, lat, lng)
+    return list(changes.values())
+
+
+def update_positions(changes):
+    """
+    Move the stations in ``changes``, a list of ``(station id, lat, lng)``,
+    updating both ``position`` and the location ``point``. Returns the
+    number of stations updated.
+    """
+    updated = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(changes), POSITION_BATCH_SIZE):
+            batch = changes[start:start + POSITION_BATCH_SIZE]
+            values = ', '.join(['(%s, %s::float8, %s::float8, %s)'] * len(batch))
+            params = []
+            for pk, lat, lng in batch:
+                params.extend([pk, lat, lng, format_position(lat, lng)])
+            cursor.execute(
+                'UPDATE {station} AS s SET position = v.position, updated_at = now() '
+                'FROM (VALUES {values}) AS v (id, lat, lng, position) '
+                'WHERE s.id = v.id'.format(station=STATION_TABLE, values=values),
+                params)
+            updated += cursor.rowcount
+            cursor.execute(
+                'UPDATE {location} AS l '
+                'SET point = ST_SetSRID(ST_MakePoint(v.lng, v.lat), 4326)::geography '
+                'FROM (VALUES {values}) AS v (id, lat, lng, position), {station} AS s '
+                'WHERE s.id = v.id AND l.id = s.location_id'.format(
+                    location=LOCATION_TABLE, station=STATION_TABLE, values=values),
+                params)
+    return updated
+
+
+# "lat,lng" with optional whitespace, as written by GeopositionField
+POSITION_PATTERN = r'^\s*-?[0-9]+(\.[0-9]+)?\s*,\s*-?[0-9]+(\.[0-9]+)?\s*$'
+
+# Positions are compared numerically, to the 7 decimals written here, so
+# that "6.44,3.47" matches a point at (3.47, 6.44) whatever its text. The
+# CASE keeps malformed positions from reaching the numeric casts.
+RECONCILE_FROM_POINT = """
+UPDATE {station} AS s
+SET position = rtrim(rtrim(p.lat::text, '0'), '.') || ',' || rtrim(rtrim(p.lng::text, '0'), '.'),
+    updated_at = now()
+FROM (
+    SELECT l.id,
+           round(ST_Y(l.point::geometry)::numeric, 7) AS lat,
+           round(ST_X(l.point::geometry)::numeric, 7) AS lng
+    FROM {location} AS l
+    WHERE l.point IS NOT NULL
+) AS p
+WHERE p.id = s.location_id
+  AND NOT CASE WHEN s.position ~ %s
+      THEN round(split_part(s.position, ',', 1)::numeric, 7) = p.lat
+       AND round(split_part(s.position, ',', 2)::numeric, 7) = p.lng
+      ELSE false END
+"""
+
+RECONCILE_FROM_POSITION = """
+UPDATE {location} AS l
+SET point = ST_SetSRID(ST_MakePoint(
+    split_part(s.position, ',', 2)::float8,
+    split_part(s.position, ',', 1)::float8), 4326)::geography
+FROM {station} AS s
+WHERE l.id = s.location_id
+  AND s.position ~ %s
+  AND (l.point IS NULL OR NOT ST_Equals(l.point::geometry, ST_SetSRID(ST_MakePoint(
+      split_part(s.position, ',', 2)::float8,
+      split_part(s.position, ',', 1)::float8), 4326)))
+"""
+
+
+def reconcile_positions(source=POINT):
+    """
+    Copy coordinates of every station from ``source`` (``'point'`` or
+    ``'position'``) to the other field where the two differ, in a single
+    statement. Returns the number of rows changed.
+    """
+    if source == POINT:
+        sql = RECONCILE_FROM_POINT
+    elif source == POSITION:
+        sql = RECONCILE_FROM_POSITION
+    else:
+        raise ValueError('Unknown source %r' % source)
+    with connection.cursor() as cursor:
+        cursor.execute(sql.format(station=STATION_TABLE, location=LOCATION_TABLE), [POSITION_PATTERN])
+        return cursor.rowcount
@@ -1,29 +1,65 @@
 import geocoder
 import json
+from collections import OrderedDict
 
+from django.conf import settings
+from django.utils.http import urlencode
 from rest_framework import serializers
 from django.contrib.gis.geos import Point, GEOSGeometry
-from rest_framework_gis.serializers import GeoFeatureModelSerializer, GeometrySerializerMethodField
+from rest_framework_gis.fields import GeometryField
+from rest_framework_gis.serializers import GeoFeatureModelSerializer
 
+from tenkobo.core.currency import CURRENCY_QUERY_PARAM, ConvertedPriceField
 from .models import Location, FuelStation, Category, Product
 
+
+class ProductHyperlinkedRelatedField(serializers.HyperlinkedRelatedField):
+	""" Keeps the requested currency on links to products """
+
+	def get_url(self, obj, view_name, request, format):
+		url = super(ProductHyperlinkedRelatedField, self).get_url(
+			obj, view_name, request, format)
+		currency = self.context.get('currency')
+		if url and currency and currency != settings.DEFAULT_CURRENCY:
+			url = '%s?%s' % (url, urlencode({CURRENCY_QUERY_PARAM: currency}))
+		return url
+
+
+class PointGeometryField(GeometryField):
+    """
+    Renders a point straight from its coordinates instead of exporting it
+    to GeoJSON through GEOS and parsing that back.
+    """
+
+    def to_representation(self, value):
+        if value is None:
+            return None
+        return OrderedDict((('type', 'Point'), ('coordinates', [value.x, value.y])))
+
+
 class LocationSerializer(GeoFeatureModelSerializer):
     """ A class to serialize locations as GeoJSON compatible data """
 
-    point = GeometrySerializerMethodField()
+    point = PointGeometryField(required=False)
 
-    def get_point(self, obj):
-    	return obj.get_point
-    
     class Meta:
         model = Location
         geo_field = "point"
         fields = ('id', 'street', 'city', 'state')
 
+    def validate(self, attrs):
+        # Either coordinates, which are reverse geocoded, or an address,
+        # which is geocoded.
+        if self.partial:
+            return attrs
+        if attrs.get('point') is None and not (attrs.get('street') or attrs.get('city')):
+            raise serializers.ValidationError('Provide a point or an address.')
+        return attrs
+
 
 
 class FuelStationSerializer(serializers.HyperlinkedModelSerializer):
-	products = serializers.HyperlinkedRelatedField(
+	products = ProductHyperlinkedRelatedField(
 		many=True,
 		read_only=True,
 		view_name='product-detail')
@@ -57,14 +93,18 @@ class FuelStationSerializer(serializers.HyperlinkedModelSerializer):
 		location.street = location_data.get('street', location.street)
 		location.city = location_data.get('city', location.city)
 		location.state = location_data.get('state', location.state)
-		location.point = location_data.get('point', location.point)
+		if 'point' in location_data:
+			location.point = location_data['point']
+		elif any(field in location_data for field in ('street', 'city', 'state')):
+			# The address changed without new coordinates: geocode it again.
+			location.point = None
 		location.save()
 
 		return instance
 		
 
 class CategorySerializer(serializers.HyperlinkedModelSerializer):
-	products = serializers.HyperlinkedRelatedField(
+	products = ProductHyperlinkedRelatedField(
 		many=True,
 		read_only=True,
 		view_name='product-detail')
@@ -82,15 +122,17 @@ class ProductSerializer(serializers.HyperlinkedModelSerializer):
 		slug_field='name')
 	fuel_station = serializers.SlugRelatedField(queryset=FuelStation.objects.all(),
 		slug_field='name')
+	price = ConvertedPriceField()
+	currency = serializers.SerializerMethodField()
 
 	class Meta:
 		model = Product
 		fields = (
 			'url', 'pk', 'name', 
 			'description', 'category', 'fuel_station', 
-			'price', 'available_on',
+			'price', 'currency', 'available_on',
 			'is_available', 'is_featured',
 			'updated_at')
 
-
-
+	def get_currency(self, obj):
+		return self.context.get('currency', settings.DEFAULT_CURRENCY)
@@ -0,0 +1,224 @@
+"""
+Pre-built snapshot files of the station dataset.
+
+For every state and every city we write two gzip-compressed files to the
+default storage backend. Names are grouped by their slug, the ``<key>``
+of the files, so "Lagos" and "LAGOS" make up one group rather than two
+groups overwriting each other's files:
+
+* ``<key>.<hash>.geojson.gz`` - a GeoJSON FeatureCollection with the same
+  features as the fuel station GeoJSON export;
+* ``<key>.<hash>.bin.gz`` - a compact binary format, little-endian::
+
+      header:  4s    magic b'TKS1'
+               I     number of records
+      record:  I     station id
+               f     latitude
+               f     longitude
+               B     flags (1 = open, 2 = operational, 4 = featured)
+               H     length of the name in bytes
+               ...   name, UTF-8 encoded
+
+File names carry the first characters of the SHA-256 of their content, so
+they can be cached forever; unchanged files are not uploaded again. A
+manifest listing the current files is stored next to them and in the
+cache, and is served by the SnapshotManifest view. Files listed in
+neither the new nor the previous manifest are deleted.
+"""
+import gzip
+import hashlib
+import io
+import json
+import struct
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from django.utils.text import slugify
+
+from tenkobo.core.renderers import dumps
+from .exports import EXPORT_BATCH_SIZE, batched, station_feature
+from .fast_serializers import FuelStationValuesSerializer
+from .models import FuelStation
+
+
+SNAPSHOT_PREFIX = 'snapshots'
+MANIFEST_PATH = SNAPSHOT_PREFIX + '/manifest.json'
+MANIFEST_CACHE_KEY = 'fsinfoservice:snapshot-manifest'
+
+BINARY_MAGIC = b'TKS1'
+BINARY_HEADER = struct.Struct('<4sI')
+BINARY_RECORD = struct.Struct('<IffBH')
+
+FLAG_OPEN = 1
+FLAG_OPERATIONAL = 2
+FLAG_FEATURED = 4
+
+
+def compress(content):
+    buffer = io.BytesIO()
+    # A fixed mtime keeps the output, and therefore the hash, stable.
+    with gzip.GzipFile(fileobj=buffer, mode='wb', mtime=0) as gz:
+        gz.write(content)
+    return buffer.getvalue()
+
+
+def encode_geojson(features):
+    return dumps({'type': 'FeatureCollection', 'features': features})
+
+
+def encode_binary(stations):
+    parts = [BINARY_HEADER.pack(BINARY_MAGIC, len(stations))]
+    for station in stations:
+        geometry = station['location']['geometry']
+        if geometry is None:
+            lng, lat = 0.0, 0.0
+        else:
+            lng, lat = geometry['coordinates']
+        flags = (
+            (FLAG_OPEN if station['is_open'] else 0) |
+            (FLAG_OPERATIONAL if station['is_operational'] else 0) |
+            (FLAG_FEATURED if station['is_featured'] else 0))
+        name = station['name'].encode('utf-8')[:0xffff]
+        parts.append(BINARY_RECORD.pack(station['pk'], lat, lng, flags, len(name)))
+        parts.append(name)
+    return b''.join(parts)
+
+
+def decode_binary(content):
+    """ Inverse of encode_binary, mostly useful for clients and tests """
+    magic, count = BINARY_HEADER.unpack_from(content, 0)
+    if magic != BINARY_MAGIC:
+        raise ValueError('Not a station snapshot')
+    offset = BINARY_HEADER.size
+    stations = []
+    for _ in range(count):
+        pk, lat, lng, flags, name_length = BINARY_RECORD.unpack_from(content, offset)
+        offset += BINARY_RECORD.size
+        name = content[offset:offset + name_length].decode('utf-8')
+        offset += name_length
+        stations.append({'pk': pk, 'lat': lat, 'lng': lng, 'flags': flags, 'name': name})
+    return stations
+
+
+def store(path_template, content):
+    compressed = compress(content)
+    digest = hashlib.sha256(compressed).hexdigest()
+    path = path_template % digest[:16]
+    if not default_storage.exists(path):
+        default_storage.save(path, ContentFile(compressed))
+    return {
+        'path': path,
+        'url': default_storage.url(path),
+        'sha256': digest,
+        'size': len(compressed),
+    }
+
+
+def group_key(*names):
+    return '-'.join(slugify(name or '') or 'unknown' for name in names)
+
+
+def group_names(names):
+    """ ``names`` by their group key """
+    groups = {}
+    for name in names:
+        groups.setdefault(group_key(name), []).append(name)
+    return groups
+
+
+def most_common(names):
+    """ The spelling a group is listed under """
+    return Counter(names).most_common(1)[0][0]
+
+
+def write_group(scope, key, name, stations, state=None):
+    """ Cities are keyed ``<state>-<city>``, as city names repeat across states. """
+    base = '%s/%s/%s' % (SNAPSHOT_PREFIX, scope, key)
+    group = {
+        'scope': scope,
+        'name': name,
+        'key': key,
+        'count': len(stations),
+        'geojson': store(base + '.%s.geojson.gz', encode_geojson(
+            [station_feature(station) for station in stations])),
+        'binary': store(base + '.%s.bin.gz', encode_binary(stations)),
+    }
+    if state is not None:
+        group['state'] = state
+    return group
+
+
+def manifest_paths(manifest):
+    if manifest is None:
+        return set()
+    return {group[kind]['path'] for group in manifest['files'] for kind in ('geojson', 'binary')}
+
+
+def prune(keep):
+    """ Delete the snapshot files whose paths are not in ``keep`` """
+    deleted = 0
+    for scope in ('state', 'city'):
+        directory = '%s/%s' % (SNAPSHOT_PREFIX, scope)
+        if not default_storage.exists(directory):
+            continue
+        for filename in default_storage.listdir(directory)[1]:
+            path = '%s/%s' % (directory, filename)
+            if path not in keep:
+                default_storage.delete(path)
+                deleted += 1
+    return deleted
+
+
+def iter_stations(**filters):
+    serializer = FuelStationValuesSerializer({'request': None})
+    queryset = FuelStation.objects.filter(hidden=False, **filters).order_by(
+        'location__state', 'location__city', 'pk')
+    rows = serializer.get_rows(queryset).iterator()
+    for batch in batched(rows, EXPORT_BATCH_SIZE):
+        for station in serializer.to_representation_many(batch):
+            yield station
+
+
+def build_snapshots():
+    """
+    Write the per-state and per-city snapshot files and the manifest.
+    Stations are read one state group at a time, so only one state is
+    held in memory at a time.
+    """
+    files = []
+    states = group_names(
+        FuelStation.objects.filter(hidden=False).values_list('location__state', flat=True).distinct())
+    for state_key in sorted(states):
+        stations = list(iter_stations(location__state__in=states[state_key]))
+        state_name = most_common(station['location']['properties']['state'] for station in stations)
+        cities = {}
+        for station in stations:
+            city = station['location']['properties']['city']
+            cities.setdefault(group_key(state_name, city), []).append(station)
+        for city_key in sorted(cities):
+            city_stations = cities[city_key]
+            city_name = most_common(station['location']['properties']['city'] for station in city_stations)
+            files.append(write_group('city', city_key, city_name, city_stations, state_name))
+        files.append(write_group('state', state_key, state_name, stations))
+
+    previous = get_manifest()
+    manifest = {'generated_at': timezone.now().isoformat(), 'files': files}
+    if default_storage.exists(MANIFEST_PATH):
+        default_storage.delete(MANIFEST_PATH)
+    default_storage.save(MANIFEST_PATH, ContentFile(json.dumps(manifest).encode('utf-8')))
+    cache.set(MANIFEST_CACHE_KEY, manifest, None)
+    # Files of the previous manifest stay for clients that just fetched it.
+    prune(manifest_paths(manifest) | manifest_paths(previous))
+    return manifest
+
+
+def get_manifest():
+    manifest = cache.get(MANIFEST_CACHE_KEY)
+    if manifest is None and default_storage.exists(MANIFEST_PATH):
+        with default_storage.open(MANIFEST_PATH) as manifest_file:
+            manifest = json.loads(manifest_file.read().decode('utf-8'))
+        cache.set(MANIFEST_CACHE_KEY, manifest, None)
+    return manifest
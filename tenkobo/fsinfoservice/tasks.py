@@ -0,0 +1,54 @@
+from tenkobo.taskapp.celery import app
+
+from .duplicates import find_duplicates, merge_confirmed
+from .gazetteer import reverse_geocode
+from .models import Location
+from .positions import reconcile_positions
+from .snapshots import build_snapshots
+
+
+@app.task
+def build_station_snapshots():
+    manifest = build_snapshots()
+    return len(manifest['files'])
+
+
+@app.task
+def geocode_location(location_id):
+    """ Look up the point of a location saved without one from its address """
+    location = Location.objects.filter(pk=location_id, point__isnull=True).first()
+    if location is None:
+        # Removed, or given a point, before the worker picked the task up.
+        return
+    location.set_point(str(location))
+    # update() leaves alone any field edited meanwhile; the database
+    # trigger fills the geohash cells in.
+    Location.objects.filter(pk=location_id, point__isnull=True).update(point=location.point)
+
+
+@app.task
+def reverse_geocode_location(location_id):
+    """ Fill in the address parts the gazetteer did not know for a location """
+    location = Location.objects.filter(pk=location_id, point__isnull=False).first()
+    if location is None:
+        return
+    address = reverse_geocode(location.point.y, location.point.x)
+    for field in ('street', 'city', 'state'):
+        if address.get(field):
+            # Only where still empty: values submitted meanwhile win.
+            Location.objects.filter(pk=location_id, **{field: ''}).update(**{field: address[field]})
+
+
+@app.task
+def reconcile_station_positions(source):
+    return reconcile_positions(source)
+
+
+@app.task
+def find_duplicate_stations():
+    return find_duplicates()
+
+
+@app.task
+def merge_confirmed_duplicates(candidate_ids=None):
+    return merge_confirmed(candidate_ids)
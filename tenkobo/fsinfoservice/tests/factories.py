@@ -0,0 +1,59 @@
+from decimal import Decimal
+
+import factory
+from django.contrib.gis.geos import Point
+from django.utils.text import slugify
+
+
+class LocationFactory(factory.django.DjangoModelFactory):
+    street = factory.Sequence(lambda n: '{0} Admiralty Way'.format(n))
+    city = 'Lekki'
+    state = 'Lagos'
+    # A 100 x 100 grid of points about a kilometre apart around Lekki.
+    point = factory.Sequence(lambda n: Point(3.4 + (n % 100) * 0.01, 6.4 + (n // 100 % 100) * 0.01, srid=4326))
+
+    class Meta:
+        model = 'fsinfoservice.Location'
+
+
+class FuelStationFactory(factory.django.DjangoModelFactory):
+    name = factory.Sequence(lambda n: 'Station {0}'.format(n))
+    slug = factory.LazyAttribute(lambda station: slugify(station.name))
+    location = factory.SubFactory(LocationFactory)
+    position = factory.LazyAttribute(
+        lambda station: '{0},{1}'.format(station.location.point.y, station.location.point.x))
+    is_open = True
+    is_operational = True
+
+    class Meta:
+        model = 'fsinfoservice.FuelStation'
+
+
+def create_stations(coordinates, **kwargs):
+    """
+    Create a station at each ``(lng, lat)`` of ``coordinates``, named
+    "Station 0", "Station 1", ... in that order. ``kwargs`` are passed on
+    to every ``FuelStationFactory`` call.
+    """
+    return [
+        FuelStationFactory(name='Station {0}'.format(i), location__point=Point(lng, lat, srid=4326), **kwargs)
+        for i, (lng, lat) in enumerate(coordinates)]
+
+
+class CategoryFactory(factory.django.DjangoModelFactory):
+    name = factory.Sequence(lambda n: 'Category {0}'.format(n))
+    slug = factory.LazyAttribute(lambda category: slugify(category.name))
+
+    class Meta:
+        model = 'fsinfoservice.Category'
+
+
+class ProductFactory(factory.django.DjangoModelFactory):
+    fuel_station = factory.SubFactory(FuelStationFactory)
+    category = factory.SubFactory(CategoryFactory)
+    name = factory.Sequence(lambda n: 'Product {0}'.format(n))
+    description = 'Sold by the litre'
+    price = Decimal('145.00')
+
+    class Meta:
+        model = 'fsinfoservice.Product'
@@ -0,0 +1,65 @@
+import json
+
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from test_plus.test import TestCase
+
+from fsinfoservice.models import FuelStation
+
+from .factories import CategoryFactory, FuelStationFactory
+
+
+class TestBatchView(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        FuelStationFactory(name='Station')
+        CategoryFactory(name='Diesel')
+
+    def batch(self, requests):
+        return self.client.post(
+            reverse('batch'), json.dumps({'requests': requests}), content_type='application/json')
+
+    def test_combines_responses(self):
+        response = self.batch([
+            {'id': 'stations', 'url': reverse('fuelstation-list')},
+            {'id': 'categories', 'url': reverse('category-list')},
+            {'id': 'missing', 'url': '/api/nothing-here/'},
+        ])
+        self.assertEqual(response.status_code, 200)
+        responses = response.json()['responses']
+        self.assertEqual([(item['id'], item['status']) for item in responses], [
+            ('stations', 200), ('categories', 200), ('missing', 404)])
+        self.assertEqual(responses[0]['body'][0]['name'], 'Station')
+        self.assertEqual(responses[1]['body'][0]['name'], 'Diesel')
+
+    def test_cached_lists(self):
+        # The list responses are cached as rendered bytes; batches still get their data.
+        url = reverse('fuelstation-list')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.batch([{'url': url}, {'url': reverse('location-list')}])
+        self.assertEqual(response.status_code, 200)
+        stations, locations = response.json()['responses']
+        self.assertEqual((stations['status'], stations['body'][0]['name']), (200, 'Station'))
+        self.assertEqual(locations['status'], 200)
+
+    def test_repeated_batch_is_served_from_the_cache(self):
+        url = reverse('fuelstation-list')
+        first = self.batch([{'url': url}]).json()['responses']
+        # update() sends no signal, so cached responses do not see it.
+        FuelStation.objects.update(name='Renamed')
+        self.assertEqual(self.batch([{'url': url}]).json()['responses'], first)
+        # The entry the batch stored serves plain GETs too.
+        self.assertEqual(self.client.get(url).json()[0]['name'], 'Station')
+
+    def test_query_strings_are_passed_on(self):
+        response = self.batch([{'url': reverse('fuelstation-list') + '?geohash=zzzz'}])
+        self.assertEqual(response.json()['responses'][0]['body'], [])
+
+    def test_rejects_other_hosts_and_itself(self):
+        for url in ('https://example.com/api/', '/admin/', reverse('batch')):
+            self.assertEqual(self.batch([{'url': url}]).status_code, 400)
+
+    def test_rejects_streaming_views(self):
+        url = reverse('fuelstation-export', kwargs={'export_format': 'ndjson'})
+        self.assertEqual(self.batch([{'url': url}]).status_code, 400)
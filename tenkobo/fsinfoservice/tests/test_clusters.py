@@ -0,0 +1,42 @@
+from django.core.urlresolvers import reverse
+from test_plus.test import TestCase
+
+from fsinfoservice.clusters import MAX_CLUSTER_CELLS, cell_size, grid_for, snap_bbox
+from fsinfoservice.models import FuelStation
+
+from .factories import create_stations
+
+
+class TestGrid(TestCase):
+
+    def test_cell_size_halves_per_zoom(self):
+        self.assertEqual(cell_size(0), 90.0)
+        self.assertEqual(cell_size(1), 45.0)
+
+    def test_snap_bbox(self):
+        self.assertEqual(snap_bbox((2.5, 4.1, 14.7, 13.9), 1.0), (2.0, 4.0, 15.0, 14.0))
+        self.assertEqual(snap_bbox((-200, -100, 200, 100), 45.0), (-180.0, -90.0, 180.0, 90.0))
+
+    def test_cell_count_is_bounded(self):
+        size, (west, south, east, north) = grid_for((-180, -85, 180, 85), 12)
+        self.assertLessEqual((east - west) / size * (north - south) / size, MAX_CLUSTER_CELLS)
+
+
+class TestLocationClusters(TestCase):
+
+    def setUp(self):
+        stations = create_stations([(3.470, 6.440), (3.471, 6.441), (7.49, 9.06)])
+        FuelStation.objects.filter(pk=stations[2].pk).update(is_open=False)
+
+    def test_clusters(self):
+        response = self.client.get(reverse('location-list'), {'zoom': 6, 'bbox': '2.5,4.1,14.7,13.9'})
+        self.assertEqual(response.status_code, 200)
+        features = sorted(response.json()['features'], key=lambda feature: feature['properties']['count'])
+        self.assertEqual([feature['properties']['count'] for feature in features], [1, 2])
+        self.assertEqual(features[1]['properties']['open'], 2)
+        self.assertEqual(features[0]['properties']['open'], 0)
+        self.assertIsNotNone(features[0]['properties']['location'])
+
+    def test_invalid_zoom(self):
+        response = self.client.get(reverse('location-list'), {'zoom': 18, 'bbox': '2.5,4.1,14.7,13.9'})
+        self.assertEqual(response.status_code, 400)
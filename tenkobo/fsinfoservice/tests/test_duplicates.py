@@ -0,0 +1,86 @@
+import datetime
+from decimal import Decimal
+
+from django.contrib.gis.geos import Point
+from django.core.urlresolvers import reverse
+from test_plus.test import TestCase
+
+from fsinfoservice.duplicates import find_duplicates, merge_confirmed, merge_duplicates, merge_groups
+from fsinfoservice.models import Category, DuplicateCandidate, FuelStation, Location, OpeningHours, Product
+
+from .factories import FuelStationFactory
+
+
+class TestMergeGroups(TestCase):
+
+    def test_chains_collapse_onto_the_oldest_station(self):
+        self.assertEqual(merge_groups([(3, 7), (7, 9), (1, 3), (20, 21)]), {3: 1, 7: 1, 9: 1, 21: 20})
+
+    def test_no_pairs(self):
+        self.assertEqual(merge_groups([]), {})
+
+
+class TestDuplicates(TestCase):
+
+    def setUp(self):
+        stations = [
+            ('Oando Admiralty Way', 3.47000, 6.44000),
+            ('OANDO Admiralty Wy', 3.47010, 6.44010),
+            ('Mobil Lekki', 3.47020, 6.44000),
+            ('Oando Admiralty Way', 3.60000, 6.50000),
+        ]
+        self.stations = [
+            FuelStationFactory(name=name, slug='station-%d' % i, location__point=Point(lng, lat, srid=4326))
+            for i, (name, lng, lat) in enumerate(stations)]
+
+    def test_find_duplicates(self):
+        self.assertEqual(find_duplicates(), 1)
+        candidate = DuplicateCandidate.objects.get()
+        self.assertEqual((candidate.station_id, candidate.duplicate_id), (self.stations[0].pk, self.stations[1].pk))
+        self.assertLess(candidate.distance, 20)
+        # Known pairs are not suggested twice
+        self.assertEqual(find_duplicates(), 0)
+
+    def test_merge_duplicates(self):
+        keep, drop = self.stations[0], self.stations[1]
+        category = Category.objects.create(name='Fuel', slug='fuel')
+        product = Product.objects.create(
+            fuel_station=drop, name='PMS', description='Petrol', category=category, price=Decimal('145.00'))
+        OpeningHours.objects.create(store=drop, weekday=1, from_hour=datetime.time(6), to_hour=datetime.time(22))
+
+        self.assertEqual(merge_duplicates([(keep.pk, drop.pk)]), 1)
+        self.assertFalse(FuelStation.objects.filter(pk=drop.pk).exists())
+        self.assertFalse(Location.objects.filter(pk=drop.location_id).exists())
+        self.assertEqual(Product.objects.get(pk=product.pk).fuel_station_id, keep.pk)
+        self.assertEqual(list(OpeningHours.objects.values_list('store_id', flat=True)), [keep.pk])
+
+    def candidates(self):
+        """ Confirmed candidates for stations 1 and 2, a pending one for 3. """
+        return [
+            DuplicateCandidate.objects.create(
+                station=self.stations[0], duplicate=self.stations[i], distance=10, name_similarity=0.8,
+                status=status)
+            for i, status in ((1, DuplicateCandidate.CONFIRMED), (2, DuplicateCandidate.CONFIRMED),
+                              (3, DuplicateCandidate.PENDING))]
+
+    def remaining(self):
+        return sorted(FuelStation.objects.values_list('pk', flat=True))
+
+    def test_merge_confirmed(self):
+        first, second, pending = self.candidates()
+        self.assertEqual(merge_confirmed([first.pk, pending.pk]), 1)
+        self.assertEqual(self.remaining(), [self.stations[i].pk for i in (0, 2, 3)])
+        self.assertEqual(merge_confirmed(), 1)
+        self.assertEqual(self.remaining(), [self.stations[i].pk for i in (0, 3)])
+
+    def test_merge_action_merges_the_selection(self):
+        first, second, pending = self.candidates()
+        user = self.make_user('admin')
+        user.is_staff = user.is_superuser = True
+        user.save()
+        self.client.force_login(user)
+        # The task runs eagerly in tests.
+        response = self.client.post(reverse('admin:fsinfoservice_duplicatecandidate_changelist'), {
+            'action': 'merge_confirmed', '_selected_action': [first.pk, pending.pk]})
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.remaining(), [self.stations[i].pk for i in (0, 2, 3)])
@@ -0,0 +1,85 @@
+import json
+from unittest import mock
+
+from django.core.urlresolvers import reverse
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from test_plus.test import TestCase
+
+from tenkobo.core.routers import ReplicaRouter, replica_reads_enabled, use_replica
+from fsinfoservice.exports import NDJSON, batched, export_response, stream_feature_collection, stream_ndjson
+from fsinfoservice.fast_serializers import FuelStationValuesSerializer
+from fsinfoservice.models import FuelStation
+
+from .factories import create_stations
+
+
+class TestStreams(TestCase):
+
+    def test_batched(self):
+        self.assertEqual(list(batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+
+    def test_ndjson(self):
+        content = b''.join(stream_ndjson([[{'a': 1}, {'a': 2}], [{'a': 3}]]))
+        self.assertEqual(content, b'{"a":1}\n{"a":2}\n{"a":3}\n')
+
+    def test_feature_collection(self):
+        content = b''.join(stream_feature_collection([[{'id': 1}], [], [{'id': 2}]]))
+        self.assertEqual(json.loads(content.decode('utf-8')), {
+            'type': 'FeatureCollection', 'features': [{'id': 1}, {'id': 2}]})
+
+    def test_empty_feature_collection(self):
+        content = b''.join(stream_feature_collection([]))
+        self.assertEqual(json.loads(content.decode('utf-8'))['features'], [])
+
+
+class TestExportViews(TestCase):
+
+    def setUp(self):
+        create_stations([(3.47 + i / 100.0, 6.44) for i in range(3)])
+
+    def get_content(self, name, export_format):
+        response = self.client.get(reverse(name, kwargs={'export_format': export_format}))
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_stations_ndjson(self):
+        lines = self.get_content('fuelstation-export', 'ndjson').splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn('location', json.loads(lines[0]))
+
+    def test_stations_geojson(self):
+        collection = json.loads(self.get_content('fuelstation-export', 'geojson'))
+        self.assertEqual(len(collection['features']), 3)
+        feature = collection['features'][0]
+        self.assertEqual(feature['geometry']['type'], 'Point')
+        self.assertEqual(feature['properties']['city'], 'Lekki')
+
+    def test_locations_geojson(self):
+        collection = json.loads(self.get_content('location-export', 'geojson'))
+        self.assertEqual(len(collection['features']), 3)
+
+    def export_databases(self, replica):
+        """ Streams a station export and returns where each read was routed. """
+        databases = []
+
+        def db_for_read(router, model, **hints):
+            databases.append('replica' if replica_reads_enabled() else 'default')
+            return 'default'
+
+        serializer = FuelStationValuesSerializer({'request': Request(APIRequestFactory().get('/api/'))})
+        with mock.patch.object(ReplicaRouter, 'db_for_read', db_for_read):
+            if replica:
+                with use_replica():
+                    response = export_response(serializer, FuelStation.objects.all(), NDJSON, 'stations')
+            else:
+                response = export_response(serializer, FuelStation.objects.all(), NDJSON, 'stations')
+            # Consumed after the view has left use_replica(), like the handler does.
+            self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 3)
+        return set(databases)
+
+    def test_replica_reads_outlive_the_view(self):
+        self.assertEqual(self.export_databases(replica=True), {'replica'})
+
+    def test_primary_reads(self):
+        self.assertEqual(self.export_databases(replica=False), {'default'})
@@ -0,0 +1,67 @@
+import json
+from decimal import Decimal
+
+from django.contrib.gis.geos import Point
+from django.core.urlresolvers import reverse
+from rest_framework.test import APIRequestFactory
+from rest_framework.request import Request
+from test_plus.test import TestCase
+
+from fsinfoservice.fast_serializers import (
+    CategoryValuesSerializer, FuelStationValuesSerializer, ProductValuesSerializer)
+from fsinfoservice.models import Category, FuelStation, Product
+from fsinfoservice.serializers import CategorySerializer, FuelStationSerializer, ProductSerializer
+
+from .factories import CategoryFactory, FuelStationFactory, ProductFactory
+
+
+class TestValuesSerializers(TestCase):
+
+    def setUp(self):
+        category = CategoryFactory(name='Diesel', slug='diesel')
+        stations = [
+            FuelStationFactory(
+                location__street='67 Admiralty Way', location__point=Point(3.4746, 6.4474, srid=4326),
+                is_open=False),
+            # Not geocoded yet; the geocoding task never runs inside a test case.
+            FuelStationFactory(
+                location__street='1 Broad Street', location__city='Lagos Island', location__point=None,
+                position='6.4474,3.4746'),
+        ]
+        for i, station in enumerate(stations):
+            ProductFactory(fuel_station=station, category=category, name='AGO %d' % i, price=Decimal('1.50'))
+        request = APIRequestFactory().get('/api/')
+        self.context = {'request': Request(request)}
+
+    def assertSamePayload(self, fast, default):
+        # Compare through JSON as the renderers would see it.
+        self.assertEqual(json.loads(json.dumps(fast)), json.loads(json.dumps(default)))
+
+    def test_fuel_stations(self):
+        queryset = FuelStation.objects.all()
+        self.assertSamePayload(
+            FuelStationValuesSerializer(self.context).serialize(queryset),
+            FuelStationSerializer(queryset, many=True, context=self.context).data)
+
+    def test_categories(self):
+        queryset = Category.objects.all()
+        self.assertSamePayload(
+            CategoryValuesSerializer(self.context).serialize(queryset),
+            CategorySerializer(queryset, many=True, context=self.context).data)
+
+    def test_products(self):
+        queryset = Product.objects.all()
+        self.assertSamePayload(
+            ProductValuesSerializer(self.context).serialize(queryset),
+            ProductSerializer(queryset, many=True, context=self.context).data)
+
+    def test_constant_queries(self):
+        with self.assertNumQueries(2):
+            FuelStationValuesSerializer(self.context).serialize(FuelStation.objects.all())
+        with self.assertNumQueries(1):
+            ProductValuesSerializer(self.context).serialize(Product.objects.all())
+
+    def test_list_view(self):
+        response = self.client.get(reverse('fuelstation-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
@@ -0,0 +1,68 @@
+from unittest import mock
+
+from django.contrib.gis.geos import MultiPolygon, Point, Polygon
+from test_plus.test import TestCase
+
+from fsinfoservice.gazetteer import reverse_geocode
+from fsinfoservice.models import AdminBoundary, Location
+from fsinfoservice.tasks import reverse_geocode_location
+
+
+def square(west, south, east, north):
+    return MultiPolygon(Polygon.from_bbox((west, south, east, north)), srid=4326)
+
+
+@mock.patch('fsinfoservice.gazetteer.lookup_provider', return_value={})
+class TestReverseGeocode(TestCase):
+
+    def setUp(self):
+        lagos = AdminBoundary.objects.create(
+            name='Lagos', level=AdminBoundary.STATE, geometry=square(2.7, 6.3, 4.4, 6.8))
+        AdminBoundary.objects.create(
+            name='Eti-Osa', level=AdminBoundary.CITY, parent=lagos, geometry=square(3.4, 6.4, 3.7, 6.5))
+
+    def test_point_inside_the_gazetteer(self, provider):
+        self.assertEqual(reverse_geocode(6.44, 3.47), {'city': 'Eti-Osa', 'state': 'Lagos', 'street': ''})
+        self.assertFalse(provider.called)
+
+    def test_falls_back_to_the_provider(self, provider):
+        provider.return_value = {'street': '1 Ring Road', 'city': 'Ibadan', 'state': 'Oyo'}
+        self.assertEqual(reverse_geocode(7.38, 3.90), {'city': 'Ibadan', 'state': 'Oyo', 'street': '1 Ring Road'})
+        self.assertEqual(reverse_geocode(6.35, 3.00)['state'], 'Lagos')
+
+    def test_location_with_coordinates_only(self, provider):
+        with mock.patch('fsinfoservice.models.geocoder') as forward:
+            location = Location.objects.create(point=Point(3.47, 6.44, srid=4326))
+        self.assertFalse(forward.google.called)
+        self.assertEqual((location.city, location.state), ('Eti-Osa', 'Lagos'))
+        self.assertEqual(location.geohash_4, 's14k')
+
+    def test_submitted_address_wins(self, provider):
+        location = Location.objects.create(point=Point(3.47, 6.44, srid=4326), city='Lekki')
+        self.assertEqual((location.city, location.state), ('Lekki', 'Lagos'))
+
+
+class TestDeferredReverseGeocoding(TestCase):
+    """ Points outside the gazetteer """
+
+    def test_save_makes_no_http_request(self):
+        with mock.patch('fsinfoservice.gazetteer.geocoder') as provider, \
+                mock.patch('fsinfoservice.models.transaction.on_commit') as on_commit, \
+                mock.patch('fsinfoservice.tasks.reverse_geocode_location.delay') as delay:
+            location = Location.objects.create(point=Point(3.90, 7.38, srid=4326))
+            self.assertFalse(provider.google.called)
+            self.assertEqual((location.city, location.state), ('', ''))
+            # Enqueued once the transaction commits.
+            self.assertFalse(delay.called)
+            on_commit.call_args[0][0]()
+        delay.assert_called_once_with(location.pk)
+
+    @mock.patch('fsinfoservice.gazetteer.lookup_provider',
+                return_value={'street': '1 Ring Road', 'city': 'Ibadan', 'state': 'Oyo'})
+    def test_task_fills_the_address(self, provider):
+        with mock.patch('fsinfoservice.models.transaction.on_commit'):
+            location = Location.objects.create(point=Point(3.90, 7.38, srid=4326), state='Oyo State')
+        self.assertFalse(provider.called)
+        reverse_geocode_location(location.pk)
+        location.refresh_from_db()
+        self.assertEqual((location.street, location.city, location.state), ('1 Ring Road', 'Ibadan', 'Oyo State'))
@@ -0,0 +1,133 @@
+import json
+
+from django.contrib.gis.geos import LineString, Point
+from django.core.urlresolvers import reverse
+from test_plus.test import TestCase
+
+from fsinfoservice.geo import (
+    InvalidRoute, decode_polyline, encode_geohash, geohash_bbox, route_from_geojson, simplify_route,
+    split_route)
+from fsinfoservice.models import FuelStation, Location
+from .factories import LocationFactory, create_stations
+
+
+class TestRouteGeometry(TestCase):
+
+    def test_decode_polyline(self):
+        self.assertEqual(
+            decode_polyline('_p~iF~ps|U_ulLnnqC_mqNvxq`@'),
+            [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)])
+
+    def test_decode_truncated_polyline(self):
+        with self.assertRaises(InvalidRoute):
+            decode_polyline('_p~iF~ps|U_ulL')
+
+    def test_decode_non_string_polyline(self):
+        for encoded in (42, ['_p~iF'], {'polyline': '_p~iF'}):
+            with self.assertRaises(InvalidRoute):
+                decode_polyline(encoded)
+
+    def test_route_from_geojson(self):
+        route = route_from_geojson({'type': 'LineString', 'coordinates': [[3.3, 6.5], [3.4, 6.6]]})
+        self.assertEqual(route.coords, ((3.3, 6.5), (3.4, 6.6)))
+        with self.assertRaises(InvalidRoute):
+            route_from_geojson({'type': 'Point', 'coordinates': [3.3, 6.5]})
+        with self.assertRaises(InvalidRoute):
+            route_from_geojson({'type': 'LineString', 'coordinates': [[3.3, 6.5]]})
+
+    def test_simplify_drops_collinear_points(self):
+        route = LineString([(3.0 + i / 100.0, 6.0) for i in range(101)], srid=4326)
+        simplified = simplify_route(route, 100)
+        self.assertEqual(simplified.coords, ((3.0, 6.0), (4.0, 6.0)))
+        self.assertEqual(simplified.srid, 4326)
+
+    def test_split_route_keeps_every_point(self):
+        route = LineString([(3.0 + i / 10.0, 6.0) for i in range(11)], srid=4326)
+        segments = split_route(route, 25000)
+        self.assertEqual(len(segments), 4)
+        self.assertEqual(segments[0].coords[0], route.coords[0])
+        self.assertEqual(segments[-1].coords[-1], route.coords[-1])
+        for previous, segment in zip(segments, segments[1:]):
+            self.assertEqual(previous.coords[-1], segment.coords[0])
+
+
+class TestGeohash(TestCase):
+
+    def test_encode(self):
+        self.assertEqual(encode_geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(encode_geohash(6.44, 3.47, 5), 's14kw')
+
+    def test_bbox_contains_point(self):
+        west, south, east, north = geohash_bbox(encode_geohash(6.44, 3.47, 7))
+        self.assertTrue(west <= 3.47 <= east and south <= 6.44 <= north)
+
+    def test_bbox_rejects_invalid_hash(self):
+        with self.assertRaises(ValueError):
+            geohash_bbox('abc')
+
+    def test_location_cells(self):
+        # Computed by the database trigger and read back by save().
+        location = LocationFactory(point=Point(3.47, 6.44, srid=4326))
+        self.assertEqual(location.geohash_7, encode_geohash(6.44, 3.47, 7))
+        self.assertEqual(location.geohash_4, location.geohash_7[:4])
+        location.point = Point(7.49, 9.06, srid=4326)
+        location.save(update_fields=['point'])
+        self.assertEqual(location.geohash_7, encode_geohash(9.06, 7.49, 7))
+
+
+class TestStationCells(TestCase):
+
+    def setUp(self):
+        stations = create_stations([(3.470, 6.440), (3.471, 6.441), (7.49, 9.06)], is_open=False)
+        FuelStation.objects.filter(pk=stations[0].pk).update(is_open=True)
+
+    def test_cells_are_filled_by_the_database(self):
+        # bulk_create skips Location.save(), only the trigger sees it.
+        Location.objects.bulk_create([LocationFactory.build(point=Point(3.47, 6.44, srid=4326))])
+        location = Location.objects.order_by('pk').last()
+        self.assertEqual(location.geohash_7, encode_geohash(6.44, 3.47, 7))
+
+    def test_cell_counts(self):
+        response = self.client.get(reverse('fuelstation-cells'), {'precision': 4})
+        self.assertEqual(response.status_code, 200)
+        cells = response.json()['cells']
+        self.assertEqual([(cell['cell'], cell['stations'], cell['open']) for cell in cells], [
+            (encode_geohash(6.44, 3.47, 4), 2, 1), (encode_geohash(9.06, 7.49, 4), 1, 0)])
+
+    def test_filter_by_cell(self):
+        cell = encode_geohash(9.06, 7.49, 3)
+        response = self.client.get(reverse('fuelstation-list'), {'geohash': cell})
+        self.assertEqual([station['name'] for station in response.json()], ['Station 2'])
+
+    def test_invalid_precision(self):
+        response = self.client.get(reverse('fuelstation-cells'), {'precision': 9})
+        self.assertEqual(response.status_code, 400)
+
+
+class TestStationsAlongRoute(TestCase):
+
+    def setUp(self):
+        # Along the Lagos-Ibadan expressway, plus one station far away
+        create_stations([(3.90, 7.38), (3.40, 6.60), (3.60, 6.90), (7.49, 9.06)])
+
+    def test_stations_in_route_order(self):
+        response = self.client.post(
+            reverse('fuelstation-route'),
+            json.dumps({
+                'route': {'type': 'LineString', 'coordinates': [[3.40, 6.60], [3.60, 6.90], [3.90, 7.38]]},
+                'width': 2000}),
+            content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        names = [station['name'] for station in response.json()['results']]
+        self.assertEqual(names, ['Station 1', 'Station 2', 'Station 0'])
+
+    def test_requires_a_route(self):
+        response = self.client.get(reverse('fuelstation-route'), {'width': 1000})
+        self.assertEqual(response.status_code, 400)
+
+    def test_non_string_polyline(self):
+        for polyline in (42, ['_p~iF~ps|U'], {'points': '_p~iF~ps|U'}):
+            response = self.client.post(
+                reverse('fuelstation-route'), json.dumps({'polyline': polyline}), content_type='application/json')
+            self.assertEqual(response.status_code, 400, polyline)
+            self.assertIn('route', response.json())
@@ -0,0 +1,66 @@
+from django.contrib.gis.geos import Point
+from test_plus.test import TestCase
+
+from fsinfoservice.models import FuelStation, Location
+from fsinfoservice.positions import InvalidPosition, parse_changes, reconcile_positions, update_positions
+
+from .factories import create_stations
+
+
+class TestParseChanges(TestCase):
+
+    def test_last_change_wins(self):
+        self.assertEqual(
+            parse_changes([{'id': 1, 'lat': 6, 'lng': 3}, {'id': '1', 'lat': '6.5', 'lng': '3.5'}]),
+            [(1, 6.5, 3.5)])
+
+    def test_rejects_invalid_changes(self):
+        for data in ({'id': 1}, [{'id': 1, 'lat': 6}], [{'id': 1, 'lat': 'x', 'lng': 3}],
+                     [{'id': 1, 'lat': 91, 'lng': 3}]):
+            with self.assertRaises(InvalidPosition):
+                parse_changes(data)
+
+
+class TestPositions(TestCase):
+
+    def setUp(self):
+        self.stations = create_stations([(3.47, 6.44)] * 2)
+
+    def test_update_positions(self):
+        station = self.stations[0]
+        self.assertEqual(update_positions([(station.pk, 6.5, 3.25)]), 1)
+        station = FuelStation.objects.select_related('location').get(pk=station.pk)
+        self.assertEqual(str(station.position), '6.5,3.25')
+        self.assertAlmostEqual(station.location.point.y, 6.5)
+        self.assertAlmostEqual(station.location.point.x, 3.25)
+        other = FuelStation.objects.select_related('location').get(pk=self.stations[1].pk)
+        self.assertAlmostEqual(other.location.point.y, 6.44)
+
+    def test_reconcile_from_point(self):
+        Location.objects.filter(pk=self.stations[0].location_id).update(point=Point(3.5, 6.25, srid=4326))
+        self.assertEqual(reconcile_positions('point'), 1)
+        self.assertEqual(reconcile_positions('point'), 0)
+        station = FuelStation.objects.get(pk=self.stations[0].pk)
+        self.assertEqual(str(station.position), '6.25,3.5')
+
+    def test_reconcile_from_point_keeps_matching_positions(self):
+        FuelStation.objects.filter(pk=self.stations[1].pk).update(position='6.4400,3.470000')
+        updated_at = {station.pk: station.updated_at for station in FuelStation.objects.all()}
+        self.assertEqual(reconcile_positions('point'), 0)
+        self.assertEqual({station.pk: station.updated_at for station in FuelStation.objects.all()}, updated_at)
+
+    def test_reconcile_from_point_repairs_malformed_positions(self):
+        FuelStation.objects.filter(pk=self.stations[0].pk).update(position='unknown')
+        self.assertEqual(reconcile_positions('point'), 1)
+        self.assertEqual(str(FuelStation.objects.get(pk=self.stations[0].pk).position), '6.44,3.47')
+
+    def test_reconcile_from_position(self):
+        FuelStation.objects.filter(pk=self.stations[0].pk).update(position='6.25,3.5')
+        self.assertEqual(reconcile_positions('position'), 1)
+        location = Location.objects.get(pk=self.stations[0].location_id)
+        self.assertAlmostEqual(location.point.y, 6.25)
+        self.assertAlmostEqual(location.point.x, 3.5)
+
+    def test_unknown_source(self):
+        with self.assertRaises(ValueError):
+            reconcile_positions('geocoder')
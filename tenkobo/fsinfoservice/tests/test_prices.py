@@ -0,0 +1,48 @@
+import json
+from decimal import Decimal
+
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+from test_plus.test import TestCase
+
+from tenkobo.core.currency import rate_table
+from fsinfoservice.models import Product
+from .factories import CategoryFactory, FuelStationFactory, ProductFactory
+
+
+@override_settings(OPENEXCHANGERATES_BASE_CURRENCY='USD', DEFAULT_CURRENCY='USD',
+                   AVAILABLE_CURRENCIES=['USD', 'NGN'])
+class TestProductPriceWrites(TestCase):
+    fixtures = ['conversion_rates']
+
+    def setUp(self):
+        rate_table.invalidate()
+        self.station = FuelStationFactory(name='Lekki')
+        self.category = CategoryFactory(name='Diesel')
+
+    def payload(self, price):
+        return json.dumps({
+            'name': 'AGO', 'description': 'Sold by the litre', 'category': 'Diesel',
+            'fuel_station': 'Lekki', 'price': price})
+
+    def test_create_in_requested_currency(self):
+        response = self.client.post(
+            reverse('product-list') + '?currency=NGN', self.payload('3600.00'),
+            content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['price'], '3600.00')
+        self.assertEqual(Product.objects.get().price.gross, Decimal('10.00'))
+
+    def test_update_in_requested_currency(self):
+        product = ProductFactory(fuel_station=self.station, category=self.category, price=Decimal('1.00'))
+        response = self.client.put(
+            reverse('product-detail', kwargs={'pk': product.pk}) + '?currency=NGN', self.payload('900'),
+            content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        product.refresh_from_db()
+        self.assertEqual(product.price.gross, Decimal('2.50'))
+
+    def test_default_currency_is_saved_as_sent(self):
+        response = self.client.post(reverse('product-list'), self.payload('3.25'), content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Product.objects.get().price.gross, Decimal('3.25'))
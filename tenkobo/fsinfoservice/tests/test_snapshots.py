@@ -0,0 +1,121 @@
+import gzip
+import json
+import shutil
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from test_plus.test import TestCase
+
+from fsinfoservice.models import FuelStation
+from fsinfoservice.snapshots import (
+    FLAG_FEATURED, FLAG_OPEN, SNAPSHOT_PREFIX, build_snapshots, compress, decode_binary, encode_binary,
+    encode_geojson)
+from .factories import FuelStationFactory, LocationFactory
+
+
+def station(pk, name, coordinates, **flags):
+    geometry = None
+    if coordinates is not None:
+        geometry = {'type': 'Point', 'coordinates': coordinates}
+    data = {
+        'pk': pk,
+        'name': name,
+        'location': {'geometry': geometry, 'properties': {}},
+        'is_open': False,
+        'is_operational': False,
+        'is_featured': False,
+    }
+    data.update(flags)
+    return data
+
+
+class TestSnapshotEncoding(TestCase):
+
+    def test_binary_round_trip(self):
+        content = encode_binary([
+            station(1, 'Oando Lekki', [3.5, 6.25], is_open=True, is_featured=True),
+            station(2, u'Tótal Ikeja', None),
+        ])
+        self.assertEqual(decode_binary(content), [
+            {'pk': 1, 'lat': 6.25, 'lng': 3.5, 'flags': FLAG_OPEN | FLAG_FEATURED,
+             'name': 'Oando Lekki'},
+            {'pk': 2, 'lat': 0.0, 'lng': 0.0, 'flags': 0, 'name': u'Tótal Ikeja'},
+        ])
+
+    def test_decode_rejects_other_content(self):
+        with self.assertRaises(ValueError):
+            decode_binary(b'\x00' * 8)
+
+    def test_compress_is_deterministic(self):
+        content = encode_geojson([{'id': 1}])
+        self.assertEqual(compress(content), compress(content))
+        self.assertEqual(
+            json.loads(gzip.decompress(compress(content)).decode('utf-8')),
+            {'type': 'FeatureCollection', 'features': [{'id': 1}]})
+
+
+class TestBuildSnapshots(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(
+            MEDIA_ROOT=media_root, DEFAULT_FILE_STORAGE='django.core.files.storage.FileSystemStorage')
+        settings.enable()
+        self.addCleanup(settings.disable)
+        cache.clear()
+        for state, city in (('Lagos', 'Ikeja'), ('Lagos', 'Ikeja'), ('Lagos', 'Lekki'), ('Ogun', 'Ikeja')):
+            FuelStationFactory(location=LocationFactory(state=state, city=city))
+
+    def read(self, group, kind):
+        with default_storage.open(group[kind]['path']) as f:
+            return gzip.decompress(f.read())
+
+    def stored_files(self):
+        return {
+            '%s/%s/%s' % (SNAPSHOT_PREFIX, scope, filename)
+            for scope in ('state', 'city')
+            for filename in default_storage.listdir('%s/%s' % (SNAPSHOT_PREFIX, scope))[1]}
+
+    def test_groups(self):
+        groups = {(group['scope'], group['key']): group for group in build_snapshots()['files']}
+        self.assertEqual({key: group['count'] for key, group in groups.items()}, {
+            ('state', 'lagos'): 3, ('state', 'ogun'): 1,
+            ('city', 'lagos-ikeja'): 2, ('city', 'lagos-lekki'): 1, ('city', 'ogun-ikeja'): 1,
+        })
+        ogun_ikeja = groups['city', 'ogun-ikeja']
+        self.assertEqual((ogun_ikeja['name'], ogun_ikeja['state']), ('Ikeja', 'Ogun'))
+        station = FuelStation.objects.get(location__state='Ogun')
+        self.assertEqual([row['pk'] for row in decode_binary(self.read(ogun_ikeja, 'binary'))], [station.pk])
+        features = json.loads(self.read(ogun_ikeja, 'geojson').decode('utf-8'))['features']
+        self.assertEqual([feature['id'] for feature in features], [station.pk])
+
+    def test_names_are_grouped_by_their_key(self):
+        FuelStationFactory(location=LocationFactory(state='LAGOS', city='IKEJA'))
+        manifest = build_snapshots()
+        groups = {(group['scope'], group['key']): group for group in manifest['files']}
+        self.assertEqual(len(groups), len(manifest['files']))
+        self.assertEqual(groups['state', 'lagos']['count'], 4)
+        lagos_ikeja = groups['city', 'lagos-ikeja']
+        self.assertEqual((lagos_ikeja['count'], lagos_ikeja['name'], lagos_ikeja['state']), (3, 'Ikeja', 'Lagos'))
+        pks = FuelStation.objects.filter(location__city__iexact='ikeja', location__state__iexact='lagos')
+        self.assertEqual(
+            sorted(row['pk'] for row in decode_binary(self.read(lagos_ikeja, 'binary'))),
+            sorted(pks.values_list('pk', flat=True)))
+
+    def test_prunes_files_of_older_manifests(self):
+        first = build_snapshots()
+        FuelStation.objects.filter(location__state='Ogun').update(name='Renamed')
+        second = build_snapshots()
+        FuelStation.objects.filter(location__state='Ogun').update(name='Renamed again')
+        third = build_snapshots()
+
+        def paths(manifest):
+            return {group[kind]['path'] for group in manifest['files'] for kind in ('geojson', 'binary')}
+
+        # Unchanged groups keep their files; changed ones outlive one rebuild.
+        self.assertEqual(self.stored_files(), paths(second) | paths(third))
+        self.assertTrue(paths(first) - paths(second))
+        self.assertFalse((paths(first) - paths(second)) & self.stored_files())
@@ -0,0 +1,36 @@
+from unittest import mock
+
+from test_plus.test import TestCase
+
+from fsinfoservice.models import Location
+from fsinfoservice.tasks import geocode_location
+
+
+class TestGeocodeLocation(TestCase):
+
+    def test_save_defers_geocoding(self):
+        with mock.patch('fsinfoservice.models.transaction.on_commit') as on_commit, \
+                mock.patch('fsinfoservice.models.geocoder') as forward, \
+                mock.patch('fsinfoservice.tasks.geocode_location.delay') as delay:
+            location = Location.objects.create(street='67 Admiralty Way', city='Lekki', state='Lagos')
+            self.assertFalse(forward.google.called)
+            self.assertIsNone(location.point)
+            # Enqueued once the transaction commits.
+            self.assertFalse(delay.called)
+            on_commit.call_args[0][0]()
+        delay.assert_called_once_with(location.pk)
+
+    @mock.patch('fsinfoservice.models.geocoder')
+    def test_task_sets_the_point(self, forward):
+        forward.google.return_value.geometry = {'type': 'Point', 'coordinates': [3.4746, 6.4474]}
+        with mock.patch('fsinfoservice.models.transaction.on_commit'):
+            location = Location.objects.create(street='67 Admiralty Way', city='Lekki', state='Lagos')
+        geocode_location(location.pk)
+        forward.google.assert_called_once_with('67 Admiralty Way, Lekki, Lagos')
+        location.refresh_from_db()
+        self.assertEqual((round(location.point.x, 4), round(location.point.y, 4)), (3.4746, 6.4474))
+        self.assertEqual(location.geohash_4, 's14k')
+
+        # Locations that already have a point are left alone.
+        geocode_location(location.pk)
+        self.assertEqual(forward.google.call_count, 1)
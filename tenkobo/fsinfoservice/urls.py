@@ -8,6 +8,10 @@ urlpatterns = [
     url(r'^$', views.ApiRoot.as_view(), name=views.ApiRoot.name),
     url(r'^fuel-stations/$', views.FuelStationList.as_view(),
     	name=views.FuelStationList.name),
+    url(r'^fuel-stations/cells/$', views.FuelStationCells.as_view(),
+        name=views.FuelStationCells.name),
+    url(r'^fuel-stations/along-route/$', views.FuelStationsAlongRoute.as_view(),
+        name=views.FuelStationsAlongRoute.name),
     url(r'^fuel-stations/(?P<pk>[0-9]+)/$', views.FuelStationDetail.as_view(),
     	name=views.FuelStationDetail.name),
     url(r'^product-categories/$', views.CategoryList.as_view(),
@@ -22,4 +26,13 @@ urlpatterns = [
         name=views.LocationList.name),
     url(r'^fuel-station-locations/(?P<pk>[0-9]+)/$', views.LocationDetail.as_view(),
         name=views.LocationDetail.name),  
+    url(r'^exports/fuel-stations\.(?P<export_format>ndjson|geojson)$',
+        views.FuelStationExport.as_view(), name=views.FuelStationExport.name),
+    url(r'^exports/fuel-station-locations\.(?P<export_format>ndjson|geojson)$',
+        views.LocationExport.as_view(), name=views.LocationExport.name),
+    url(r'^exports/products\.(?P<export_format>ndjson)$',
+        views.ProductExport.as_view(), name=views.ProductExport.name),
+    url(r'^batch/$', views.BatchView.as_view(), name=views.BatchView.name),
+    url(r'^snapshots/manifest/$', views.SnapshotManifest.as_view(),
+        name=views.SnapshotManifest.name),
 ]
\ No newline at end of file
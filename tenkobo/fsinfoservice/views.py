@@ -1,11 +1,30 @@
+import json
+
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Sum, When
+from django.http import Http404
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
 from rest_framework.response import Response 
 from rest_framework.reverse import reverse
 from rest_framework_gis.filters import DistanceToPointFilter
 
+from tenkobo.core.compression import CompressedCacheMixin
+from tenkobo.core.currency import CurrencyMixin
+from tenkobo.core.replicas import ReplicaReadMixin
 from .models import FuelStation, Category, Product, Location
 from .serializers import FuelStationSerializer, CategorySerializer, ProductSerializer
 from .serializers import LocationSerializer
+from .fast_serializers import ValuesListMixin, FuelStationValuesSerializer, RouteStationValuesSerializer
+from .fast_serializers import CategoryValuesSerializer, ProductValuesSerializer, LocationValuesSerializer
+from .exports import GEOJSON, IgnoreClientContentNegotiation, export_response, station_feature
+from .snapshots import get_manifest
+from .geo import InvalidRoute, geohash_bbox, route_from_geojson, route_from_polyline, simplify_route
+from .filters import GeohashFilter, clean_geohash
+from .clusters import MAX_CLUSTER_ZOOM, cluster_locations
+from .batch import BatchError, run_batch
+from .models import GEOHASH_PRECISIONS
 
 class ApiRoot(generics.GenericAPIView):
 	name = 'api-root'
@@ -15,58 +34,296 @@ class ApiRoot(generics.GenericAPIView):
 			'fuel-stations': reverse(FuelStationList.name, request=request),
 			'categories': reverse(CategoryList.name, request=request),
 			'products': reverse(ProductList.name, request=request),
-			'locations': reverse(LocationList.name, request=request)
+			'locations': reverse(LocationList.name, request=request),
+			'catalog-products': reverse('catalog-product-list', request=request),
+			'catalog-categories': reverse('catalog-category-list', request=request),
+			'snapshots': reverse(SnapshotManifest.name, request=request),
+			'batch': reverse(BatchView.name, request=request),
 			})
 
-class FuelStationList(generics.ListCreateAPIView):
+class FuelStationList(ReplicaReadMixin, CompressedCacheMixin, CurrencyMixin, ValuesListMixin,
+		generics.ListCreateAPIView):
 	queryset = FuelStation.objects.all()
+	cache_models = (FuelStation, Location, Product)
 	serializer_class = FuelStationSerializer
+	values_serializer_class = FuelStationValuesSerializer
 	distance_filter_field = 'geometry'
-	filter_backends = (DistanceToPointFilter, )
+	filter_backends = (DistanceToPointFilter, GeohashFilter)
+	geohash_field_prefix = 'location__'
 	bbox_filter_include_overlapping = True # Optional
 	name = 'fuelstation-list'
 
 
-class FuelStationDetail(generics.RetrieveUpdateDestroyAPIView):
+class FuelStationsAlongRoute(ReplicaReadMixin, CurrencyMixin, generics.GenericAPIView):
+	"""
+	Open stations within ``width`` metres (default 1000) of a route,
+	ordered by distance along it. The route is either an encoded
+	polyline (``polyline``) or a GeoJSON LineString (``route``), passed
+	in the query string or, for long routes, in a POST body. Routes are
+	simplified to within a quarter of the width before searching.
+	"""
+	name = 'fuelstation-route'
+	read_methods = SAFE_METHODS + ('POST',)
+	default_width = 1000
+	max_width = 20000
+	default_limit = 100
+	max_limit = 500
+	max_simplify_tolerance = 250
+
+	def get(self, request, *args, **kwargs):
+		return self.search(request.query_params)
+
+	def post(self, request, *args, **kwargs):
+		return self.search(request.data)
+
+	def get_number(self, data, key, default, minimum, maximum, cast=float):
+		try:
+			value = cast(data.get(key, default))
+		except (TypeError, ValueError):
+			raise ValidationError({key: 'A number is required.'})
+		if not minimum <= value <= maximum:
+			raise ValidationError({key: 'Must be between %s and %s.' % (minimum, maximum)})
+		return value
+
+	def get_route(self, data):
+		try:
+			if data.get('polyline'):
+				return route_from_polyline(data['polyline'])
+			route = data.get('route')
+			if isinstance(route, str):
+				route = json.loads(route)
+			if route:
+				return route_from_geojson(route)
+		except (InvalidRoute, ValueError) as e:
+			raise ValidationError({'route': str(e)})
+		raise ValidationError({'route': 'Pass an encoded polyline or a GeoJSON LineString route.'})
+
+	def search(self, data):
+		if not isinstance(data, dict):
+			raise ValidationError('Expected an object.')
+		width = self.get_number(data, 'width', self.default_width, 1, self.max_width)
+		limit = self.get_number(data, 'limit', self.default_limit, 1, self.max_limit, cast=int)
+		route = self.get_route(data)
+		simplified = simplify_route(route, min(width / 4, self.max_simplify_tolerance))
+		queryset = FuelStation.objects.along_route(simplified, width).filter(is_open=True, hidden=False)
+		serializer = RouteStationValuesSerializer(self.get_serializer_context())
+		results = serializer.to_representation_many(serializer.get_rows(queryset)[:limit])
+		return Response({
+			'count': len(results),
+			'width': width,
+			'route_points': len(route),
+			'simplified_route_points': len(simplified),
+			'results': results,
+		})
+
+
+class FuelStationCells(ReplicaReadMixin, generics.GenericAPIView):
+	"""
+	Number of visible stations, and of open ones, per geohash cell of
+	``precision`` characters (4 to 7, default 5), optionally within the
+	cell given by ``geohash``. Results are cached per cell for a few minutes.
+	"""
+	queryset = FuelStation.objects.filter(hidden=False)
+	filter_backends = (GeohashFilter,)
+	geohash_field_prefix = 'location__'
+	default_precision = 5
+	cache_seconds = 5 * 60
+	name = 'fuelstation-cells'
+
+	def get_precision(self):
+		try:
+			precision = int(self.request.query_params.get('precision', self.default_precision))
+		except ValueError:
+			precision = None
+		if precision not in GEOHASH_PRECISIONS:
+			raise ValidationError({'precision': 'Must be one of %s.' % ', '.join(map(str, GEOHASH_PRECISIONS))})
+		return precision
+
+	def get_cells(self, precision):
+		column = 'location__geohash_%d' % precision
+		rows = self.filter_queryset(self.get_queryset()).order_by().values(column).annotate(
+			stations=Count('pk'),
+			open=Sum(Case(When(is_open=True, then=1), default=0, output_field=IntegerField())),
+		).order_by(column)
+		return [
+			{'cell': row[column], 'bbox': geohash_bbox(row[column]),
+			 'stations': row['stations'], 'open': row['open']}
+			for row in rows if row[column]]
+
+	def get(self, request, *args, **kwargs):
+		precision = self.get_precision()
+		geohash = request.query_params.get('geohash')
+		if geohash:
+			geohash = clean_geohash(geohash)
+			if len(geohash) > precision:
+				raise ValidationError({'geohash': 'Cannot be longer than precision.'})
+		key = 'fsinfoservice:cells:%d:%s' % (precision, geohash or '')
+		cells = cache.get(key)
+		if cells is None:
+			cells = self.get_cells(precision)
+			cache.set(key, cells, self.cache_seconds)
+		return Response({'precision': precision, 'geohash': geohash or None, 'cells': cells})
+
+
+class FuelStationDetail(ReplicaReadMixin, CurrencyMixin, generics.RetrieveUpdateDestroyAPIView):
 	queryset = FuelStation.objects.all()
 	serializer_class = FuelStationSerializer
 	name = 'fuelstation-detail'
 
 
-class CategoryList(generics.ListCreateAPIView):
+class CategoryList(ReplicaReadMixin, CompressedCacheMixin, CurrencyMixin, ValuesListMixin,
+		generics.ListCreateAPIView):
 	queryset = Category.objects.all()
+	cache_models = (Category, Product)
 	serializer_class = CategorySerializer
+	values_serializer_class = CategoryValuesSerializer
 	name = 'category-list'
 
 
-class CategoryDetail(generics.RetrieveUpdateDestroyAPIView):
+class CategoryDetail(ReplicaReadMixin, CurrencyMixin, generics.RetrieveUpdateDestroyAPIView):
 	queryset = Category.objects.all()
 	serializer_class = CategorySerializer
 	name = 'category-detail'
 
 
-class ProductList(generics.ListCreateAPIView):
+class ProductList(ReplicaReadMixin, CompressedCacheMixin, CurrencyMixin, ValuesListMixin,
+		generics.ListCreateAPIView):
 	queryset = Product.objects.all()
+	cache_models = (Product, Category, FuelStation)
 	serializer_class = ProductSerializer
+	values_serializer_class = ProductValuesSerializer
 	name = 'product-list'
 
 
-class ProductDetail(generics.RetrieveUpdateDestroyAPIView):
+class ProductDetail(ReplicaReadMixin, CurrencyMixin, generics.RetrieveUpdateDestroyAPIView):
 	queryset = Product.objects.all()
 	serializer_class = ProductSerializer
 	name = 'product-detail'
 
 
 
-class LocationList(generics.ListCreateAPIView):
+class LocationList(ReplicaReadMixin, CompressedCacheMixin, generics.ListCreateAPIView):
+	"""
+	With ``zoom`` (0 to 14) and ``bbox=west,south,east,north`` the list is
+	replaced by grid clusters of the locations in the box, each with the
+	number of locations and of open stations it holds.
+	"""
 	queryset = Location.objects.all()
+	# Clusters count the open stations of their locations.
+	cache_models = (Location, FuelStation)
 	serializer_class = LocationSerializer
+	filter_backends = (GeohashFilter,)
 	name = 'location-list'
 
+	def get_cluster_params(self):
+		params = self.request.query_params
+		try:
+			zoom = int(params['zoom'])
+		except ValueError:
+			raise ValidationError({'zoom': 'A whole number is required.'})
+		if not 0 <= zoom <= MAX_CLUSTER_ZOOM:
+			raise ValidationError({'zoom': 'Clusters are available up to zoom %d.' % MAX_CLUSTER_ZOOM})
+		try:
+			west, south, east, north = [float(part) for part in params.get('bbox', '').split(',')]
+		except ValueError:
+			raise ValidationError({'bbox': 'Expected west,south,east,north.'})
+		if west >= east or south >= north:
+			raise ValidationError({'bbox': 'Expected west,south,east,north.'})
+		return (west, south, east, north), zoom
 
+	def list(self, request, *args, **kwargs):
+		if 'zoom' in request.query_params:
+			bbox, zoom = self.get_cluster_params()
+			return Response(cluster_locations(bbox, zoom))
+		return super(LocationList, self).list(request, *args, **kwargs)
 
-class LocationDetail(generics.RetrieveUpdateDestroyAPIView):
+
+
+class LocationDetail(ReplicaReadMixin, generics.RetrieveUpdateDestroyAPIView):
 	queryset = Location.objects.all()
 	serializer_class = LocationSerializer
 	name = 'location-detail'
 
+
+class ExportView(ReplicaReadMixin, generics.GenericAPIView):
+	"""
+	Streams the whole dataset as NDJSON or GeoJSON. Rows are read with a
+	server-side cursor, which only lives outside of a transaction; the
+	ReplicaReadMixin takes care of that for reads.
+	"""
+	content_negotiation_class = IgnoreClientContentNegotiation
+	values_serializer_class = None
+	filename = None
+
+	def transform(self, export_format):
+		return None
+
+	def get(self, request, export_format, *args, **kwargs):
+		queryset = self.filter_queryset(self.get_queryset())
+		serializer = self.values_serializer_class(self.get_serializer_context())
+		return export_response(
+			serializer, queryset, export_format, self.filename,
+			self.transform(export_format))
+
+
+class FuelStationExport(CurrencyMixin, ExportView):
+	queryset = FuelStation.objects.all()
+	filter_backends = (GeohashFilter,)
+	geohash_field_prefix = 'location__'
+	values_serializer_class = FuelStationValuesSerializer
+	filename = 'fuel-stations'
+	name = 'fuelstation-export'
+
+	def transform(self, export_format):
+		return station_feature if export_format == GEOJSON else None
+
+
+class LocationExport(ExportView):
+	queryset = Location.objects.all()
+	filter_backends = (GeohashFilter,)
+	values_serializer_class = LocationValuesSerializer
+	filename = 'fuel-station-locations'
+	name = 'location-export'
+
+
+class ProductExport(CurrencyMixin, ExportView):
+	queryset = Product.objects.all()
+	values_serializer_class = ProductValuesSerializer
+	filename = 'products'
+	name = 'product-export'
+
+
+class SnapshotManifest(generics.GenericAPIView):
+	"""
+	Lists the pre-built per-state and per-city station snapshot files.
+	Clients download those static files instead of querying the API.
+	"""
+	name = 'snapshot-manifest'
+
+	def get(self, request, *args, **kwargs):
+		manifest = get_manifest()
+		if manifest is None:
+			raise Http404('No snapshots have been built yet.')
+		return Response(manifest)
+
+
+class BatchView(generics.GenericAPIView):
+	"""
+	Runs several GET requests of this API at once, e.g.
+
+	    {"requests": [{"id": "stations", "url": "/api/fuel-stations/?geohash=s14k"},
+	                  {"id": "categories", "url": "/api/product-categories/"}]}
+
+	and answers ``{"responses": [{"id", "status", "body"}, ...]}`` in the
+	same order. At most 20 requests are accepted.
+	"""
+	name = 'batch'
+
+	def post(self, request, *args, **kwargs):
+		items = request.data.get('requests') if isinstance(request.data, dict) else None
+		try:
+			responses = run_batch(request._request, items, forbidden_paths=(request.path,))
+		except BatchError as e:
+			raise ValidationError({'requests': str(e)})
+		return Response({'responses': responses})
+
@@ -1,3 +1,74 @@
 from django.contrib import admin
+from mptt.admin import MPTTModelAdmin
 
-# Register your models here.
+from tenkobo.core.admin import LargeTableAdmin
+from .models import (
+    Category, Product, ProductAttribute, ProductImage, ProductType, ProductVariant, Stock,
+    StockLocation)
+
+
+class ProductImageInline(admin.TabularInline):
+    model = ProductImage
+    fields = ('image', 'alt', 'order')
+    # Set on save and by ImageManager.reorder, never typed in.
+    readonly_fields = ('order',)
+    extra = 0
+
+
+class ProductVariantInline(admin.TabularInline):
+    model = ProductVariant
+    fields = ('code', 'name', 'price_override')
+    extra = 0
+
+
+@admin.register(Category)
+class CategoryAdmin(MPTTModelAdmin):
+    list_display = ('name', 'slug', 'hidden')
+    search_fields = ('^name',)
+    prepopulated_fields = {'slug': ('name',)}
+    raw_id_fields = ('parent',)
+
+
+@admin.register(ProductType)
+class ProductTypeAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('^name',)
+
+
+@admin.register(ProductAttribute)
+class ProductAttributeAdmin(admin.ModelAdmin):
+    list_display = ('name', 'slug')
+    search_fields = ('^name',)
+
+
+@admin.register(Product)
+class ProductAdmin(LargeTableAdmin):
+    list_display = ('name', 'product_type', 'price', 'is_published', 'is_featured', 'updated_at')
+    list_filter = ('is_published', 'is_featured')
+    list_select_related = ('product_type',)
+    raw_id_fields = ('product_type', 'categories')
+    search_fields = ('^name',)
+    inlines = (ProductVariantInline, ProductImageInline)
+
+
+@admin.register(ProductVariant)
+class ProductVariantAdmin(LargeTableAdmin):
+    list_display = ('code', 'name', 'product', 'price_override')
+    list_select_related = ('product',)
+    raw_id_fields = ('product',)
+    search_fields = ('=code', '^name')
+
+
+@admin.register(StockLocation)
+class StockLocationAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('^name',)
+
+
+@admin.register(Stock)
+class StockAdmin(LargeTableAdmin):
+    list_display = ('variant', 'location', 'quantity', 'quantity_allocated', 'cost_price')
+    list_filter = ('location',)
+    list_select_related = ('variant', 'location')
+    raw_id_fields = ('variant', 'location')
+    search_fields = ('=variant__code',)
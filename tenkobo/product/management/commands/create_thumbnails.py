@@ -0,0 +1,59 @@
+from multiprocessing import Pool
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ...models import ProductImage
+from ...thumbnails import warm_product_images
+
+
+def warm_chunk(image_ids):
+    # Every worker process opens its own database connection on first use.
+    queryset = ProductImage.objects.filter(pk__in=image_ids)
+    num_created, failed = warm_product_images(queryset)
+    return num_created, failed
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Command(BaseCommand):
+    help = 'Generates all declared renditions for existing product images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=None,
+            help='Number of worker processes (defaults to the number of CPUs).')
+        parser.add_argument(
+            '--chunk-size', type=int, default=50,
+            help='Number of images handed to a worker at a time.')
+
+    def handle(self, *args, **options):
+        image_ids = list(
+            ProductImage.objects.order_by('pk').values_list('pk', flat=True))
+        if not image_ids:
+            self.stdout.write('No product images to process.')
+            return
+
+        # Connections must not be shared with the forked workers.
+        connections.close_all()
+
+        total_created = 0
+        total_failed = []
+        pool = Pool(processes=options['processes'])
+        try:
+            chunks = chunked(image_ids, options['chunk_size'])
+            for num_created, failed in pool.imap_unordered(warm_chunk, chunks):
+                total_created += num_created
+                total_failed.extend(failed)
+        finally:
+            pool.close()
+            pool.join()
+
+        self.stdout.write(self.style.SUCCESS(
+            'Created renditions for %d of %d images.' % (
+                total_created, len(image_ids))))
+        for path in total_failed:
+            self.stderr.write('Failed: %s' % (path, ))
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields.hstore
+from django.contrib.postgres.operations import HStoreExtension
+import django.core.validators
+from django.db import migrations, models
+import django.db.models.deletion
+import django_prices.models
+import versatileimagefield.fields
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        HStoreExtension(),
+        migrations.CreateModel(
+            name='AttributeChoiceValue',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='display name')),
+                ('slug', models.SlugField()),
+                ('volume', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='volume')),
+            ],
+            options={
+                'verbose_name': 'attribute choices value',
+                'verbose_name_plural': 'attribute choices values',
+            },
+        ),
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='name')),
+                ('slug', models.SlugField(max_length=200, verbose_name='slug')),
+                ('description', models.TextField(blank=True, verbose_name='description')),
+                ('hidden', models.BooleanField(default=False, verbose_name='hidden')),
+                ('lft', models.PositiveIntegerField(db_index=True, editable=False)),
+                ('rght', models.PositiveIntegerField(db_index=True, editable=False)),
+                ('tree_id', models.PositiveIntegerField(db_index=True, editable=False)),
+                ('level', models.PositiveIntegerField(db_index=True, editable=False)),
+                ('parent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='children', to='product.Category', verbose_name='parent')),
+            ],
+            options={
+                'verbose_name': 'category',
+                'verbose_name_plural': 'categories',
+                'permissions': (('vew_category', 'Can view categories'), ('edit_category', 'Can edit categories')),
+            },
+        ),
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='name')),
+                ('description', models.TextField(verbose_name='description')),
+                ('price', django_prices.models.PriceField(currency='USD', decimal_places=2, max_digits=12, verbose_name='price')),
+                ('available_on', models.DateField(blank=True, null=True, verbose_name='available on')),
+                ('is_published', models.BooleanField(default=True, verbose_name='is published')),
+                ('attributes', django.contrib.postgres.fields.hstore.HStoreField(default={}, verbose_name='attributes')),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True, verbose_name='updated at')),
+                ('is_featured', models.BooleanField(default=False, verbose_name='is featured')),
+                ('categories', models.ManyToManyField(related_name='products', to='product.Category', verbose_name='categories')),
+            ],
+            options={
+                'verbose_name': 'product',
+                'verbose_name_plural': 'products',
+                'permissions': (('view_product', 'Can view product'), ('edit_product', 'Can edit products')),
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductAttribute',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(unique=True, verbose_name='internal name')),
+                ('name', models.CharField(max_length=100, verbose_name='display name')),
+            ],
+            options={
+                'ordering': ('slug',),
+                'verbose_name': 'product attribute',
+                'verbose_name_plural': 'product attributes',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductImage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', versatileimagefield.fields.VersatileImageField(upload_to='products', verbose_name='image')),
+                ('ppoi', versatileimagefield.fields.PPOIField(default='0.5x0.5', editable=False, max_length=20, verbose_name='ppoi')),
+                ('alt', models.CharField(blank=True, max_length=200, verbose_name='short description')),
+                ('order', models.PositiveIntegerField(editable=False, verbose_name='order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='images', to='product.Product', verbose_name='product')),
+            ],
+            options={
+                'ordering': ('order',),
+                'verbose_name': 'product image',
+                'verbose_name_plural': 'product images',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductType',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='name')),
+                ('has_variants', models.BooleanField(default=True, verbose_name='has variants')),
+                ('is_shipping_required', models.BooleanField(default=True, verbose_name='is shipping required')),
+                ('product_attributes', models.ManyToManyField(blank=True, related_name='product_type', to='product.ProductAttribute', verbose_name='product attributes')),
+            ],
+            options={
+                'verbose_name': 'product type',
+                'verbose_name_plural': 'product types',
+            },
+        ),
+        migrations.CreateModel(
+            name='ProductVariant',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=32, unique=True, verbose_name='code')),
+                ('name', models.CharField(blank=True, max_length=128, verbose_name='name')),
+                ('price_override', django_prices.models.PriceField(blank=True, currency='USD', decimal_places=2, max_digits=12, null=True, verbose_name='price override')),
+                ('attributes', django.contrib.postgres.fields.hstore.HStoreField(default={}, verbose_name='attributes')),
+            ],
+            options={
+                'verbose_name': 'product variant',
+                'verbose_name_plural': 'product variants',
+            },
+        ),
+        migrations.CreateModel(
+            name='Stock',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField(default=1, validators=[django.core.validators.MinValueValidator(0)], verbose_name='quantity')),
+                ('quantity_allocated', models.IntegerField(default=0, validators=[django.core.validators.MinValueValidator(0)], verbose_name='allocated quantity')),
+                ('cost_price', django_prices.models.PriceField(blank=True, currency='USD', decimal_places=2, max_digits=12, null=True, verbose_name='cost price')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StockLocation',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=128, verbose_name='location')),
+            ],
+            options={
+                'permissions': (('vew_stock_location', 'Can view stock location'), ('edit_stock_location', 'Can edit stock location')),
+            },
+        ),
+        migrations.CreateModel(
+            name='VariantImage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variant_images', to='product.ProductImage', verbose_name='image')),
+                ('variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variant_images', to='product.ProductVariant', verbose_name='variant')),
+            ],
+            options={
+                'verbose_name': 'variant image',
+                'verbose_name_plural': 'variant images',
+            },
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='location',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='product.StockLocation'),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='variant',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock', to='product.ProductVariant', verbose_name='variant'),
+        ),
+        migrations.AddField(
+            model_name='productvariant',
+            name='images',
+            field=models.ManyToManyField(through='product.VariantImage', to='product.ProductImage', verbose_name='images'),
+        ),
+        migrations.AddField(
+            model_name='productvariant',
+            name='product',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='variants', to='product.Product'),
+        ),
+        migrations.AddField(
+            model_name='producttype',
+            name='variant_atttributes',
+            field=models.ManyToManyField(blank=True, related_name='product_type', to='product.ProductVariant', verbose_name='variant attributes'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='product_type',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='products', to='product.ProductType', verbose_name='product type'),
+        ),
+        migrations.AddField(
+            model_name='attributechoicevalue',
+            name='attribute',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='values', to='product.ProductAttribute'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='stock',
+            unique_together=set([('variant', 'location')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='productimage',
+            index_together=set([('product', 'order')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='attributechoicevalue',
+            unique_together=set([('name', 'attribute')]),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Indexes for the admin's case-insensitive prefix (``^field``) and
+    exact (``=field``) searches, which compare UPPER(field).
+    """
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction; it keeps
+    # the tables writable while the indexes are built.
+    atomic = False
+
+    dependencies = [
+        ('product', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS product_category_name_upper_like '
+            'ON product_category (UPPER(name::text) text_pattern_ops)',
+            'DROP INDEX CONCURRENTLY IF EXISTS product_category_name_upper_like',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS product_producttype_name_upper_like '
+            'ON product_producttype (UPPER(name::text) text_pattern_ops)',
+            'DROP INDEX CONCURRENTLY IF EXISTS product_producttype_name_upper_like',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS product_productattribute_name_upper_like '
+            'ON product_productattribute (UPPER(name::text) text_pattern_ops)',
+            'DROP INDEX CONCURRENTLY IF EXISTS product_productattribute_name_upper_like',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS product_product_name_upper_like '
+            'ON product_product (UPPER(name::text) text_pattern_ops)',
+            'DROP INDEX CONCURRENTLY IF EXISTS product_product_name_upper_like',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS product_productvariant_code_upper_like '
+            'ON product_productvariant (UPPER(code::text) text_pattern_ops)',
+            'DROP INDEX CONCURRENTLY IF EXISTS product_productvariant_code_upper_like',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS product_productvariant_name_upper_like '
+            'ON product_productvariant (UPPER(name::text) text_pattern_ops)',
+            'DROP INDEX CONCURRENTLY IF EXISTS product_productvariant_name_upper_like',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS product_stocklocation_name_upper_like '
+            'ON product_stocklocation (UPPER(name::text) text_pattern_ops)',
+            'DROP INDEX CONCURRENTLY IF EXISTS product_stocklocation_name_upper_like',
+        ),
+    ]
@@ -3,8 +3,10 @@ from __future__ import unicode_literals
 import datetime
 
 from django.conf import settings
-from django.db import models
-from django.db.models import F, Q, Max
+from django.core.validators import MinValueValidator
+from django.db import models, transaction
+from django.db.models import Case, F, Max, Min, Prefetch, Q, Value, When
+from django.db.models.functions import Coalesce
 from django.utils.encoding import python_2_unicode_compatible
 from django.utils.translation import pgettext_lazy as _
 from django.contrib.postgres.fields import HStoreField
@@ -13,7 +15,7 @@ from django_prices.models import Price, PriceField
 from mptt.models import MPTTModel
 from mptt.managers import TreeManager
 from satchless.item import InsufficientStock, Item, ItemRange
-from versatileimagefield.fields import VersatileImageField
+from versatileimagefield.fields import PPOIField, VersatileImageField
 
 
 @python_2_unicode_compatible
@@ -32,7 +34,7 @@ class Category(MPTTModel): # eg 1. Industrial fuel, 2. Chemical Products
         verbose_name = _('Category model', 'category')
         verbose_name_plural = _('Category model', 'categories')
         app_label = 'product'
-        permissions = ('vew_category', _('Permission description', 'Can view categories'),
+        permissions = (('vew_category', _('Permission description', 'Can view categories')),
             ('edit_category', _('Permission description', 'Can edit categories')))
 
     def __str__(self):
@@ -58,7 +60,44 @@ class ProductType(models.Model):
         return self.name
 
 
-class ProductManager(models.Manager):
+def effective_price_expression(prefix=''):
+    """
+    The price a variant sells at, resolved in SQL: its own override or the
+    price of its product.
+    """
+    return Coalesce(
+        prefix + 'price_override', prefix + 'product__price',
+        output_field=models.DecimalField(max_digits=12, decimal_places=2))
+
+
+class ProductQuerySet(models.QuerySet):
+
+    def annotate_price_range(self):
+        """
+        Annotate each product with ``min_price`` and ``max_price`` across its
+        variants. Products without variants fall back to their own price.
+        """
+        price = Coalesce(
+            'variants__price_override', 'price',
+            output_field=models.DecimalField(max_digits=12, decimal_places=2))
+        return self.annotate(min_price=Min(price), max_price=Max(price))
+
+    def prefetch_for_listing(self):
+        """
+        Batch-load everything a catalog listing renders. A page costs one
+        query per relation regardless of its size; only the first image of
+        each product is fetched (``ImageManager.first`` done in bulk with
+        DISTINCT ON).
+        """
+        return self.prefetch_related(
+            Prefetch('variants', queryset=ProductVariant.objects.annotate_effective_price().order_by('pk')),
+            Prefetch('variants__stock', queryset=Stock.objects.order_by('pk')),
+            Prefetch('images', to_attr='first_images',
+                     queryset=ProductImage.objects.order_by('product_id', 'order').distinct('product_id')),
+            Prefetch('categories', queryset=Category.objects.order_by('tree_id', 'lft')))
+
+
+class ProductManager(models.Manager.from_queryset(ProductQuerySet)):
 
     def get_available_products(self):
         today = datetime.date.today()
@@ -98,11 +137,35 @@ class Product(models.Model, ItemRange):
     def __str__(self):
         return self.name
 
+    def __iter__(self):
+        return iter(self.variants.all())
+
+    def is_in_stock(self):
+        return any(variant.get_stock_quantity() > 0 for variant in self)
+
+
+class ProductVariantQuerySet(models.QuerySet):
+
+    def annotate_effective_price(self):
+        return self.annotate(effective_price=effective_price_expression())
+
+    def filter_price_range(self, min_price=None, max_price=None):
+        qs = self.annotate_effective_price()
+        if min_price is not None:
+            qs = qs.filter(effective_price__gte=min_price)
+        if max_price is not None:
+            qs = qs.filter(effective_price__lte=max_price)
+        return qs
+
+    def order_by_price(self, descending=False):
+        return self.annotate_effective_price().order_by(
+            '-effective_price' if descending else 'effective_price', 'pk')
+
 
 @python_2_unicode_compatible
 class ProductVariant(models.Model, Item):
     code = models.CharField(_('Product variant field', 'code'), max_length=32, unique=True)
-    namd = models.CharField(_('Product variant field', 'namd'), max_length=128, blank=True)
+    name = models.CharField(_('Product variant field', 'name'), max_length=128, blank=True)
     price_override = PriceField(_('Product variant field', 'price override'),
      currency=settings.DEFAULT_CURRENCY, max_digits=12, decimal_places=2, blank=True, null=True)
     product = models.ForeignKey(Product, related_name='variants')
@@ -110,14 +173,32 @@ class ProductVariant(models.Model, Item):
     images = models.ManyToManyField('ProductImage', through='VariantImage', 
         verbose_name=_('Product variant field', 'images'))
 
+    objects = ProductVariantQuerySet.as_manager()
+
     class Meta:
-        app_label = 'products'
+        app_label = 'product'
         verbose_name = _('Product variant model', 'product variant')
         verbose_name_plural = _('Product variant model', 'product variants')
 
     def __str__(self):
         return self.name or self.display_variant()
 
+    def display_variant(self):
+        values = ', '.join(value for key, value in sorted(self.attributes.items()))
+        return values or self.code
+
+    def get_stock_quantity(self):
+        # Iterating .all() keeps this free when stock was prefetched.
+        return sum(stock.quantity_available for stock in self.stock.all())
+
+    def get_price_per_item(self, **kwargs):
+        # Use the database-resolved price when the queryset was annotated
+        # with annotate_effective_price() to avoid loading the product.
+        effective_price = getattr(self, 'effective_price', None)
+        if effective_price is not None:
+            return Price(effective_price, currency=settings.DEFAULT_CURRENCY)
+        return self.price_override or self.product.price
+
 
 @python_2_unicode_compatible
 class StockLocation(models.Model):
@@ -149,11 +230,11 @@ class StockManager(models.Manager):
 
 @python_2_unicode_compatible
 class Stock(models.Model):
-    variant = models.ForeignKey(ProductType, related_name='stock', verbose_name=_('Stock item field', 'variant'))
+    variant = models.ForeignKey(ProductVariant, related_name='stock', verbose_name=_('Stock item field', 'variant'))
     location = models.ForeignKey(StockLocation, null=True)
-    quantity = models.IntegerField(_('Stock item field', 'quantity'), validators=[MinValueValidator(0)], default=Decimal(1))
+    quantity = models.IntegerField(_('Stock item field', 'quantity'), validators=[MinValueValidator(0)], default=1)
     quantity_allocated = models.IntegerField(_('Stock item field', 'allocated quantity'),
-     validators=[MinValueValidator(0)], default=Decimal(0))
+     validators=[MinValueValidator(0)], default=0)
     cost_price = PriceField(_('Stock item field', 'cost price'), currency=settings.DEFAULT_CURRENCY, 
         max_digits=12, decimal_places=2, blank=True, null=True)
 
@@ -200,6 +281,29 @@ class AttributeChoiceValue(models.Model):
     def __str__(self):
         return self.name
 
+# Images are spaced ORDER_GAP apart so that a single image can be appended,
+# moved or deleted without rewriting the order of its siblings.
+ORDER_GAP = 1024
+
+
+def order_between(lower, upper):
+    """
+    Return an order value strictly between ``lower`` and ``upper`` or None
+    when the gap between them is exhausted. Either bound may be None to
+    mean the start or the end of the gallery.
+    """
+    if lower is None and upper is None:
+        return ORDER_GAP
+    if upper is None:
+        return lower + ORDER_GAP
+    if lower is None:
+        lower = 0
+    middle = (lower + upper) // 2
+    if middle in (lower, upper):
+        return None
+    return middle
+
+
 class ImageManager(models.Manager):
 
     def first(self):
@@ -208,8 +312,28 @@ class ImageManager(models.Manager):
         except IndexError:
             pass 
 
-
-class ProductImage(model.Model):
+    def reorder(self, product, image_ids):
+        """
+        Apply a complete new ordering of the product's images in a single
+        UPDATE statement. ``image_ids`` must list every image of the
+        product exactly once.
+        """
+        image_ids = [int(pk) for pk in image_ids]
+        qs = self.get_queryset().filter(product=product)
+        with transaction.atomic():
+            existing_ids = set(qs.select_for_update().values_list('pk', flat=True))
+            if len(image_ids) != len(existing_ids) or set(image_ids) != existing_ids:
+                raise ValueError(
+                    'The new ordering must list every image of the product exactly once.')
+            if not image_ids:
+                return 0
+            return qs.update(order=Case(
+                *[When(pk=pk, then=Value((position + 1) * ORDER_GAP))
+                  for position, pk in enumerate(image_ids)],
+                output_field=models.PositiveIntegerField()))
+
+
+class ProductImage(models.Model):
     product = models.ForeignKey(Product, related_name='images',
         verbose_name=_('Product image field', 'product'))
     image = VersatileImageField(upload_to='products', ppoi_field='ppoi', blank=False,
@@ -225,6 +349,18 @@ class ProductImage(model.Model):
         app_label = 'product'
         verbose_name = _('Product image model', 'product image')
         verbose_name_plural = _('Product image model', 'product images')
+        index_together = [('product', 'order')]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(ProductImage, cls).from_db(db, field_names, values)
+        if 'image' in field_names and 'ppoi' in field_names:
+            # What the stored renditions were made from, see save().
+            instance._rendition_source = instance.get_rendition_source()
+        return instance
+
+    def get_rendition_source(self):
+        return self.image.name, self._meta.get_field('ppoi').get_prep_value(self.ppoi)
 
     def get_ordering_queryset(self):
         return self.product.images.all()
@@ -232,15 +368,43 @@ class ProductImage(model.Model):
     def save(self, *args, **kwargs):
         if self.order is None:
             qs = self.get_ordering_queryset()
-            existing_max = qs.aggregate(Max('order'))
-            existing_max = existing_max.get('order__max')
-            self.order = 0 if existing_max is None else existing_max + 1
+            last_order = qs.order_by('-order').values_list('order', flat=True).first()
+            self.order = order_between(last_order, None)
         super(ProductImage, self).save(*args, **kwargs)
-
-    def delete(self, *args, **kwargs):
-        qs = self.get_ordering_queryset()
-        qs.filter(order__gt=self.order).update(order=F('order') - 1)
-        super(ProductImage, self).delete(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not {'image', 'ppoi'} & set(update_fields):
+            return
+        source = self.get_rendition_source()
+        # Created, or the image or its point of interest changed; saves
+        # that only move the image keep its renditions.
+        if source != getattr(self, '_rendition_source', None):
+            self._rendition_source = source
+            # Renditions are generated off the request path so that the first
+            # visitor never pays for resizing and uploading them.
+            from .tasks import create_product_thumbnails
+            transaction.on_commit(lambda: create_product_thumbnails.delay(self.pk))
+
+    def move_after(self, image=None):
+        """
+        Move this image right after ``image``, or to the front of the
+        gallery when ``image`` is None. Only this row is written unless the
+        gap between the neighbours is exhausted, in which case the whole
+        gallery is renumbered with a single ``reorder`` call.
+        """
+        qs = self.get_ordering_queryset().exclude(pk=self.pk)
+        lower = image.order if image is not None else None
+        following = qs.filter(order__gt=lower) if lower is not None else qs
+        upper = following.order_by('order').values_list('order', flat=True).first()
+        new_order = order_between(lower, upper)
+        if new_order is None:
+            image_ids = list(qs.values_list('pk', flat=True))
+            position = image_ids.index(image.pk) + 1 if image is not None else 0
+            image_ids.insert(position, self.pk)
+            ProductImage.objects.reorder(self.product, image_ids)
+            self.refresh_from_db(fields=['order'])
+            return
+        self.order = new_order
+        self.save(update_fields=['order'])
 
 
 class VariantImage(models.Model):
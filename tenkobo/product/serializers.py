@@ -0,0 +1,72 @@
+from rest_framework import serializers
+from versatileimagefield.serializers import VersatileImageFieldSerializer
+
+from tenkobo.core.currency import ConvertedPriceField
+from .models import Category, Product, ProductImage, ProductVariant
+
+
+class CatalogCategorySerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Category
+        fields = ('id', 'name', 'slug', 'description', 'parent')
+
+
+class CategorySummarySerializer(serializers.ModelSerializer):
+
+    class Meta:
+        model = Category
+        fields = ('id', 'name', 'slug')
+
+
+class ProductImageSerializer(serializers.ModelSerializer):
+    image = VersatileImageFieldSerializer(sizes='products')
+
+    class Meta:
+        model = ProductImage
+        fields = ('id', 'image', 'alt')
+
+
+class ProductVariantSerializer(serializers.ModelSerializer):
+    # Requires ProductVariant.objects.annotate_effective_price()
+    price = ConvertedPriceField(source='effective_price')
+    quantity_available = serializers.IntegerField(source='get_stock_quantity')
+
+    class Meta:
+        model = ProductVariant
+        fields = ('id', 'code', 'name', 'price', 'attributes', 'quantity_available')
+
+
+class CatalogProductSerializer(serializers.ModelSerializer):
+    """
+    Read-only product representation. Expects a queryset prepared with
+    ``Product.objects.prefetch_for_listing()`` so that no field triggers a
+    query of its own.
+    """
+    price = ConvertedPriceField()
+    currency = serializers.SerializerMethodField()
+    variants = ProductVariantSerializer(many=True)
+    first_image = serializers.SerializerMethodField()
+    categories = CategorySummarySerializer(many=True)
+    is_in_stock = serializers.BooleanField()
+
+    class Meta:
+        model = Product
+        fields = (
+            'id', 'name', 'description', 'price', 'currency', 'available_on',
+            'is_featured', 'attributes', 'categories', 'first_image',
+            'variants', 'is_in_stock', 'updated_at')
+        read_only_fields = fields
+
+    def get_currency(self, obj):
+        return self.context['currency']
+
+    def get_first_image(self, obj):
+        images = getattr(obj, 'first_images', None)
+        if images is None:
+            image = obj.images.first()
+        else:
+            image = images[0] if images else None
+        if image is None:
+            return None
+        return ProductImageSerializer(image, context=self.context).data
@@ -0,0 +1,15 @@
+from tenkobo.taskapp.celery import app
+
+from .models import ProductImage
+from .thumbnails import warm_product_images
+
+
+@app.task
+def create_product_thumbnails(image_id):
+    try:
+        image = ProductImage.objects.get(pk=image_id)
+    except ProductImage.DoesNotExist:
+        # The image was removed before the worker picked the task up.
+        return 0
+    num_created, failed = warm_product_images(image)
+    return num_created
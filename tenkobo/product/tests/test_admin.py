@@ -0,0 +1,26 @@
+from decimal import Decimal
+
+from django.core.urlresolvers import reverse
+from test_plus.test import TestCase
+
+from product.models import Product, ProductType
+
+
+class TestProductAdmin(TestCase):
+
+    def setUp(self):
+        user = self.make_user('admin')
+        user.is_staff = user.is_superuser = True
+        user.save()
+        self.client.force_login(user)
+        self.product = Product.objects.create(
+            product_type=ProductType.objects.create(name='Fuel'), name='Diesel',
+            description='', price=Decimal('10.00'))
+
+    def test_add_page(self):
+        response = self.client.get(reverse('admin:product_product_add'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_change_page(self):
+        response = self.client.get(reverse('admin:product_product_change', args=[self.product.pk]))
+        self.assertEqual(response.status_code, 200)
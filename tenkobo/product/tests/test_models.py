@@ -0,0 +1,175 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.test import SimpleTestCase
+from test_plus.test import TestCase
+
+from product.models import ORDER_GAP, Product, ProductImage, ProductType, ProductVariant, order_between
+
+
+class TestOrderBetween(SimpleTestCase):
+
+    def test_first_image(self):
+        self.assertEqual(order_between(None, None), ORDER_GAP)
+
+    def test_append(self):
+        self.assertEqual(order_between(3 * ORDER_GAP, None), 4 * ORDER_GAP)
+
+    def test_insert_at_front(self):
+        self.assertEqual(order_between(None, ORDER_GAP), ORDER_GAP // 2)
+
+    def test_insert_between(self):
+        self.assertEqual(order_between(ORDER_GAP, 2 * ORDER_GAP), ORDER_GAP + ORDER_GAP // 2)
+
+    def test_exhausted_gap(self):
+        self.assertIsNone(order_between(10, 11))
+        self.assertIsNone(order_between(None, 1))
+
+
+class TestPriceQuerySets(TestCase):
+
+    def setUp(self):
+        product_type = ProductType.objects.create(name='Fuel')
+        self.cheap = Product.objects.create(
+            product_type=product_type, name='Kerosene', description='', price=Decimal('10.00'))
+        self.dear = Product.objects.create(
+            product_type=product_type, name='Diesel', description='', price=Decimal('30.00'))
+        self.plain = Product.objects.create(
+            product_type=product_type, name='Gas', description='', price=Decimal('7.00'))
+        ProductVariant.objects.create(product=self.cheap, code='K-1')
+        ProductVariant.objects.create(product=self.cheap, code='K-5', price_override=Decimal('12.50'))
+        ProductVariant.objects.create(product=self.dear, code='D-1')
+        ProductVariant.objects.create(product=self.dear, code='D-5', price_override=Decimal('5.00'))
+
+    def codes(self, qs):
+        return [variant.code for variant in qs]
+
+    def test_effective_price(self):
+        prices = dict(ProductVariant.objects.annotate_effective_price().values_list('code', 'effective_price'))
+        self.assertEqual(prices, {
+            'K-1': Decimal('10.00'), 'K-5': Decimal('12.50'),
+            'D-1': Decimal('30.00'), 'D-5': Decimal('5.00')})
+
+    def test_filter_price_range(self):
+        qs = ProductVariant.objects.order_by('pk')
+        self.assertEqual(self.codes(qs.filter_price_range(Decimal('10.00'), Decimal('12.50'))), ['K-1', 'K-5'])
+        self.assertEqual(self.codes(qs.filter_price_range(min_price=Decimal('12.50'))), ['K-5', 'D-1'])
+        self.assertEqual(self.codes(qs.filter_price_range(max_price=Decimal('9.99'))), ['D-5'])
+        self.assertEqual(self.codes(qs.filter_price_range()), ['K-1', 'K-5', 'D-1', 'D-5'])
+
+    def test_order_by_price(self):
+        self.assertEqual(self.codes(ProductVariant.objects.order_by_price()), ['D-5', 'K-1', 'K-5', 'D-1'])
+        self.assertEqual(
+            self.codes(ProductVariant.objects.order_by_price(descending=True)), ['D-1', 'K-5', 'K-1', 'D-5'])
+
+    def test_order_by_price_breaks_ties_by_pk(self):
+        ProductVariant.objects.filter(code='K-5').update(price_override=Decimal('10.00'))
+        self.assertEqual(self.codes(ProductVariant.objects.order_by_price())[1:3], ['K-1', 'K-5'])
+        self.assertEqual(
+            self.codes(ProductVariant.objects.order_by_price(descending=True))[1:3], ['K-1', 'K-5'])
+
+    def test_annotate_price_range(self):
+        ranges = {
+            product.name: (product.min_price, product.max_price)
+            for product in Product.objects.annotate_price_range()}
+        self.assertEqual(ranges, {
+            'Kerosene': (Decimal('10.00'), Decimal('12.50')),
+            'Diesel': (Decimal('5.00'), Decimal('30.00')),
+            # No variants: the product's own price.
+            'Gas': (Decimal('7.00'), Decimal('7.00'))})
+
+
+class TestImageOrdering(TestCase):
+
+    def setUp(self):
+        self.product = Product.objects.create(
+            product_type=ProductType.objects.create(name='Fuel'), name='Diesel',
+            description='', price=Decimal('10.00'))
+        self.a, self.b, self.c = [
+            ProductImage.objects.create(product=self.product, image='products/%s.jpg' % name)
+            for name in 'abc']
+
+    def orders(self):
+        return dict(self.product.images.values_list('pk', 'order'))
+
+    def gallery(self):
+        return list(self.product.images.order_by('order').values_list('pk', flat=True))
+
+    def test_appended_with_gaps(self):
+        self.assertEqual(self.orders(), {self.a.pk: ORDER_GAP, self.b.pk: 2 * ORDER_GAP, self.c.pk: 3 * ORDER_GAP})
+
+    def test_reorder(self):
+        self.assertEqual(ProductImage.objects.reorder(self.product, [self.c.pk, str(self.a.pk), self.b.pk]), 3)
+        self.assertEqual(self.orders(), {self.c.pk: ORDER_GAP, self.a.pk: 2 * ORDER_GAP, self.b.pk: 3 * ORDER_GAP})
+
+    def test_reorder_needs_every_image_once(self):
+        for image_ids in ([self.a.pk, self.b.pk], [self.a.pk, self.b.pk, self.b.pk],
+                          [self.a.pk, self.b.pk, self.c.pk, self.c.pk + 1]):
+            with self.assertRaises(ValueError):
+                ProductImage.objects.reorder(self.product, image_ids)
+        self.assertEqual(self.gallery(), [self.a.pk, self.b.pk, self.c.pk])
+
+    def test_move_after_writes_one_row(self):
+        with self.assertNumQueries(2):
+            self.c.move_after(self.a)
+        self.assertEqual(self.gallery(), [self.a.pk, self.c.pk, self.b.pk])
+        self.assertEqual(self.orders()[self.b.pk], 2 * ORDER_GAP)
+
+    def test_move_to_front(self):
+        self.c.move_after(None)
+        self.assertEqual(self.gallery(), [self.c.pk, self.a.pk, self.b.pk])
+        self.assertEqual(self.c.order, ORDER_GAP // 2)
+
+    def test_move_into_exhausted_gap(self):
+        ProductImage.objects.filter(pk=self.a.pk).update(order=10)
+        ProductImage.objects.filter(pk=self.b.pk).update(order=11)
+        self.a.refresh_from_db()
+        self.c.move_after(self.a)
+        # The whole gallery is renumbered ORDER_GAP apart.
+        self.assertEqual(self.orders(), {self.a.pk: ORDER_GAP, self.c.pk: 2 * ORDER_GAP, self.b.pk: 3 * ORDER_GAP})
+        self.assertEqual(self.c.order, 2 * ORDER_GAP)
+
+    def test_move_to_exhausted_front(self):
+        ProductImage.objects.filter(pk=self.a.pk).update(order=1)
+        self.c.move_after(None)
+        self.assertEqual(self.gallery(), [self.c.pk, self.a.pk, self.b.pk])
+        self.assertEqual(self.c.order, ORDER_GAP)
+
+
+class TestImageRenditions(TestCase):
+
+    def setUp(self):
+        product = Product.objects.create(
+            product_type=ProductType.objects.create(name='Fuel'), name='Diesel',
+            description='', price=Decimal('10.00'))
+        self.image = ProductImage(product=product, image='products/a.jpg')
+
+    def queued(self, image, **kwargs):
+        """ Whether saving ``image`` queues its thumbnails """
+        with mock.patch('product.models.transaction.on_commit') as on_commit:
+            image.save(**kwargs)
+        return on_commit.called
+
+    def test_created(self):
+        self.assertTrue(self.queued(self.image))
+        self.assertFalse(self.queued(self.image))
+
+    def test_moved(self):
+        self.queued(self.image)
+        image = ProductImage.objects.get(pk=self.image.pk)
+        image.order += 1
+        self.assertFalse(self.queued(image))
+        image.move_after(None)
+        self.assertFalse(self.queued(image, update_fields=['order']))
+
+    def test_image_changed(self):
+        self.queued(self.image)
+        image = ProductImage.objects.get(pk=self.image.pk)
+        image.image = 'products/b.jpg'
+        self.assertTrue(self.queued(image))
+
+    def test_ppoi_changed(self):
+        self.queued(self.image)
+        image = ProductImage.objects.get(pk=self.image.pk)
+        image.ppoi = (0.25, 0.75)
+        self.assertTrue(self.queued(image))
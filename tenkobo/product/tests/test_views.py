@@ -0,0 +1,69 @@
+from decimal import Decimal
+
+from django.core.urlresolvers import reverse
+from test_plus.test import TestCase
+
+from product.models import Category, Product, ProductType, ProductVariant, Stock
+
+
+class TestCatalogProductList(TestCase):
+
+    def setUp(self):
+        product_type = ProductType.objects.create(name='Fuel')
+        category = Category.objects.create(name='Industrial fuel', slug='industrial-fuel')
+        for i in range(10):
+            product = Product.objects.create(
+                product_type=product_type, name='Product %d' % i,
+                description='', price=Decimal('10.00'))
+            product.categories.add(category)
+            variant = ProductVariant.objects.create(
+                product=product, code='P%d-A' % i)
+            ProductVariant.objects.create(
+                product=product, code='P%d-B' % i, price_override=Decimal('12.50'))
+            Stock.objects.create(variant=variant, quantity=5, quantity_allocated=2)
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        # products, count, variants, stock, images, categories
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('catalog-product-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 10)
+
+    def test_effective_price_and_stock(self):
+        response = self.client.get(reverse('catalog-product-list'))
+        product = response.data['results'][0]
+        prices = [variant['price'] for variant in product['variants']]
+        self.assertEqual(prices, ['10.00', '12.50'])
+        self.assertEqual(product['variants'][0]['quantity_available'], 3)
+        self.assertTrue(product['is_in_stock'])
+        self.assertIsNone(product['first_image'])
+
+    def names(self, **params):
+        response = self.client.get(reverse('catalog-product-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return [product['name'] for product in response.data['results']]
+
+    def test_price_ordering(self):
+        # Every product also has a 12.50 variant.
+        Product.objects.filter(name='Product 3').update(price=Decimal('30.00'))
+        Product.objects.filter(name='Product 7').update(price=Decimal('20.00'))
+        Product.objects.filter(name='Product 5').update(price=Decimal('5.00'))
+        names = self.names(ordering='-price')
+        self.assertEqual(names[:2], ['Product 3', 'Product 7'])
+        names = self.names(ordering='price')
+        self.assertEqual(names[0], 'Product 5')
+        # Then by lowest variant price: 10.00, or 12.50 for the dearer products.
+        self.assertEqual(names[1:], ['Product %d' % i for i in (0, 1, 2, 4, 6, 8, 9, 3, 7)])
+
+    def test_price_range(self):
+        Product.objects.filter(name='Product 3').update(price=Decimal('30.00'))
+        self.assertEqual(self.names(min_price='20'), ['Product 3'])
+        self.assertEqual(len(self.names(max_price='12.50')), 10)
+        self.assertEqual(self.names(max_price='9.99'), [])
+
+    def test_invalid_filters(self):
+        for params in ({'min_price': 'abc'}, {'max_price': 'NaN'}, {'min_price': 'Infinity'},
+                       {'category': 'x'}, {'category': '-1'}, {'category': str(2 ** 40)}):
+            response = self.client.get(reverse('catalog-product-list'), params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(list(params)[0], response.data)
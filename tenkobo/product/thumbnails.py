@@ -0,0 +1,21 @@
+from django.conf import settings
+from versatileimagefield.image_warmer import VersatileImageFieldWarmer
+
+
+PRODUCT_RENDITION_KEY_SET = 'products'
+
+
+def warm_product_images(instance_or_queryset):
+    """
+    Create every rendition declared in the ``products`` rendition key set
+    for the given image(s). Renditions that already exist in storage are
+    left untouched, so it is safe to call this more than once.
+
+    Returns a tuple of (number of images created, list of failed paths).
+    """
+    warmer = VersatileImageFieldWarmer(
+        instance_or_queryset=instance_or_queryset,
+        rendition_key_set=PRODUCT_RENDITION_KEY_SET,
+        image_attr='image',
+        verbose=settings.DEBUG)
+    return warmer.warm()
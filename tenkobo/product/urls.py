@@ -0,0 +1,14 @@
+from django.conf.urls import url
+
+from product import views
+
+urlpatterns = [
+    url(r'^products/$', views.CatalogProductList.as_view(),
+        name=views.CatalogProductList.name),
+    url(r'^products/(?P<pk>[0-9]+)/$', views.CatalogProductDetail.as_view(),
+        name=views.CatalogProductDetail.name),
+    url(r'^categories/$', views.CatalogCategoryList.as_view(),
+        name=views.CatalogCategoryList.name),
+    url(r'^categories/(?P<pk>[0-9]+)/$', views.CatalogCategoryDetail.as_view(),
+        name=views.CatalogCategoryDetail.name),
+]
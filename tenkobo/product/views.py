@@ -1,3 +1,94 @@
-from django.shortcuts import render
+from decimal import Decimal, InvalidOperation
 
-# Create your views here.
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+
+from tenkobo.core.currency import CurrencyMixin
+from .models import Category, Product
+from .serializers import CatalogCategorySerializer, CatalogProductSerializer
+
+
+# Largest value of a PostgreSQL integer primary key
+MAX_ID = 2 ** 31 - 1
+
+
+class CatalogPagination(PageNumberPagination):
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class CatalogProductList(CurrencyMixin, generics.ListAPIView):
+    serializer_class = CatalogProductSerializer
+    pagination_class = CatalogPagination
+    ordering_fields = {
+        'price': 'min_price',
+        '-price': '-max_price',
+        'name': 'name',
+        '-name': '-name',
+        'updated_at': 'updated_at',
+        '-updated_at': '-updated_at',
+    }
+    name = 'catalog-product-list'
+
+    def get_id_param(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        if not value.isdigit() or int(value) > MAX_ID:
+            raise ValidationError({name: ['A valid id is required.']})
+        return int(value)
+
+    def get_price_param(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            price = Decimal(value)
+        except InvalidOperation:
+            price = None
+        # Decimal() also accepts 'NaN' and 'Infinity'.
+        if price is None or not price.is_finite():
+            raise ValidationError({name: ['A number is required.']})
+        return price
+
+    def get_queryset(self):
+        today = timezone.now().date()
+        qs = Product.objects.filter(
+            Q(available_on__lte=today) | Q(available_on__isnull=True),
+            is_published=True)
+        params = self.request.query_params
+        category = self.get_id_param('category')
+        if category is not None:
+            qs = qs.filter(categories__id=category)
+        qs = qs.annotate_price_range()
+        min_price = self.get_price_param('min_price')
+        if min_price is not None:
+            qs = qs.filter(max_price__gte=min_price)
+        max_price = self.get_price_param('max_price')
+        if max_price is not None:
+            qs = qs.filter(min_price__lte=max_price)
+        ordering = self.ordering_fields.get(params.get('ordering'), 'name')
+        return qs.order_by(ordering, 'pk').prefetch_for_listing()
+
+
+class CatalogProductDetail(CurrencyMixin, generics.RetrieveAPIView):
+    queryset = Product.objects.filter(is_published=True).prefetch_for_listing()
+    serializer_class = CatalogProductSerializer
+    name = 'catalog-product-detail'
+
+
+class CatalogCategoryList(generics.ListAPIView):
+    queryset = Category.objects.filter(hidden=False).order_by('tree_id', 'lft')
+    serializer_class = CatalogCategorySerializer
+    pagination_class = CatalogPagination
+    name = 'catalog-category-list'
+
+
+class CatalogCategoryDetail(generics.RetrieveAPIView):
+    queryset = Category.objects.filter(hidden=False)
+    serializer_class = CatalogCategorySerializer
+    name = 'catalog-category-detail'
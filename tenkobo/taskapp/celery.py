@@ -1,6 +1,7 @@
 
 import os
 from celery import Celery
+from celery.signals import worker_init
 from django.apps import apps, AppConfig
 from django.conf import settings
 
@@ -20,37 +21,51 @@ class CeleryConfig(AppConfig):
     def ready(self):
         # Using a string here means the worker will not have to
         # pickle the object when using Windows.
-        app.config_from_object('django.conf:settings')
-        installed_apps = [app_config.name for app_config in apps.get_app_configs()]
-        app.autodiscover_tasks(lambda: installed_apps, force=True)
+        app.config_from_object('django.conf:settings', namespace='CELERY')
+        # Only our own apps define tasks. Without force the tasks modules
+        # are imported when a worker starts, in its main process before
+        # the pool forks, instead of in every web process at boot.
+        apps_dir = str(settings.APPS_DIR)
+        local_apps = [app_config.name for app_config in apps.get_app_configs()
+                      if app_config.path.startswith(apps_dir)]
+        app.autodiscover_tasks(lambda: local_apps)
 
-        if hasattr(settings, 'RAVEN_CONFIG'):
-            # Celery signal registration
+        if settings.TASK_METRICS_ENABLED:
+            from .metrics import connect as connect_task_metrics
+            connect_task_metrics()
 
-            from raven import Client as RavenClient
-            from raven.contrib.celery import register_signal as raven_register_signal
-            from raven.contrib.celery import register_logger_signal as raven_register_logger_signal
+        # The error reporting hooks only matter where tasks run.
+        worker_init.connect(install_worker_hooks, weak=False, dispatch_uid='tenkobo-worker-hooks')
 
 
-            raven_client = RavenClient(dsn=settings.RAVEN_CONFIG['DSN'])
-            raven_register_logger_signal(raven_client)
-            raven_register_signal(raven_client)
+def install_worker_hooks(**kwargs):
+    if hasattr(settings, 'RAVEN_CONFIG'):
+        # Celery signal registration
 
-        if hasattr(settings, 'OPBEAT'):
+        from raven import Client as RavenClient
+        from raven.contrib.celery import register_signal as raven_register_signal
+        from raven.contrib.celery import register_logger_signal as raven_register_logger_signal
 
-            from opbeat.contrib.django.models import client as opbeat_client
-            from opbeat.contrib.django.models import logger as opbeat_logger
-            from opbeat.contrib.django.models import register_handlers as opbeat_register_handlers
-            from opbeat.contrib.celery import register_signal as opbeat_register_signal
 
+        raven_client = RavenClient(dsn=settings.RAVEN_CONFIG['DSN'])
+        raven_register_logger_signal(raven_client)
+        raven_register_signal(raven_client)
 
-            try:
-                opbeat_register_signal(opbeat_client)
-            except Exception as e:
-                opbeat_logger.exception('Failed installing celery hook: %s' % e)
+    if hasattr(settings, 'OPBEAT'):
 
-            if 'opbeat.contrib.django' in settings.INSTALLED_APPS:
-                opbeat_register_handlers()
+        from opbeat.contrib.django.models import client as opbeat_client
+        from opbeat.contrib.django.models import logger as opbeat_logger
+        from opbeat.contrib.django.models import register_handlers as opbeat_register_handlers
+        from opbeat.contrib.celery import register_signal as opbeat_register_signal
+
+
+        try:
+            opbeat_register_signal(opbeat_client)
+        except Exception as e:
+            opbeat_logger.exception('Failed installing celery hook: %s' % e)
+
+        if 'opbeat.contrib.django' in settings.INSTALLED_APPS:
+            opbeat_register_handlers()
 
 
 @app.task(bind=True)
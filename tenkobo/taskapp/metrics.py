@@ -0,0 +1,184 @@
+"""
+Task lifecycle metrics collected through Celery signals.
+
+The publisher stamps every message with the time it was enqueued; the
+worker then records, per task name and per minute, the number of runs by
+final state, the time spent waiting in the queue, the run time and the
+size of the JSON encoded result in a Redis hash::
+
+    taskmetrics:<minute>:<task name>
+
+Buckets expire after ``TASK_METRICS_RETENTION_MINUTES``. Recording
+never raises: losing a data point is better than failing a task.
+"""
+import json
+import logging
+import time
+
+from celery import signals
+from django.conf import settings
+
+from tenkobo.core.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+ENQUEUED_AT_HEADER = 'enqueued_at'
+KEY_PREFIX = 'taskmetrics'
+TASK_NAMES_KEY = KEY_PREFIX + ':tasks'
+
+# HINCRBYFLOAT for the totals, keep the largest value for the maximums.
+RECORD_SCRIPT = """
+local key = KEYS[1]
+redis.call('HINCRBY', key, 'count', 1)
+redis.call('HINCRBY', key, 'state:' .. ARGV[2], 1)
+for i = 3, #ARGV, 2 do
+    local field, value = ARGV[i], tonumber(ARGV[i + 1])
+    redis.call('HINCRBYFLOAT', key, field .. ':total', value)
+    redis.call('HINCRBY', key, field .. ':samples', 1)
+    local current = tonumber(redis.call('HGET', key, field .. ':max'))
+    if current == nil or value > current then
+        redis.call('HSET', key, field .. ':max', value)
+    end
+end
+redis.call('EXPIRE', key, ARGV[1])
+return 1
+"""
+
+MEASURES = ('wait', 'runtime', 'result_bytes')
+
+# Start times of the tasks running in this worker process, by task id
+_started = {}
+
+
+def minute(timestamp):
+    return int(timestamp // 60)
+
+
+def bucket_key(bucket, task_name):
+    return '%s:%d:%s' % (KEY_PREFIX, bucket, task_name)
+
+
+def result_size(retval):
+    try:
+        return len(json.dumps(retval, default=str))
+    except (TypeError, ValueError):
+        return None
+
+
+def record(task_name, state, timestamp, **measures):
+    """ Add one task run to the bucket of the minute ``timestamp`` falls in """
+    retention = settings.TASK_METRICS_RETENTION_MINUTES * 60
+    args = [retention, state]
+    for field in MEASURES:
+        value = measures.get(field)
+        if value is not None:
+            args.extend([field, value])
+    try:
+        client = get_redis()
+        pipe = client.pipeline(transaction=False)
+        pipe.eval(RECORD_SCRIPT, 1, bucket_key(minute(timestamp), task_name), *args)
+        pipe.sadd(TASK_NAMES_KEY, task_name)
+        pipe.execute()
+    except Exception:
+        logger.warning('Could not record metrics for %s', task_name, exc_info=True)
+
+
+def stamp_enqueued_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(ENQUEUED_AT_HEADER, time.time())
+
+
+def task_started(task_id=None, task=None, **kwargs):
+    _started[task_id] = time.time()
+
+
+def task_finished(task_id=None, task=None, retval=None, state=None, **kwargs):
+    started = _started.pop(task_id, None)
+    if task is None or started is None:
+        return
+    now = time.time()
+    enqueued_at = getattr(task.request, ENQUEUED_AT_HEADER, None)
+    wait = None
+    if enqueued_at is not None:
+        wait = max(started - float(enqueued_at), 0)
+    size = result_size(retval) if state == 'SUCCESS' else None
+    record(task.name, state or 'UNKNOWN', now, wait=wait, runtime=now - started, result_bytes=size)
+
+
+def connect():
+    signals.before_task_publish.connect(stamp_enqueued_at, dispatch_uid='taskmetrics-publish')
+    signals.task_prerun.connect(task_started, dispatch_uid='taskmetrics-prerun')
+    signals.task_postrun.connect(task_finished, dispatch_uid='taskmetrics-postrun')
+
+
+def summarize(buckets):
+    """
+    Merge per-minute hashes (``{field: value}`` with bytes or str values)
+    of one task into totals, averages and maximums.
+    """
+    summary = {'count': 0, 'states': {}}
+    totals = dict((field, [0.0, 0, None]) for field in MEASURES)
+    for bucket in buckets:
+        for field, value in bucket.items():
+            if isinstance(field, bytes):
+                field = field.decode('utf-8')
+            value = float(value)
+            if field == 'count':
+                summary['count'] += int(value)
+            elif field.startswith('state:'):
+                state = field[len('state:'):]
+                summary['states'][state] = summary['states'].get(state, 0) + int(value)
+            else:
+                measure, kind = field.rsplit(':', 1)
+                if measure not in totals:
+                    continue
+                if kind == 'total':
+                    totals[measure][0] += value
+                elif kind == 'samples':
+                    totals[measure][1] += int(value)
+                elif kind == 'max':
+                    current = totals[measure][2]
+                    totals[measure][2] = value if current is None else max(current, value)
+    for measure, (total, samples, maximum) in totals.items():
+        summary[measure] = {
+            'avg': total / samples if samples else None,
+            'max': maximum,
+            'total': total,
+        }
+    return summary
+
+
+def get_task_stats(minutes):
+    """ Summaries of every task seen in the last ``minutes`` minutes """
+    client = get_redis()
+    last = minute(time.time())
+    buckets = range(last - minutes + 1, last + 1)
+    names = sorted(name.decode('utf-8') for name in client.smembers(TASK_NAMES_KEY))
+    pipe = client.pipeline(transaction=False)
+    for name in names:
+        for bucket in buckets:
+            pipe.hgetall(bucket_key(bucket, name))
+    results = pipe.execute()
+    stats = []
+    for index, name in enumerate(names):
+        summary = summarize(results[index * len(buckets):(index + 1) * len(buckets)])
+        if summary['count']:
+            summary['task'] = name
+            stats.append(summary)
+    stats.sort(key=lambda summary: summary['runtime']['total'], reverse=True)
+    return stats
+
+
+def get_queue_lengths(app):
+    """ Number of messages waiting in each configured queue """
+    lengths = {}
+    with app.connection_for_read() as connection:
+        channel = connection.default_channel
+        for queue in app.amqp.queues:
+            try:
+                lengths[queue] = channel.queue_declare(queue=queue, passive=True).message_count
+            except Exception:
+                logger.warning('Could not read the length of queue %s', queue, exc_info=True)
+                lengths[queue] = None
+    return lengths
@@ -0,0 +1,36 @@
+from django.test import SimpleTestCase
+
+from ..metrics import result_size, stamp_enqueued_at, summarize
+
+
+class TestSummarize(SimpleTestCase):
+
+    def test_merges_minute_buckets(self):
+        summary = summarize([
+            {b'count': b'2', b'state:SUCCESS': b'2', b'runtime:total': b'3.0',
+             b'runtime:samples': b'2', b'runtime:max': b'2.5', b'wait:total': b'1.0',
+             b'wait:samples': b'2', b'wait:max': b'0.75'},
+            {b'count': b'1', b'state:FAILURE': b'1', b'runtime:total': b'6.0',
+             b'runtime:samples': b'1', b'runtime:max': b'6.0'},
+            {},
+        ])
+        self.assertEqual(summary['count'], 3)
+        self.assertEqual(summary['states'], {'SUCCESS': 2, 'FAILURE': 1})
+        self.assertEqual(summary['runtime'], {'avg': 3.0, 'max': 6.0, 'total': 9.0})
+        self.assertEqual(summary['wait'], {'avg': 0.5, 'max': 0.75, 'total': 1.0})
+        self.assertEqual(summary['result_bytes'], {'avg': None, 'max': None, 'total': 0.0})
+
+
+class TestSignalHandlers(SimpleTestCase):
+
+    def test_stamp_keeps_existing_header(self):
+        headers = {'enqueued_at': 1.0}
+        stamp_enqueued_at(headers=headers)
+        self.assertEqual(headers['enqueued_at'], 1.0)
+        headers = {}
+        stamp_enqueued_at(headers=headers)
+        self.assertIn('enqueued_at', headers)
+
+    def test_result_size(self):
+        self.assertEqual(result_size({'a': 1}), len('{"a": 1}'))
+        self.assertEqual(result_size(None), len('null'))
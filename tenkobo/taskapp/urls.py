@@ -0,0 +1,8 @@
+from django.conf.urls import url
+
+from . import views
+
+
+urlpatterns = [
+    url(r'^$', views.TaskMetrics.as_view(), name=views.TaskMetrics.name),
+]
@@ -0,0 +1,35 @@
+from django.conf import settings
+from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+from .celery import app
+from .metrics import get_queue_lengths, get_task_stats
+
+
+class TaskMetrics(generics.GenericAPIView):
+    """
+    Queue lengths and per-task wait time, run time, result size and
+    outcome counts over the last ``minutes`` minutes (default 60).
+    """
+    name = 'task-metrics'
+    permission_classes = (IsAdminUser,)
+
+    def get_minutes(self):
+        limit = settings.TASK_METRICS_RETENTION_MINUTES
+        try:
+            minutes = int(self.request.query_params.get('minutes', 60))
+        except ValueError:
+            raise ValidationError({'minutes': 'A whole number is required.'})
+        if not 1 <= minutes <= limit:
+            raise ValidationError({'minutes': 'Must be between 1 and %d.' % limit})
+        return minutes
+
+    def get(self, request, *args, **kwargs):
+        minutes = self.get_minutes()
+        return Response({
+            'minutes': minutes,
+            'queues': get_queue_lengths(app),
+            'tasks': get_task_stats(minutes),
+        })